@@ -1,17 +1,79 @@
 import os
 from typing import List, Optional
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
 
+class LLMProviderConfig(BaseModel):
+    """one backend in the LLM_PROVIDERS pool, unset fields fall back to the global LLM_* settings"""
+    name: str
+    kind: str  # groq, openai (any openai-compatible api) or mock
+    model: str = ""
+    base_url: str = ""
+    api_key: str = ""
+    weight: float = 1.0  # share of traffic, 0 keeps the provider for failover and hedging only
+    timeout_seconds: Optional[float] = None
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    # mock providers only, default to the MOCK_LLM_* settings
+    latency_ms: Optional[float] = None
+    failure_rate: Optional[float] = None
+    malformed_rate: Optional[float] = None
+
+
+class WorkerLaneConfig(BaseModel):
+    """a worker concurrency pool reserved for submissions rated max_rating or lower"""
+    name: str
+    max_rating: int = Field(..., ge=1, le=5)
+    concurrency: int = Field(..., ge=1)
+
+
 class Settings(BaseSettings):
     """loads all app settings from environment variables, with sensible defaults where needed"""
     # database connection string
     DATABASE_URL: str
     DATABASE_URL_TEST: str = ""
     
+    # connection pool settings, applied to both the sync and async engines
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # replace connections before the server or a proxy drops them
+    DB_POOL_TIMEOUT_SECONDS: int = 30  # how long a request waits for a free connection
+    DB_POOL_PRE_PING: bool = False  # test connections on checkout, costs a round trip each time
+    DB_STATEMENT_CACHE_SIZE: int = 100  # prepared statements cached per connection, 0 for pgbouncer transaction mode
+    
     # app limits and logging
-    MAX_REVIEW_CHARS: int = 4000
+    MAX_REVIEW_CHARS: int = 20000  # longest review stored, what reaches the llm is bounded by REVIEW_TOKEN_BUDGET
+    REVIEW_TOKEN_BUDGET: int = 600  # review tokens sent to the llm, longer reviews keep their most informative sentences (0 sends them whole)
+    TOKENIZER_ENCODING: str = "cl100k_base"  # tiktoken encoding used when tiktoken is installed, otherwise tokens are approximated
+    BULK_MAX_ITEMS: int = 5000  # items accepted per bulk submission request
+    
+    # admission control - new submissions get a 429 with Retry-After instead of growing an unbounded backlog
+    ADMISSION_MAX_PENDING: int = 50000  # PENDING submissions at which new ones are refused, 0 disables
+    ADMISSION_MAX_WAIT_SECONDS: float = 900.0  # refuse when the backlog would take longer than this to drain, 0 disables
+    ADMISSION_MIN_PENDING: int = 500  # the drain time is only checked above this backlog
+    ADMISSION_RATE_WINDOW_SECONDS: float = 60.0  # the processing rate is measured over this window
+    ADMISSION_REFRESH_SECONDS: float = 2.0  # how long a backlog reading is reused
+    ADMISSION_MAX_RETRY_AFTER_SECONDS: float = 300.0
+    CLIENT_RATE_LIMIT_PER_MINUTE: int = 60  # submission requests per client (api key or ip) and api process, 0 disables
+    CLIENT_RATE_LIMIT_BURST: int = 20
+    CLIENT_RATE_LIMIT_MAX_CLIENTS: int = 100000  # client buckets kept in memory
+    CLIENT_IP_HEADER: str = ""  # header holding the client ip behind a proxy, e.g. x-forwarded-for
+    
+    # duplicate suppression - retried submissions return the original instead of queuing the review again
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # how long an Idempotency-Key replays its original response
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+    DEDUPE_WINDOW_SECONDS: float = 0.0  # identical rating and review within this window share one submission, 0 disables
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" for structured logs, "text" for the plain dev format
+    LOG_SAMPLE_RATE: float = 1.0  # share of submissions/requests whose INFO logs are kept, warnings are always kept
+    ANALYTICS_CACHE_TTL_SECONDS: int = 10
+    SUBMISSION_CACHE_MAX_ENTRIES: int = 10000  # finished submission details kept in process
+    SUBMISSION_CACHE_TTL_SECONDS: int = 3600
+    SUBMISSION_CACHE_REDIS_URL: str = ""  # optional shared tier across replicas
+    SSE_KEEPALIVE_SECONDS: float = 15.0  # comment line sent on idle status streams so proxies keep them open
+    SSE_MAX_STREAM_SECONDS: float = 300.0  # status streams close after this, EventSource reconnects on its own
+    EXPORT_CHUNK_ROWS: int = 1000  # rows fetched per server-side cursor round trip during exports
     
     # admin login credentials
     ADMIN_USERNAME: str
@@ -36,12 +98,67 @@ class Settings(BaseSettings):
     LLM_BASE_URL: str = ""
     LLM_TIMEOUT_SECONDS: int = 30
     LLM_MAX_RETRIES: int = 2
+    LLM_STREAM_RESPONSES: bool = True  # stream completions and stop reading at the json's closing brace
+    LLM_JSON_MODE: bool = True  # ask the provider for a json object on non-streamed calls
+    LLM_REPAIR_ENABLED: bool = True  # one follow-up call with the validation error when a response is invalid
+    
+    # provider pool as a json list of LLMProviderConfig, empty uses the single provider above
+    LLM_PROVIDERS: List[LLMProviderConfig] = []
+    LLM_HEDGE_ENABLED: bool = False  # also ask a second provider when the first is slower than its p95
+    LLM_HEDGE_DELAY_MS: int = 2000  # hedge delay used until a provider has enough latency samples
+    
+    # provider rate limiting, backoff and circuit breaker (0 disables a per-minute limit)
+    LLM_REQUESTS_PER_MINUTE: int = 30
+    LLM_TOKENS_PER_MINUTE: int = 0
+    LLM_EXPECTED_OUTPUT_TOKENS: int = 300  # completion size assumed when reserving token budget
+    LLM_BACKOFF_BASE_SECONDS: float = 1.0
+    LLM_BACKOFF_MAX_SECONDS: float = 30.0
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+    LLM_MAX_CONCURRENCY: int = 32  # llm calls in flight per process (async pipeline)
+    LLM_BATCH_SIZE: int = 1  # reviews per llm call in the async pipeline, 1 disables batching
+    LLM_BATCH_MAX_WAIT_MS: int = 200  # longest a review waits for its batch to fill
+    
+    # llm response cache for duplicate reviews
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 10000  # in-process lru size
+    LLM_CACHE_TTL_SECONDS: int = 604800  # 7 days
+    LLM_CACHE_PERSISTENT: bool = False  # also keep entries in the llm_response_cache table
+    LLM_CACHE_DB_MAX_ROWS: int = 100000
+    
+    # mock provider (LLM_PROVIDER=mock) for local runs and benchmarks
+    MOCK_LLM_LATENCY_MS: float = 0
+    MOCK_LLM_LATENCY_JITTER_MS: float = 0  # latency varies uniformly by +/- this much
+    MOCK_LLM_FAILURE_RATE: float = 0.0  # share of calls that fail with a retryable 503
+    MOCK_LLM_MALFORMED_RATE: float = 0.0  # share of responses that aren't clean json
+    
+    # submission queue worker settings
+    WORKER_ASYNC: bool = True  # event-loop worker; false falls back to a thread pool
+    WORKER_CONCURRENCY: int = 64  # submissions in flight per worker
+    WORKER_POLL_INTERVAL_SECONDS: float = 1.0
+    WORKER_LEASE_SECONDS: int = 300  # must exceed the worst-case processing time of one submission
+    WORKER_EMBEDDED: bool = False  # also run a worker inside the api process (single-service deploys)
+    WORKER_METRICS_PORT: int = 0  # serve prometheus metrics from standalone workers on this port, 0 disables
+    WORKER_LANES: List[WorkerLaneConfig] = []  # extra pools claimed before the main one, e.g. a fast lane for low ratings
+    
+    # queue priority - submissions are claimed oldest first after subtracting a boost from their age
+    PRIORITY_RATING_WEIGHT_SECONDS: float = 60.0  # boost per star below 5
+    PRIORITY_LENGTH_WEIGHT_SECONDS: float = 30.0  # boost for a review of 1000+ characters, shorter ones get a share
+    PRIORITY_MAX_BOOST_SECONDS: float = 300.0  # no submission waits behind one created this much later
+    
+    # automatic reprocessing of failed submissions and submissions abandoned by a crashed worker
+    RETRY_MAX_ATTEMPTS: int = 3  # processing attempts per submission before it stays FAILED
+    RETRY_BACKOFF_BASE_SECONDS: float = 60.0  # wait before the first retry, doubled for each later one
+    RETRY_BACKOFF_MAX_SECONDS: float = 3600.0
+    RETRY_SWEEP_INTERVAL_SECONDS: float = 30.0  # how often workers look for due retries and expired leases, 0 disables
+    RETRY_SWEEP_BATCH_SIZE: int = 500  # rows handled per sweep
     
     @property
     def llm_api_key(self) -> str:
         """returns the api key based on which provider is configured"""
         if self.LLM_PROVIDER == "groq":
             return self.GROQ_API_KEY or self.LLM_API_KEY or ""
+        return self.LLM_API_KEY
     
     # cors allowed origins (comma-separated)
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173"
@@ -1,25 +1,174 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 from app.core.config import settings
 
+# correlation ids, carried through asyncio tasks and asyncio.to_thread automatically
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+submission_id_var: ContextVar[Optional[str]] = ContextVar("submission_id", default=None)
+# per-submission stage durations in milliseconds, filled in by timed_stage
+stage_timings_var: ContextVar[Optional[dict]] = ContextVar("stage_timings", default=None)
+
+# attributes every LogRecord has, anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class ContextFilter(logging.Filter):
+    """copies the correlation ids onto each record (runs in the logging thread's context), unless passed in `extra`"""
+
+    def filter(self, record):
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        if getattr(record, "submission_id", None) is None:
+            record.submission_id = submission_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of INFO and DEBUG records; warnings and errors are always kept.
+    The decision is made per submission or request id when there is one, so a sampled
+    submission keeps all of its lines instead of a random subset.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno >= logging.WARNING:
+            return True
+        key = getattr(record, "submission_id", None) or getattr(record, "request_id", None)
+        if key:
+            return (zlib.crc32(key.encode("utf-8")) % 10000) < self.rate * 10000
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """formats records as one json object per line"""
+
+    def format(self, record):
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
 
 def setup_logging():
     """Configure application-wide logging."""
+    global _listener
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
-    
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-    
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    # callers only enqueue records, a background thread does the stdout writes
+    if _listener:
+        _listener.stop()
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # the queue handler only merges args into the message, the stream handler does the real formatting
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE))
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logging.basicConfig(level=log_level, handlers=[queue_handler], force=True)
+
     # Reduce noise from third-party libraries
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
-    
+
 
 def get_logger(name: str):
     """Get a logger instance for a module."""
     return logging.getLogger(name)
+
+
+@contextmanager
+def log_context(request_id: Optional[str] = None, submission_id: Optional[str] = None):
+    """sets the correlation ids for the enclosed block and starts a fresh set of stage timings"""
+    tokens = [
+        (request_id_var, request_id_var.set(request_id)),
+        (submission_id_var, submission_id_var.set(str(submission_id) if submission_id else None)),
+        (stage_timings_var, stage_timings_var.set({})),
+    ]
+    try:
+        yield
+    finally:
+        # reset so pooled worker threads don't leak ids into the next submission
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+@contextmanager
+def timed_stage(stage: str):
+    """adds the block's duration to the current submission's stage timings"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = stage_timings_var.get()
+        if timings is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed_ms, 2)
+
+
+def stage_timings() -> dict:
+    """the stage timings collected so far for the current submission"""
+    return dict(stage_timings_var.get() or {})
+
+
+class RequestContextMiddleware:
+    """ASGI middleware that assigns each request an id (or reuses X-Request-ID) and echoes it back"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        incoming = headers.get(b"x-request-id", b"").decode("latin-1")
+        # only trust short, printable ids from clients
+        request_id = incoming if 0 < len(incoming) <= 64 and incoming.isprintable() else uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,194 @@
+import time
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# buckets sized for llm round trips, which take seconds rather than milliseconds
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response starts, per route template",
+    ["method", "route", "status"]
+)
+
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds",
+    "Latency of single provider calls (each retry attempt is observed)",
+    ["provider", "model", "outcome"],
+    buckets=LLM_BUCKETS
+)
+LLM_USER_RESPONSE_SECONDS = Histogram(
+    "llm_user_response_seconds",
+    "Time from the start of a streamed call until user_ai_response was complete",
+    ["provider", "model"],
+    buckets=LLM_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens reported by the provider",
+    ["provider", "model", "kind"]
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "Failed provider calls by error type or http status",
+    ["provider", "model", "error"]
+)
+LLM_PARSE_FALLBACKS = Counter(
+    "llm_parse_fallbacks_total",
+    "Responses that weren't clean json and went through the extraction fallback",
+    ["model", "outcome"]
+)
+LLM_REPAIRS = Counter(
+    "llm_repairs_total",
+    "Repair calls made after a response failed validation, by whether the repaired answer was valid",
+    ["model", "outcome"]
+)
+LLM_FAILOVERS = Counter(
+    "llm_failovers_total",
+    "Failed provider calls retried on a different provider, by the provider that failed",
+    ["provider"]
+)
+LLM_HEDGES = Counter(
+    "llm_hedges_total",
+    "Hedged calls sent to a second provider after the first passed its p95 latency, by which answered first",
+    ["winner"]
+)
+LLM_CACHE_LOOKUPS = Counter(
+    "llm_cache_lookups_total",
+    "LLM response cache lookups by result (memory_hit / db_hit / miss)",
+    ["result"]
+)
+
+SUBMISSIONS_PROCESSED = Counter(
+    "submissions_processed_total",
+    "Submissions finished by this process",
+    ["outcome"]
+)
+SUBMISSION_PROCESSING_SECONDS = Histogram(
+    "submission_processing_duration_seconds",
+    "Time to process one claimed submission, llm call included",
+    buckets=LLM_BUCKETS
+)
+SUBMISSIONS_REJECTED = Counter(
+    "submissions_rejected_total",
+    "Submission requests refused with a 429, by per-client rate limit or backlog check",
+    ["reason"]
+)
+SUBMISSIONS_DEDUPLICATED = Counter(
+    "submissions_deduplicated_total",
+    "Submission requests answered with an existing submission instead of queuing a new one",
+    ["reason"]
+)
+SUBMISSION_QUEUE_WAIT_SECONDS = Histogram(
+    "submission_queue_wait_seconds",
+    "Time from submission until a worker lane first claimed it",
+    ["lane"],
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+SUBMISSION_PROMPT_TOKENS = Histogram(
+    "submission_prompt_tokens",
+    "Prompt tokens per accepted submission, after normalization and compaction to REVIEW_TOKEN_BUDGET",
+    buckets=(100, 200, 300, 400, 500, 600, 800, 1000, 1500, 2000, 4000)
+)
+SUBMISSIONS_REQUEUED = Counter(
+    "submissions_requeued_total",
+    "Submissions put back in the queue: due automatic retries, expired worker leases, or admin requeues",
+    ["reason"]
+)
+SUBMISSIONS_IN_FLIGHT = Gauge(
+    "submissions_in_flight",
+    "Submissions currently being processed by this process"
+)
+
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "How long callers waited to get a connection from the pool, including opening a new one",
+    ["engine"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+DB_POOL_HOLD_SECONDS = Histogram(
+    "db_pool_connection_hold_seconds",
+    "How long connections are held between checkout and checkin",
+    ["engine"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ["engine"]
+)
+
+
+def instrument_engine(engine: Engine, name: str):
+    """records pool wait time, connection hold time and in-use connections for an engine"""
+    wait_seconds = DB_POOL_WAIT_SECONDS.labels(engine=name)
+    hold_seconds = DB_POOL_HOLD_SECONDS.labels(engine=name)
+    checked_out = DB_POOL_CHECKED_OUT.labels(engine=name)
+
+    # the pool has no event before a checkout starts, so time the call every connection goes through;
+    # wrapping the engine rather than the pool survives engine.dispose() replacing the pool
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        finally:
+            # timeouts are observed too, an exhausted pool shows up as waits of DB_POOL_TIMEOUT_SECONDS
+            wait_seconds.observe(time.perf_counter() - started)
+
+    engine.raw_connection = timed_raw_connection
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        checked_out.inc()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            hold_seconds.observe(time.perf_counter() - started)
+            checked_out.dec()
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware that times every http request.
+    Labels use the matched route template (e.g. /api/submissions/{submission_id}) so ids
+    don't explode the number of series; streaming responses are timed to their first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        observed = False
+
+        def observe(status: int):
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            ).observe(time.perf_counter() - started)
+
+        async def send_wrapper(message):
+            nonlocal observed
+            if message["type"] == "http.response.start" and not observed:
+                observed = True
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not observed:
+                observe(500)
+            raise
@@ -0,0 +1,78 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.db.base import Base
+from app.db import models  # noqa: F401 - registers every table on Base.metadata
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# create_all only creates missing tables, so columns and indexes added to existing
+# tables are applied here. every statement must be idempotent since it runs on each startup.
+POSTGRES_MIGRATIONS = [
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS locked_by VARCHAR(255)",
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP",
+    "CREATE INDEX IF NOT EXISTS idx_status_locked_until ON submissions (status, locked_until)",
+    "CREATE INDEX IF NOT EXISTS idx_created_at_id ON submissions (created_at, id)",
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS request_id VARCHAR(64)",
+    # full-text search over reviews
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS review_tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(review, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS idx_review_tsv ON submissions USING GIN (review_tsv)",
+    # automatic retries
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS next_retry_at TIMESTAMP",
+    "CREATE INDEX IF NOT EXISTS idx_status_next_retry_at ON submissions (status, next_retry_at)",
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS prompt_tokens INTEGER",
+    # priority queue order, existing rows keep their arrival order (backfilled once, when the column is added)
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'submissions' AND column_name = 'scheduled_at'
+        ) THEN
+            ALTER TABLE submissions ADD COLUMN scheduled_at TIMESTAMP;
+            UPDATE submissions SET scheduled_at = created_at;
+            ALTER TABLE submissions ALTER COLUMN scheduled_at SET NOT NULL;
+        END IF;
+    END $$
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_status_scheduled_at ON submissions (status, scheduled_at)",
+    # recent completions, for the admission control processing rate
+    "CREATE INDEX IF NOT EXISTS idx_updated_at ON submissions (updated_at)",
+    # duplicate submission suppression, rows from before the column never match
+    "ALTER TABLE submissions ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS idx_content_hash_created_at ON submissions (content_hash, created_at)",
+]
+
+# statements that need extensions the database user may not be allowed to install.
+# failures are logged and skipped; the app keeps working, just without that index.
+OPTIONAL_POSTGRES_MIGRATIONS = [
+    # trigram index so substring (ILIKE '%q%') review search doesn't scan the table
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_review_trgm ON submissions USING GIN (review gin_trgm_ops)",
+]
+
+
+def run_migrations(engine: Engine):
+    """applies the idempotent schema upgrades for postgres databases"""
+    if engine.dialect.name != "postgresql":
+        return
+
+    with engine.begin() as conn:
+        for statement in POSTGRES_MIGRATIONS:
+            conn.execute(text(statement))
+
+    for statement in OPTIONAL_POSTGRES_MIGRATIONS:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(statement))
+        except Exception as e:
+            logger.warning(f"Skipping optional migration ({statement}): {str(e)}")
+
+
+def init_db(engine: Engine):
+    """creates missing tables and brings existing ones up to date"""
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    logger.info("Database schema is up to date")
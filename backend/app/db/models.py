@@ -1,14 +1,21 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Integer, Text, DateTime, Index, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, Integer, Text, Date, DateTime, Index, JSON, Uuid, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
 from app.db.base import Base
 import enum
 
-# helper function to get current time with timezone
+# jsonb on postgres, plain json on sqlite/test databases
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+# helper function to get the current time for the timestamp columns
 def utc_now():
-    """returns current time in utc with timezone info"""
-    return datetime.now(timezone.utc)
+    """
+    returns the current utc time without tzinfo, since every DateTime column is
+    TIMESTAMP WITHOUT TIME ZONE - asyncpg refuses aware values for those
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
 class SubmissionStatus(str, enum.Enum):
@@ -22,7 +29,7 @@ class Submission(Base):
     """stores user reviews and rating with ai-generated analysis and metadata"""
     __tablename__ = "submissions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     rating = Column(Integer, nullable=False)
     review = Column(Text, nullable=False)
     status = Column(SQLEnum(SubmissionStatus), nullable=False, default=SubmissionStatus.PENDING)
@@ -30,18 +37,88 @@ class Submission(Base):
     # fields populated by the llm
     user_ai_response = Column(Text, nullable=True)
     admin_summary = Column(Text, nullable=True)
-    recommended_actions = Column(JSONB, nullable=True)
+    recommended_actions = Column(JSONType, nullable=True)
+    
+    # hash of the rating and normalized review, finds identical submissions for the dedupe window
+    content_hash = Column(String(64), nullable=True)
+    
+    # tokens in the prompt built for this review (compacted review included), counted at submission
+    prompt_tokens = Column(Integer, nullable=True)
     
     # tracks any errors during processing
     error_message = Column(Text, nullable=True)
     
-    # creation and update timestamps (timezone-aware utc)
+    # id of the api request that created the submission, for joining worker logs to it
+    request_id = Column(String(64), nullable=True)
+    
+    # queue lease - set when a worker claims the row, expired leases can be reclaimed
+    locked_by = Column(String(255), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    
+    # automatic retries - processing attempts so far, and when a FAILED row is due for the next one
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_retry_at = Column(DateTime, nullable=True)
+    
+    # queue position - created_at moved earlier by the priority boost, workers claim the smallest first
+    scheduled_at = Column(DateTime, default=utc_now, nullable=False)
+    
+    # creation and update timestamps (naive utc)
     created_at = Column(DateTime, default=utc_now, nullable=False)
     updated_at = Column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
     
     # indexes for faster queries
     __table_args__ = (
         Index("idx_created_at", "created_at"),
+        Index("idx_created_at_id", "created_at", "id"),
         Index("idx_rating", "rating"),
         Index("idx_status", "status"),
+        Index("idx_status_locked_until", "status", "locked_until"),
+        Index("idx_status_next_retry_at", "status", "next_retry_at"),
+        Index("idx_status_scheduled_at", "status", "scheduled_at"),
+        Index("idx_updated_at", "updated_at"),
+        Index("idx_content_hash_created_at", "content_hash", "created_at"),
     )
+
+
+class LLMResponseCache(Base):
+    """persistent tier of the llm response cache, keyed by a hash of the normalized request"""
+    __tablename__ = "llm_response_cache"
+    
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(String(255), nullable=False)
+    payload = Column(JSONType, nullable=False)
+    created_at = Column(DateTime, default=utc_now, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("idx_llm_response_cache_expires_at", "expires_at"),
+        Index("idx_llm_response_cache_created_at", "created_at"),
+    )
+
+
+class IdempotencyKey(Base):
+    """Idempotency-Key headers seen on POST /api/submissions and the response each one got"""
+    __tablename__ = "idempotency_keys"
+    
+    # sha256 of the header value - the primary key makes concurrent retries with one key race safely
+    key_hash = Column(String(64), primary_key=True)
+    # content hash of the request body, a key reused for a different review is refused
+    request_hash = Column(String(64), nullable=False)
+    submission_id = Column(Uuid(as_uuid=True), nullable=False)
+    response = Column(JSONType, nullable=False)
+    created_at = Column(DateTime, default=utc_now, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("idx_idempotency_keys_expires_at", "expires_at"),
+    )
+
+
+class SubmissionRollup(Base):
+    """pre-aggregated submission counts per day, rating and status, kept current on every write"""
+    __tablename__ = "submission_rollups"
+    
+    day = Column(Date, primary_key=True)
+    rating = Column(Integer, primary_key=True)
+    status = Column(SQLEnum(SubmissionStatus), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,10 +1,84 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
-engine = create_engine(settings.DATABASE_URL, echo=False, pool_pre_ping=True)
+# async driver used for each database backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def pool_options(url: URL) -> dict:
+    """pool settings shared by the sync and async engines"""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    # sqlite connections are local files, sizing the pool doesn't apply
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        )
+    return options
+
+
+def sync_connect_args(url: URL) -> dict:
+    """driver options for the sync engine"""
+    # psycopg prepares statements server side after a few executions, which breaks
+    # behind pgbouncer in transaction mode - a cache size of 0 turns that off
+    if url.get_backend_name() == "postgresql" and settings.DB_STATEMENT_CACHE_SIZE == 0:
+        return {"prepare_threshold": None}
+    return {}
+
+
+def async_database_url(database_url: str):
+    """
+    Maps DATABASE_URL to its async driver and driver options.
+    Returns the url and the connect_args for create_async_engine.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    connect_args = {}
+
+    if backend == "postgresql":
+        # asyncpg takes ssl instead of libpq's sslmode
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode:
+            connect_args["ssl"] = sslmode
+        query["prepared_statement_cache_size"] = str(settings.DB_STATEMENT_CACHE_SIZE)
+        url = url.set(query=query)
+        if settings.DB_STATEMENT_CACHE_SIZE == 0:
+            connect_args["statement_cache_size"] = 0
+
+    return url, connect_args
+
+
+_sync_url = make_url(settings.DATABASE_URL)
+engine = create_engine(
+    _sync_url, echo=False, connect_args=sync_connect_args(_sync_url), **pool_options(_sync_url)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# api routes use the async engine; the worker and background jobs keep the sync one
+_async_url, _async_connect_args = async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    _async_url, echo=False, connect_args=_async_connect_args, **pool_options(_async_url)
+)
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
+# objects stay loaded after commit since async sessions can't lazy load attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     """Dependency for getting database session."""
@@ -13,3 +87,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for getting an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
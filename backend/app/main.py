@@ -2,10 +2,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import settings
-from app.core.logging import setup_logging, get_logger
-from app.db.session import engine
-from app.db.base import Base
-from app.routers import health, submissions, admin, auth
+from app.core.logging import setup_logging, get_logger, RequestContextMiddleware
+from app.db.session import engine, async_engine, SessionLocal
+from app.db.migrations import init_db
+from app.services.rollups import ensure_rollups_backfilled
+from app.services.events import PostgresListener, event_bus
+from app.worker import start_embedded_worker, stop_embedded_worker
+from app.routers import health, submissions, admin, auth, metrics
+from app.core.metrics import PrometheusMiddleware
+from app.services.queue import QueueMetricsCollector
+from prometheus_client import REGISTRY
 
 # initialize logging for the application
 setup_logging()
@@ -17,12 +23,29 @@ async def lifespan(app: FastAPI):
     """handles app startup and shutdown lifecycle events"""
     # startup: create all database tables if they don't exist
     logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    init_db(engine)
     logger.info("Database tables created successfully")
     
+    # populate analytics rollups for submissions created before the rollup table existed
+    with SessionLocal() as db:
+        ensure_rollups_backfilled(db)
+    
+    # relay submission status notifications from every process to this replica's event streams
+    listener = PostgresListener(async_engine, event_bus) if async_engine.dialect.name == "postgresql" else None
+    if listener:
+        listener.start()
+    
+    # optionally drain the queue from inside the api process
+    worker = start_embedded_worker() if settings.WORKER_EMBEDDED else None
+    
     yield
     
     # cleanup on shutdown
+    if worker:
+        await stop_embedded_worker(worker)
+    if listener:
+        await listener.stop()
+    await async_engine.dispose()
     logger.info("Application shutting down")
 
 
@@ -41,13 +64,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # lets the frontend read how long to wait after a 429 from admission control
+    expose_headers=["Retry-After", "Idempotent-Replayed"],
 )
 
+# per-route latency histograms, and queue depth read from the database on each scrape
+app.add_middleware(PrometheusMiddleware)
+# request ids for log correlation, outermost so every log line of the request carries it
+app.add_middleware(RequestContextMiddleware)
+REGISTRY.register(QueueMetricsCollector())
+
 # attach all the API routers
 app.include_router(health.router)
 app.include_router(submissions.router)
 app.include_router(admin.router)
 app.include_router(auth.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
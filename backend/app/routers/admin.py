@@ -1,31 +1,36 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, cast, Date
-from datetime import datetime, timedelta
-from typing import Optional
-from app.db.session import get_db
-from app.db.models import Submission, SubmissionStatus
-from app.schemas.admin import AdminSubmissionItem, AdminSubmissionsResponse, AnalyticsResponse
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Literal
+from uuid import UUID
+from app.db.session import get_async_db
+from app.db.models import LLMResponseCache, Submission, SubmissionStatus, utc_now
+from app.schemas.admin import (
+    AdminSubmissionItem, AdminSubmissionsResponse, AnalyticsResponse, LLMCacheStatsResponse,
+    RequeueRequest, RequeueResponse
+)
 from app.core.security import verify_token
 from app.core.logging import get_logger
+from app.utils.pagination import decode_cursor, keyset_statement, keyset_page, count_statement, estimate_count
+from app.services.search import filter_review_search, search_columns, build_snippet
+from app.services.rollups import read_rollups, summarize_rollups, total_rollup_counts
+from app.services.retries import requeue_matching
+from app.services.export import EXPORT_COLUMNS, EXPORT_MEDIA_TYPES, parquet_available, stream_export
+from app.utils.cache import TTLCache
+from app.core.config import settings
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
+# admins poll analytics, so identical requests share a result for a few seconds
+analytics_cache = TTLCache(max_entries=256, ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS)
 
-@router.get("/submissions")
-def list_submissions(
-    rating: Optional[int] = Query(None, ge=1, le=5),
-    status: Optional[str] = Query(None),
-    q: Optional[str] = Query(None, description="Search in review text"),
-    limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    username: str = Depends(verify_token)
-):
-    """lists all submissions with optional filtering and pagination - admin only"""
-    query = db.query(Submission)
-    
+
+def apply_submission_filters(db: AsyncSession, query, rating: Optional[int], status: Optional[str], q: Optional[str]):
+    """applies the shared admin filters to a submissions select statement"""
     # apply rating filter if provided
     if rating:
         query = query.filter(Submission.rating == rating)
@@ -39,17 +44,83 @@ def list_submissions(
             raise HTTPException(status_code=422, detail=f"Invalid status: {status}")
     
     if q:
-        query = query.filter(Submission.review.ilike(f"%{q}%"))
+        query = filter_review_search(db, query, q)
+    
+    return query
+
+
+def _parse_cursor_datetime(value):
+    """parses the created_at part of a submissions cursor"""
+    return datetime.fromisoformat(value)
+
+
+@router.get("/submissions")
+async def list_submissions(
+    rating: Optional[int] = Query(None, ge=1, le=5),
+    status: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, description="Search in review text"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, description="Legacy offset paging, ignored when a cursor is given"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Literal["exact", "estimate", "none"] = Query(
+        "exact", description="How to compute total: exact count, planner estimate, or skip it"
+    ),
+    sort: Optional[Literal["recent", "relevance"]] = Query(
+        None, description="Defaults to relevance when searching on PostgreSQL, otherwise recent"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    username: str = Depends(verify_token)
+):
+    """lists all submissions with optional filtering and pagination - admin only"""
+    query = apply_submission_filters(db, select(Submission), rating, status, q)
+    
+    # total is optional since counting gets slower as the table grows
+    if count == "exact":
+        total = await db.scalar(count_statement(query))
+    elif count == "estimate":
+        total = await db.run_sync(estimate_count, query)
+    else:
+        total = None
     
-    # Get total count
-    total = query.count()
+    # searches on postgres also return a relevance rank and a highlighted snippet
+    search = search_columns(db, q) if q else None
+    if search:
+        query = query.add_columns(*search)
     
-    # Apply pagination and ordering
-    submissions = query.order_by(Submission.created_at.desc()).offset(offset).limit(limit).all()
+    if sort == "relevance" and not search:
+        raise HTTPException(status_code=422, detail="Relevance sort requires a search query on PostgreSQL")
+    if search and sort != "recent":
+        # rank first, (created_at, id) break ties and keep the ordering total
+        keys = [search[0].element, Submission.created_at, Submission.id]
+        parsers = [float, _parse_cursor_datetime, UUID]
+        key_values = lambda row: (row.rank, row.Submission.created_at, row.Submission.id)
+    else:
+        keys = [Submission.created_at, Submission.id]
+        parsers = [_parse_cursor_datetime, UUID]
+        key_values = lambda row: (row.Submission.created_at, row.Submission.id)
+    
+    if cursor or offset == 0:
+        # keyset pagination: seek past the last sort key instead of skipping rows
+        try:
+            after = decode_cursor(cursor, parsers) if cursor else None
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid cursor")
+        result = await db.execute(keyset_statement(query, keys, limit, after))
+        rows, next_cursor = keyset_page(result.all(), limit, key_values=key_values)
+    else:
+        result = await db.execute(query.order_by(*[key.desc() for key in keys]).offset(offset).limit(limit))
+        rows = result.all()
+        next_cursor = None
     
     # Format response
     items = []
-    for sub in submissions:
+    for row in rows:
+        sub = row.Submission
+        if search:
+            rank, snippet = row.rank, row.snippet
+        else:
+            rank = None
+            snippet = build_snippet(sub.review, q) if q else None
         items.append(AdminSubmissionItem(
             id=sub.id,
             rating=sub.rating,
@@ -58,58 +129,151 @@ def list_submissions(
             review_preview=sub.review[:200] if len(sub.review) > 200 else sub.review,
             admin_summary=sub.admin_summary,
             recommended_actions=sub.recommended_actions,
-            error_message=sub.error_message
+            error_message=sub.error_message,
+            prompt_tokens=sub.prompt_tokens,
+            attempts=sub.attempts,
+            next_retry_at=sub.next_retry_at,
+            rank=rank,
+            snippet=snippet
         ))
     
     return AdminSubmissionsResponse(
         items=items,
         total=total,
+        total_is_estimate=count == "estimate",
         limit=limit,
-        offset=offset
+        offset=offset,
+        next_cursor=next_cursor
     )
 
 
-@router.get("/analytics")
-def get_analytics(
-    db: Session = Depends(get_db),
+@router.get("/submissions/export")
+async def export_submissions(
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv"),
+    rating: Optional[int] = Query(None, ge=1, le=5),
+    status: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, description="Search in review text"),
+    db: AsyncSession = Depends(get_async_db),
     username: str = Depends(verify_token)
 ):
     """
-    Get analytics data for admin dashboard.
-    Admin only - requires JWT authentication.
+    Streams every submission matching the list filters, with full review text.
+    Rows are read through a server-side cursor in fixed-size chunks, so memory use
+    doesn't depend on how many rows are exported. Admin only.
     """
-    # Counts by rating
-    rating_counts = db.query(
-        Submission.rating,
-        func.count(Submission.id)
-    ).group_by(Submission.rating).all()
-    
-    counts_by_rating = {rating: count for rating, count in rating_counts}
-    
-    # Counts by status
-    status_counts = db.query(
-        Submission.status,
-        func.count(Submission.id)
-    ).group_by(Submission.status).all()
-    
-    counts_by_status = {status.value: count for status, count in status_counts}
-    
-    # Submissions per day for last 7 days
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    daily_counts = db.query(
-        cast(Submission.created_at, Date).label('date'),
-        func.count(Submission.id).label('count')
-    ).filter(
-        Submission.created_at >= seven_days_ago
-    ).group_by('date').order_by('date').all()
-    
-    submissions_per_day = [
-        {"date": str(date), "count": count}
-        for date, count in daily_counts
-    ]
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow to be installed")
+    
+    statement = apply_submission_filters(db, select(*EXPORT_COLUMNS), rating, status, q)
+    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    
+    return StreamingResponse(
+        stream_export(statement, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="submissions-{timestamp}.{format}"'}
+    )
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """timestamps are stored as naive utc, so aware filter values are converted to match"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.post("/submissions/requeue", response_model=RequeueResponse)
+async def requeue_submissions(
+    body: RequeueRequest,
+    db: AsyncSession = Depends(get_async_db),
+    username: str = Depends(verify_token)
+):
+    """
+    Puts submissions matching the filters back in the queue with their attempt count
+    reset, e.g. every FAILED row from a provider outage. Handles at most `limit` rows
+    (oldest first) per call; status streams and cached details are updated. Admin only.
+    """
+    query = apply_submission_filters(db, select(Submission), body.rating, body.status, body.q)
+    if body.error_contains:
+        query = query.filter(Submission.error_message.ilike(f"%{body.error_contains}%"))
+    if body.created_after:
+        query = query.filter(Submission.created_at >= _naive_utc(body.created_after))
+    if body.created_before:
+        query = query.filter(Submission.created_at < _naive_utc(body.created_before))
+    
+    requeued = await db.run_sync(requeue_matching, query, body.limit)
+    await db.commit()
+    logger.info(f"Admin {username} requeued {requeued} {body.status} submissions")
+    
+    # the rollups changed, so cached analytics would show stale status counts
+    analytics_cache.clear()
+    return RequeueResponse(requeued=requeued, limit_reached=requeued == body.limit)
+
+
+def _build_analytics(db: Session, start: Optional[date], end: Optional[date], bucket: str) -> AnalyticsResponse:
+    """reads the rollups for an analytics request (sync, run through AsyncSession.run_sync)"""
+    # the series defaults to the 7 days before `end`, like the dashboard chart expects
+    series_start = start or ((end or datetime.utcnow().date()) - timedelta(days=7))
+    summary = summarize_rollups(read_rollups(db, series_start, end), bucket)
+    
+    if start or end:
+        ranged = summary if start else summarize_rollups(read_rollups(db, None, end), bucket)
+        counts_by_rating = ranged["counts_by_rating"]
+        counts_by_status = ranged["counts_by_status"]
+    else:
+        counts_by_rating, counts_by_status = total_rollup_counts(db)
     
     return AnalyticsResponse(
         counts_by_rating=counts_by_rating,
         counts_by_status=counts_by_status,
-        submissions_per_day=submissions_per_day
+        submissions_per_day=summary["series"],
+        bucket=bucket,
+        start=start,
+        end=end
+    )
+
+
+@router.get("/analytics")
+async def get_analytics(
+    start: Optional[date] = Query(None, description="First day to include (defaults to all time for totals, 7 days ago for the series)"),
+    end: Optional[date] = Query(None, description="Last day to include (inclusive)"),
+    bucket: Literal["day", "week", "month"] = Query("day"),
+    db: AsyncSession = Depends(get_async_db),
+    username: str = Depends(verify_token)
+):
+    """
+    Get analytics data for admin dashboard.
+    Reads the pre-aggregated rollup table and caches results briefly, so the cost
+    doesn't grow with the number of submissions.
+    Admin only - requires JWT authentication.
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+    
+    cache_key = (start, end, bucket)
+    cached = analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    response = await db.run_sync(_build_analytics, start, end, bucket)
+    analytics_cache.set(cache_key, response)
+    return response
+
+
+@router.get("/llm-cache")
+async def get_llm_cache_stats(db: AsyncSession = Depends(get_async_db), username: str = Depends(verify_token)):
+    """
+    Get llm response cache settings and the size of its persistent tier.
+    Hits and misses happen in whichever process calls the llm (usually a standalone worker),
+    so they are counted in the llm_cache_lookups_total metric that process serves, not here.
+    """
+    entries, oldest = (await db.execute(
+        select(func.count(LLMResponseCache.cache_key), func.min(LLMResponseCache.created_at))
+        .filter(LLMResponseCache.expires_at > utc_now())
+    )).one()
+    return LLMCacheStatsResponse(
+        enabled=settings.LLM_CACHE_ENABLED,
+        persistent=settings.LLM_CACHE_PERSISTENT,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        db_entries=entries,
+        oldest_entry_at=oldest
     )
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """prometheus scrape endpoint (sync so the queue collector's query runs off the event loop)"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,59 +1,272 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.db.models import Submission, SubmissionStatus
-from app.schemas.submissions import SubmissionCreate, SubmissionResponse, SubmissionDetail
-from app.services.processing import process_submission
+import asyncio
+import json
+import math
+from typing import Any, List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal, get_async_db
+from app.db.models import Submission, SubmissionStatus, utc_now
+from app.schemas.submissions import (
+    SubmissionCreate, SubmissionResponse, SubmissionDetail, BulkSubmissionResponse, BulkSubmissionResult
+)
+from app.services.rollups import record_submissions_created
+from app.services.events import event_bus
+from app.services.submission_cache import submission_cache, make_etag
+from app.services.compaction import prompt_tokens
+from app.services.scheduling import schedule_time
+from app.services.admission import admission_controller, AdmissionRejected
+from app.services import idempotency
 from app.core.config import settings
-from app.core.logging import get_logger
+from app.core.logging import get_logger, request_id_var
+from app.core.metrics import SUBMISSION_PROMPT_TOKENS, SUBMISSIONS_DEDUPLICATED
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/api/submissions", tags=["submissions"])
 
 
-@router.post("")
-def create_submission(
-    submission: SubmissionCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """accepts a new review submission and queues it for llm processing"""
-    # validate and truncate review if it exceeds the limit
-    review_text = submission.review
+def _truncate_review(review_text: str) -> str:
+    """truncates a review if it exceeds the storage limit"""
     if len(review_text) > settings.MAX_REVIEW_CHARS:
         logger.warning(f"Review exceeds {settings.MAX_REVIEW_CHARS} chars, truncating")
-        review_text = review_text[:settings.MAX_REVIEW_CHARS]
+        return review_text[:settings.MAX_REVIEW_CHARS]
+    return review_text
+
+
+def _count_prompt_tokens(review_text: str, rating: int) -> int:
+    """prompt tokens for a review as it will be sent (normalized and compacted), recorded on the submission"""
+    tokens = prompt_tokens(review_text, rating)
+    SUBMISSION_PROMPT_TOKENS.observe(tokens)
+    return tokens
+
+
+async def admit(request: Request, db: AsyncSession, incoming: int = 1):
+    """turns submissions away with a 429 and Retry-After when the backlog or the client's rate limit is exceeded"""
+    try:
+        # backlog first, so a refusal there doesn't use up the client's tokens
+        await admission_controller.check_backlog(db, incoming)
+        admission_controller.check_client(request)
+    except AdmissionRejected as e:
+        retry_after = math.ceil(e.retry_after)
+        raise HTTPException(
+            status_code=429,
+            detail=f"{str(e)}, please try again in {retry_after}s",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+async def read_bulk_items(request: Request) -> List[Any]:
+    """parses a bulk request body - a json array, or one json object per line for ndjson"""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
     
-    # create the submission in the database
-    db_submission = Submission(
-        rating=submission.rating,
-        review=review_text,
-        status=SubmissionStatus.PENDING
-    )
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = []
+        for line in body.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                # keep the position so the result lines up with the input line
+                items.append(ValueError(f"Invalid JSON: {str(e)}"))
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of submissions")
+    
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_ITEMS} items per request")
+    return items
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    messages = []
+    for detail in error.errors():
+        location = ".".join(str(part) for part in detail["loc"])
+        messages.append(f"{location}: {detail['msg']}" if location else detail["msg"])
+    return messages
+
+
+@router.post("/bulk")
+async def create_submissions_bulk(
+    request: Request,
+    items: List[Any] = Depends(read_bulk_items),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Accepts many review submissions in one request and queues the valid ones.
+    Each item is validated independently; valid items are inserted with a single
+    multi-row INSERT ... RETURNING in one transaction. The request counts once against
+    the client's rate limit, and is refused as a whole if its items don't fit in the backlog.
+    """
+    results: List[BulkSubmissionResult] = []
+    rows = []
+    now = utc_now()
+    request_id = request_id_var.get()
     
-    db.add(db_submission)
-    db.commit()
-    db.refresh(db_submission)
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            results.append(BulkSubmissionResult(index=index, status="REJECTED", errors=[str(item)]))
+            continue
+        try:
+            submission = SubmissionCreate.model_validate(item)
+        except ValidationError as e:
+            results.append(BulkSubmissionResult(index=index, status="REJECTED", errors=_validation_messages(e)))
+            continue
+        
+        results.append(BulkSubmissionResult(index=index, status=SubmissionStatus.PENDING.value))
+        review = _truncate_review(submission.review)
+        rows.append({
+            "rating": submission.rating,
+            "review": review,
+            "prompt_tokens": None,
+            "content_hash": idempotency.content_hash(submission.rating, review),
+            "status": SubmissionStatus.PENDING,
+            "request_id": request_id,
+            "created_at": now,
+            "updated_at": now,
+            "scheduled_at": schedule_time(now, submission.rating, review),
+        })
     
-    logger.info(f"Created submission {db_submission.id}")
+    if rows:
+        await admit(request, db, incoming=len(rows))
+        
+        # tokenizing thousands of reviews is cpu work, keep it off the event loop
+        counts = await asyncio.to_thread(lambda: [_count_prompt_tokens(row["review"], row["rating"]) for row in rows])
+        for row, tokens in zip(rows, counts):
+            row["prompt_tokens"] = tokens
+        
+        result = await db.execute(
+            insert(Submission).returning(
+                Submission.id, Submission.created_at, Submission.rating, Submission.status, sort_by_parameter_order=True
+            ),
+            rows
+        )
+        inserted = result.all()
+        await db.run_sync(record_submissions_created, inserted)
+        await db.commit()
+        
+        # inserted rows come back in input order, matching the accepted results
+        accepted_results = (result for result in results if result.status == SubmissionStatus.PENDING.value)
+        for result, row in zip(accepted_results, inserted):
+            result.submission_id = row.id
     
-    # queue up background llm processing
-    background_tasks.add_task(process_submission, str(db_submission.id), db)
+    logger.info(f"Bulk submission: {len(rows)} accepted, {len(results) - len(rows)} rejected")
     
-    return SubmissionResponse(
-        submission_id=db_submission.id,
-        status=db_submission.status.value
+    return BulkSubmissionResponse(
+        accepted=len(rows),
+        rejected=len(results) - len(rows),
+        results=results
     )
 
 
-@router.get("/{submission_id}")
-def get_submission(submission_id: str, db: Session = Depends(get_db)):
-    """retrieves the current status and details of a submission"""
-    submission = db.query(Submission).filter(Submission.id == submission_id).first()
+async def _replay(db: AsyncSession, key_hash: str, request_hash: str, response: Response) -> Optional[SubmissionResponse]:
+    """the original response for a retried Idempotency-Key, None when the key is new"""
+    try:
+        replay = await idempotency.find_response(db, key_hash, request_hash)
+    except idempotency.IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if replay is not None:
+        SUBMISSIONS_DEDUPLICATED.labels(reason="idempotency_key").inc()
+        response.headers["Idempotent-Replayed"] = "true"
+    return replay
+
+
+@router.post("")
+async def create_submission(
+    submission: SubmissionCreate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Accepts a new review submission and queues it for llm processing, unless admission control refuses it.
+    A retry with the same Idempotency-Key header gets the original response back, and with
+    DEDUPE_WINDOW_SECONDS set, an identical rating and review is answered with the recent
+    submission instead of a new one. Neither counts against admission control.
+    """
+    review = _truncate_review(submission.review)
+    request_hash = idempotency.content_hash(submission.rating, review)
     
-    if not submission:
-        raise HTTPException(status_code=404, detail="Submission not found")
+    key_hash = None
+    key = request.headers.get("idempotency-key", "").strip()
+    if key:
+        if len(key) > settings.IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise HTTPException(
+                status_code=422, detail=f"Idempotency-Key must be at most {settings.IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            )
+        key_hash = idempotency.hash_key(key)
+        replay = await _replay(db, key_hash, request_hash, response)
+        if replay is not None:
+            return replay
+    
+    result = await idempotency.find_duplicate(db, request_hash)
+    created = result is None
+    if not created:
+        SUBMISSIONS_DEDUPLICATED.labels(reason="content_hash").inc()
+        logger.info(f"Duplicate of submission {result.submission_id}", extra={"submission_id": str(result.submission_id)})
+    else:
+        await admit(request, db)
+        
+        # counting a long review takes a few milliseconds of cpu, so keep it off the event loop
+        tokens = await asyncio.to_thread(_count_prompt_tokens, review, submission.rating)
+        
+        # create the submission in the database
+        now = utc_now()
+        db_submission = Submission(
+            rating=submission.rating,
+            review=review,
+            content_hash=request_hash,
+            prompt_tokens=tokens,
+            status=SubmissionStatus.PENDING,
+            request_id=request_id_var.get(),
+            created_at=now,
+            updated_at=now,
+            # low ratings and long reviews are queued ahead of their arrival time
+            scheduled_at=schedule_time(now, submission.rating, review)
+        )
+        
+        db.add(db_submission)
+        await db.flush()
+        await db.run_sync(record_submissions_created, [db_submission])
+        result = SubmissionResponse(
+            submission_id=db_submission.id,
+            status=db_submission.status.value
+        )
+    
+    if key_hash:
+        idempotency.remember(db, key_hash, request_hash, result)
+    try:
+        await db.commit()
+    except IntegrityError:
+        if not key_hash:
+            raise
+        # a concurrent retry with the same key committed first, its submission is the one to keep
+        await db.rollback()
+        replay = await _replay(db, key_hash, request_hash, response)
+        if replay is None:
+            raise
+        return replay
     
+    if key_hash:
+        await idempotency.purge_expired(db)
+    
+    if created:
+        # the committed PENDING row is the queue entry, a worker will claim it
+        logger.info(f"Created submission {result.submission_id}", extra={"submission_id": str(result.submission_id)})
+    return result
+
+
+def _submission_detail(submission: Submission) -> SubmissionDetail:
+    """builds the public view of a submission"""
     response_data = {
         "id": submission.id,
         "rating": submission.rating,
@@ -62,8 +275,8 @@ def get_submission(submission_id: str, db: Session = Depends(get_db)):
         "created_at": submission.created_at
     }
     
-    # add the ai response if processing is complete
-    if submission.status == SubmissionStatus.COMPLETED:
+    # add the ai response once it's available - streamed responses store it before processing completes
+    if submission.status != SubmissionStatus.FAILED and submission.user_ai_response:
         response_data["user_ai_response"] = submission.user_ai_response
     
     # return generic error message for failed submissions
@@ -71,3 +284,115 @@ def get_submission(submission_id: str, db: Session = Depends(get_db)):
         response_data["error_message"] = "We encountered an issue processing your submission. Please try again later."
     
     return SubmissionDetail(**response_data)
+
+
+async def _load_submission(db: AsyncSession, submission_id: UUID) -> Optional[Submission]:
+    return await db.scalar(select(Submission).filter(Submission.id == submission_id))
+
+
+def _sse_event(detail: SubmissionDetail) -> str:
+    return f"data: {detail.model_dump_json()}\n\n"
+
+
+def _parse_id(submission_id: str) -> Optional[UUID]:
+    """parses a submission id from the path, None if it isn't a uuid"""
+    try:
+        return UUID(submission_id)
+    except ValueError:
+        return None
+
+
+def _detail_response(request: Request, payload: str, etag: str) -> Response:
+    """json response with validators, or 304 when the client already has this version"""
+    headers = {
+        "ETag": etag,
+        # even finished submissions change when an admin requeues them, so clients revalidate every
+        # time (a cheap 304) and shared caches never store a reviewer's submission
+        "Cache-Control": "private, no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
+@router.get("/{submission_id}", response_model=SubmissionDetail)
+async def get_submission(submission_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    retrieves the current status and details of a submission.
+    finished submissions are served from the submission cache without a database query.
+    """
+    parsed_id = _parse_id(submission_id)
+    if parsed_id is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    
+    # the canonical spelling, so equivalent ids share a cache entry
+    canonical_id = str(parsed_id)
+    cached = await submission_cache.get(canonical_id)
+    if cached is not None:
+        payload, etag = cached
+        return _detail_response(request, payload, etag)
+    
+    # started before the query, so a requeue committing meanwhile keeps this read out of the cache
+    read = await submission_cache.begin_read(canonical_id)
+    try:
+        submission = await _load_submission(db, parsed_id)
+        
+        if not submission:
+            raise HTTPException(status_code=404, detail="Submission not found")
+        
+        payload = _submission_detail(submission).model_dump_json()
+        if submission.status == SubmissionStatus.PENDING:
+            return _detail_response(request, payload, make_etag(payload))
+        
+        payload, etag = await submission_cache.set(read, payload)
+    finally:
+        submission_cache.end_read(read)
+    return _detail_response(request, payload, etag)
+
+
+@router.get("/{submission_id}/events")
+async def submission_events(submission_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Server-sent events stream of a submission's status.
+    Sends the current state straight away, an update if the user response streams in
+    early, then the final state once processing commits COMPLETED or FAILED, and closes.
+    Replaces polling GET /{submission_id}.
+    """
+    parsed_id = _parse_id(submission_id)
+    if parsed_id is None or not await _load_submission(db, parsed_id):
+        raise HTTPException(status_code=404, detail="Submission not found")
+    # events are published under the canonical id
+    submission_id = str(parsed_id)
+    
+    async def stream():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SSE_MAX_STREAM_SECONDS
+        
+        # subscribe before reading so a completion between the read and the wait isn't missed
+        async with event_bus.subscribe(submission_id) as events:
+            while True:
+                async with AsyncSessionLocal() as session:
+                    submission = await _load_submission(session, parsed_id)
+                if not submission:
+                    return
+                yield _sse_event(_submission_detail(submission))
+                if submission.status != SubmissionStatus.PENDING:
+                    return
+                
+                # wait for the finished event, with keepalive comments while idle
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0 or await request.is_disconnected():
+                        return
+                    try:
+                        await asyncio.wait_for(events.get(), timeout=min(settings.SSE_KEEPALIVE_SECONDS, remaining))
+                        break
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,7 +1,7 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import date, datetime
 from uuid import UUID
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 
 class AdminSubmissionItem(BaseModel):
@@ -14,6 +14,12 @@ class AdminSubmissionItem(BaseModel):
     admin_summary: Optional[str] = None
     recommended_actions: Optional[List[str]] = None
     error_message: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    attempts: int = 0
+    next_retry_at: Optional[datetime] = None
+    # only set when searching with q - relevance score and html snippet with <mark> highlights
+    rank: Optional[float] = None
+    snippet: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -22,13 +28,47 @@ class AdminSubmissionItem(BaseModel):
 class AdminSubmissionsResponse(BaseModel):
     """Schema for paginated admin submissions response."""
     items: List[AdminSubmissionItem]
-    total: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
 
 
 class AnalyticsResponse(BaseModel):
     """Schema for analytics data."""
     counts_by_rating: Dict[int, int]
     counts_by_status: Dict[str, int]
+    # one point per bucket (named per_day for compatibility), keyed by the bucket's first day
     submissions_per_day: List[Dict[str, Any]]
+    bucket: str = "day"
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+
+class LLMCacheStatsResponse(BaseModel):
+    """Schema for llm response cache settings and the size of its persistent tier."""
+    enabled: bool
+    persistent: bool
+    ttl_seconds: int
+    # unexpired rows in llm_response_cache, shared by every process
+    db_entries: int
+    oldest_entry_at: Optional[datetime] = None
+
+
+class RequeueRequest(BaseModel):
+    """Schema for bulk requeue filters, every given filter must match."""
+    status: Literal["FAILED", "COMPLETED"] = "FAILED"
+    rating: Optional[int] = Field(None, ge=1, le=5)
+    q: Optional[str] = Field(None, description="Search in review text")
+    error_contains: Optional[str] = Field(None, description="Substring of the stored error message")
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    limit: int = Field(1000, ge=1, le=10000)
+
+
+class RequeueResponse(BaseModel):
+    """Schema for bulk requeue results."""
+    requeued: int
+    # more rows may match, call again to requeue the next batch
+    limit_reached: bool
@@ -27,6 +27,21 @@ class SubmissionResponse(BaseModel):
         from_attributes = True
 
 
+class BulkSubmissionResult(BaseModel):
+    """Schema for the outcome of one item in a bulk submission."""
+    index: int
+    submission_id: Optional[UUID] = None
+    status: str
+    errors: Optional[List[str]] = None
+
+
+class BulkSubmissionResponse(BaseModel):
+    """Schema for bulk submission response."""
+    accepted: int
+    rejected: int
+    results: List[BulkSubmissionResult]
+
+
 class SubmissionDetail(BaseModel):
     """Schema for detailed submission information."""
     id: UUID
@@ -46,3 +61,14 @@ class LLMOutput(BaseModel):
     user_ai_response: str
     admin_summary: str
     recommended_actions: List[str]
+
+
+class LLMBatchItem(LLMOutput):
+    """Schema for one item of a batched LLM response."""
+    submission_id: str
+
+
+class RatingPrediction(BaseModel):
+    """Schema for the answer to a rating-prediction prompt (prompt evals)."""
+    predicted_stars: int = Field(..., ge=1, le=5)
+    explanation: str
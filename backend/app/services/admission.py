@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import SUBMISSIONS_REJECTED
+from app.db.models import Submission, SubmissionStatus, utc_now
+from app.services.rate_limit import TokenBucket
+from app.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """a submission was turned away, the client should try again after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: float, reason: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+@dataclass
+class BacklogSnapshot:
+    pending: int
+    # submissions finished per second over the last ADMISSION_RATE_WINDOW_SECONDS, across all workers
+    processing_rate: float
+    taken_at: float
+
+
+def client_key(request: Request) -> str:
+    """identifies the caller for per-client limits: its api key when it sends one, otherwise its ip"""
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        # buckets are kept in memory, no need to hold on to raw keys
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:32]
+
+    if settings.CLIENT_IP_HEADER:
+        # behind a proxy every request comes from the proxy, the original address is in a header
+        forwarded = request.headers.get(settings.CLIENT_IP_HEADER, "")
+        address = forwarded.split(",")[0].strip()
+        if address:
+            return "ip:" + address
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+class AdmissionController:
+    """
+    Decides whether POST /api/submissions may queue more work.
+    Each client has a token bucket (CLIENT_RATE_LIMIT_PER_MINUTE with CLIENT_RATE_LIMIT_BURST),
+    and the whole api stops accepting once the PENDING backlog passes ADMISSION_MAX_PENDING or
+    would take longer than ADMISSION_MAX_WAIT_SECONDS to drain at the measured processing rate.
+    The backlog is read from the database at most every ADMISSION_REFRESH_SECONDS, so replicas
+    and separate worker processes are all accounted for.
+    """
+
+    def __init__(self):
+        # idle clients' buckets are full again after burst / rate, so they can be dropped then
+        idle_seconds = 60 * max(settings.CLIENT_RATE_LIMIT_BURST, 1) / max(settings.CLIENT_RATE_LIMIT_PER_MINUTE, 1)
+        self.buckets = TTLCache(settings.CLIENT_RATE_LIMIT_MAX_CLIENTS, max(idle_seconds, 1.0))
+        self._snapshot: Optional[BacklogSnapshot] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    def check_client(self, request: Request):
+        """takes one request from the caller's bucket, or raises AdmissionRejected"""
+        if settings.CLIENT_RATE_LIMIT_PER_MINUTE <= 0:
+            return
+
+        key = client_key(request)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(settings.CLIENT_RATE_LIMIT_PER_MINUTE, capacity=max(settings.CLIENT_RATE_LIMIT_BURST, 1))
+        wait = bucket.try_reserve(1)
+        # re-setting refreshes the idle expiry
+        self.buckets.set(key, bucket)
+        if wait > 0:
+            self._reject("Too many submissions from this client", wait, "client_rate")
+
+    async def check_backlog(self, db: AsyncSession, incoming: int = 1):
+        """raises AdmissionRejected when `incoming` more submissions would push the backlog past its limits"""
+        if settings.ADMISSION_MAX_PENDING <= 0 and settings.ADMISSION_MAX_WAIT_SECONDS <= 0:
+            return
+
+        snapshot = await self._current_snapshot(db)
+        pending = snapshot.pending + incoming
+        rate = snapshot.processing_rate
+
+        if 0 < settings.ADMISSION_MAX_PENDING < pending:
+            self._reject(
+                "The submission queue is full", self._drain_seconds(pending - settings.ADMISSION_MAX_PENDING, rate), "backlog"
+            )
+
+        if settings.ADMISSION_MAX_WAIT_SECONDS > 0 and pending > settings.ADMISSION_MIN_PENDING:
+            # the depth that drains within the target wait at the current rate
+            allowed = max(rate * settings.ADMISSION_MAX_WAIT_SECONDS, settings.ADMISSION_MIN_PENDING)
+            if pending > allowed:
+                self._reject("Submissions are backed up", self._drain_seconds(pending - allowed, rate), "processing_rate")
+
+    def _drain_seconds(self, excess: float, rate: float) -> float:
+        """how long until the workers have worked off `excess` submissions"""
+        if rate <= 0:
+            return settings.ADMISSION_MAX_RETRY_AFTER_SECONDS
+        return excess / rate
+
+    def _reject(self, message: str, retry_after: float, reason: str):
+        retry_after = min(max(retry_after, 1.0), settings.ADMISSION_MAX_RETRY_AFTER_SECONDS)
+        SUBMISSIONS_REJECTED.labels(reason=reason).inc()
+        if reason != "client_rate":
+            logger.warning(f"Refusing submissions: {message} (retry after {retry_after:.0f}s)")
+        raise AdmissionRejected(message, retry_after, reason)
+
+    async def _current_snapshot(self, db: AsyncSession) -> BacklogSnapshot:
+        """the cached backlog reading, refreshed by one request at a time once it's stale"""
+        if self._fresh():
+            return self._snapshot
+
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            # another request may have refreshed it while this one waited
+            if not self._fresh():
+                self._snapshot = await self._measure(db)
+        return self._snapshot
+
+    def _fresh(self) -> bool:
+        return self._snapshot is not None and time.monotonic() - self._snapshot.taken_at < settings.ADMISSION_REFRESH_SECONDS
+
+    async def _measure(self, db: AsyncSession) -> BacklogSnapshot:
+        """reads the PENDING depth and the recent completion rate"""
+        window = max(settings.ADMISSION_RATE_WINDOW_SECONDS, 1.0)
+        since = utc_now() - timedelta(seconds=window)
+
+        pending_rows = select(Submission.id).filter(Submission.status == SubmissionStatus.PENDING)
+        if settings.ADMISSION_MAX_PENDING > 0:
+            # counting stops just past the limit, an exact figure for a huge backlog isn't needed
+            pending_rows = pending_rows.limit(settings.ADMISSION_MAX_PENDING + 1)
+        pending = await db.scalar(select(func.count()).select_from(pending_rows.subquery()))
+        finished = await db.scalar(
+            select(func.count(Submission.id))
+            .filter(Submission.updated_at >= since)
+            .filter(Submission.status != SubmissionStatus.PENDING)
+        )
+        return BacklogSnapshot(pending=pending or 0, processing_rate=(finished or 0) / window, taken_at=time.monotonic())
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,118 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+from app.schemas.submissions import LLMOutput
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _PendingReview:
+    """a review waiting in the batcher together with the future its caller awaits"""
+    submission_id: str
+    rating: int
+    review_text: str
+    future: asyncio.Future = field(repr=False)
+
+
+class ReviewBatcher:
+    """
+    Groups concurrent review requests into a single llm call.
+    A batch is sent once it holds `max_size` reviews or the oldest review has waited
+    `max_wait_ms`, whichever comes first. Items missing or invalid in the batched answer
+    fall back to a normal single-review call; when the batched call itself fails (e.g. the
+    provider is rate limited) every waiter gets the error instead, so a struggling provider
+    isn't sent one call per review on top.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_size: int,
+        max_wait_ms: int,
+        limiter: Optional[Callable[[], asyncio.Semaphore]] = None
+    ):
+        self.client = client
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.limiter = limiter
+
+        self._pending: List[_PendingReview] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def generate(self, submission_id: str, review_text: str, rating: int) -> LLMOutput:
+        """queues a review for the next batch and waits for its result"""
+        loop = asyncio.get_running_loop()
+        pending = _PendingReview(submission_id, rating, review_text, loop.create_future())
+        self._pending.append(pending)
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await pending.future
+
+    def _flush(self):
+        """sends everything collected so far as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # keep a reference so the task isn't garbage collected mid-flight
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _limited(self, coro):
+        """awaits a provider call under the shared concurrency limit, if one was given"""
+        if self.limiter is None:
+            return await coro
+        async with self.limiter():
+            return await coro
+
+    async def _run_batch(self, batch: List[_PendingReview]):
+        """sends one batched call and resolves every waiting future"""
+        results = {}
+        if len(batch) > 1:
+            items = [(item.submission_id, item.rating, item.review_text) for item in batch]
+            try:
+                results = await self._limited(self.client.agenerate_batch(items))
+            except Exception as e:
+                logger.warning(f"Batched LLM call for {len(batch)} reviews failed: {str(e)}")
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                return
+
+        fallbacks = []
+        for item in batch:
+            output = results.get(item.submission_id)
+            if output is not None:
+                if not item.future.done():
+                    item.future.set_result(output)
+            else:
+                fallbacks.append(item)
+
+        if len(batch) > 1 and fallbacks:
+            logger.info(f"{len(fallbacks)}/{len(batch)} batched reviews fell back to single calls")
+
+        await asyncio.gather(*(self._run_single(item) for item in fallbacks))
+
+    async def _run_single(self, item: _PendingReview):
+        """generates one review on its own and resolves its future"""
+        try:
+            output = await self._limited(self.client.agenerate(item.review_text, item.rating))
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+            return
+
+        if not item.future.done():
+            item.future.set_result(output)
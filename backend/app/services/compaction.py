@@ -0,0 +1,196 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.prompts import get_system_prompt, get_user_prompt
+
+logger = get_logger(__name__)
+
+# zero-width and other invisible format characters that cost tokens but carry nothing
+_INVISIBLE_RE = re.compile(r"[\u200b-\u200f\u2060-\u2064\ufeff\u00ad]")
+_SPACES_RE = re.compile(r"[^\S\n]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+_TOKEN_RE = re.compile(r"\S+")
+# a plain word with only punctuation around it - urls, code, "C++" and "-->" don't match and are left alone
+_PLAIN_WORD_RE = re.compile(r"(\W*?)([^\W\d_]+(?:['\u2019-][^\W\d_]+)*)(\W*)")
+# "soooo goooood" -> "soo good"; no english word has a letter four times in a row, but
+# shorter runs do ("AAA batteries", "XXXL", "www"), so those and all-caps words are kept
+_LONG_LETTER_RUN_RE = re.compile(r"([^\W\d_])\1{3,}")
+_LONG_ELLIPSIS_RE = re.compile(r"\.{4,}")
+# "!!!!", "???" - one is enough
+_REPEATED_MARK_RE = re.compile(r"([!?])\1+")
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_RE = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+# the approximate tokenizer's pieces: runs of letters, runs of digits, single symbols
+_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]")
+
+# marks where sentences were left out of a compacted review
+OMISSION = " ... "
+
+_STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers him his how i if in into is it its itself just me more
+most my no nor not now of off on once only or other our out over own same she should so some
+such than that the their them then there these they this those through to too under until
+up very was we were what when where which while who whom why will with would you your
+""".split())
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """the tiktoken encoding when tiktoken is installed and the encoding loads, otherwise None"""
+    if not settings.TOKENIZER_ENCODING:
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(settings.TOKENIZER_ENCODING)
+    except Exception as e:
+        # tiktoken is optional, and fetches its encoding files on first use
+        logger.info(f"Using the approximate tokenizer ({type(e).__name__}: {str(e)})")
+        return None
+
+
+def _piece_tokens(piece: str) -> int:
+    """approximate bpe tokens for one piece - common words are one token, long words and numbers split"""
+    if piece.isdigit():
+        return math.ceil(len(piece) / 3)
+    if piece.isalpha():
+        return math.ceil(len(piece) / 5)
+    return 1
+
+
+def count_tokens(text: str) -> int:
+    """tokens in `text` with the configured tokenizer, or a close local approximation without tiktoken"""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(_piece_tokens(piece) for piece in _PIECE_RE.findall(text))
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """the longest prefix of `text` that fits in `budget` tokens, cut on a word boundary"""
+    if count_tokens(text) <= budget:
+        return text
+    words = text.split(" ")
+    low, high = 0, len(words)
+    # binary search on the number of words, counting is the expensive part
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle])) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+
+def _collapse_letter_runs(match: re.Match) -> str:
+    token = match.group(0)
+    word = _PLAIN_WORD_RE.fullmatch(token)
+    if word is None or word.group(2).isupper():
+        return token
+    collapsed = _LONG_LETTER_RUN_RE.sub(
+        lambda run: run.group(1) * 2 if run.group(1).islower() else run.group(0), word.group(2)
+    )
+    return word.group(1) + collapsed + word.group(3)
+
+
+def normalize_text(review_text: str) -> str:
+    """
+    Removes what costs tokens without adding meaning: invisible characters, runs of
+    whitespace and blank lines, lowercase letters stretched to four or more in a plain word,
+    long ellipses and repeated "!" or "?". Text is NFKC-normalized so full-width and
+    compatibility forms match.
+    """
+    text = unicodedata.normalize("NFKC", review_text)
+    text = _INVISIBLE_RE.sub("", text)
+    text = _TOKEN_RE.sub(_collapse_letter_runs, text)
+    text = _LONG_ELLIPSIS_RE.sub("...", text)
+    text = _REPEATED_MARK_RE.sub(r"\1", text)
+    text = _SPACES_RE.sub(" ", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES_RE.sub("\n", text).strip()
+
+
+def _content_words(sentence: str) -> List[str]:
+    return [word for word in (w.casefold() for w in _WORD_RE.findall(sentence)) if word not in _STOPWORDS and len(word) > 2]
+
+
+def _split_sentences(text: str) -> List[str]:
+    sentences, seen = [], set()
+    for sentence in _SENTENCE_SPLIT_RE.split(text):
+        key = sentence.strip().casefold()
+        # copy-pasted repeats of the same sentence only need to be sent once
+        if key and key not in seen:
+            seen.add(key)
+            sentences.append(sentence.strip())
+    return sentences
+
+
+def extract_sentences(text: str, budget: int) -> str:
+    """
+    Keeps the most informative sentences of `text` that fit in `budget` tokens, in their
+    original order. Sentences are picked greedily by how often the review repeats the content
+    words they add (what the review is about) per token, so near-duplicates of a sentence
+    already kept score low; the opening and closing sentences, where reviewers usually state
+    their verdict, get a bonus. Gaps are marked with "...".
+    """
+    sentences = _split_sentences(text)
+    words = [set(_content_words(sentence)) for sentence in sentences]
+    tokens = [count_tokens(sentence) for sentence in sentences]
+    frequencies = Counter(word for sentence_words in words for word in sentence_words)
+    last = len(sentences) - 1
+    separator_tokens = count_tokens(OMISSION)
+
+    kept, covered, used = set(), set(), 0
+    while True:
+        best, best_score = None, 0.0
+        for index in range(len(sentences)):
+            if index in kept or used + tokens[index] + separator_tokens > budget:
+                continue
+            # +1 so sentences adding nothing new can still fill leftover budget
+            score = (sum(frequencies[word] for word in words[index] - covered) + 1) / math.sqrt(max(tokens[index], 1))
+            if index in (0, last):
+                score *= 1.5
+            if score > best_score:
+                best, best_score = index, score
+        if best is None:
+            break
+        kept.add(best)
+        covered |= words[best]
+        used += tokens[best] + separator_tokens
+
+    if not kept:
+        # a single sentence longer than the whole budget
+        return truncate_tokens(text, budget)
+
+    parts, previous = [], -1
+    for index in sorted(kept):
+        if parts:
+            parts.append(" " if index == previous + 1 else OMISSION)
+        elif index > 0:
+            parts.append(OMISSION.lstrip())
+        parts.append(sentences[index])
+        previous = index
+    if previous < last:
+        parts.append(OMISSION.rstrip())
+    return "".join(parts)
+
+
+def compact_review(review_text: str, budget: Optional[int] = None) -> str:
+    """the review text sent to the llm: normalized, and cut down to the token budget if it's longer"""
+    budget = settings.REVIEW_TOKEN_BUDGET if budget is None else budget
+    text = normalize_text(review_text)
+    if budget <= 0 or count_tokens(text) <= budget:
+        return text
+    return extract_sentences(text, budget)
+
+
+def prompt_tokens(review_text: str, rating: int) -> int:
+    """tokens in the single-review prompt (system and user message) for this review"""
+    return count_tokens(get_system_prompt()) + count_tokens(get_user_prompt(rating, compact_review(review_text)))
@@ -0,0 +1,175 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from app.core.logging import get_logger
+from app.services.submission_cache import submission_cache
+
+logger = get_logger(__name__)
+
+# postgres NOTIFY channel carrying the ids of submissions that reached COMPLETED or FAILED
+# (or got their user response early while still PENDING)
+SUBMISSION_CHANNEL = "submission_finished"
+
+Subscriber = Tuple[asyncio.AbstractEventLoop, asyncio.Queue]
+
+
+class SubmissionEventBus:
+    """
+    In-process pub/sub of finished submission ids.
+    Subscribers are asyncio queues; publish is thread-safe so sync worker threads
+    can publish straight to subscribers on the api's event loop.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self._callbacks: List[Callable[[str], None]] = []
+
+    def add_callback(self, callback: Callable[[str], None]):
+        """registers a function called with every published submission id"""
+        self._callbacks.append(callback)
+
+    @asynccontextmanager
+    async def subscribe(self, submission_id: str) -> AsyncIterator[asyncio.Queue]:
+        """yields a queue that receives the submission id once it finishes"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        self._subscribers[submission_id].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            subscribers = self._subscribers.get(submission_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[submission_id]
+
+    def publish(self, submission_id: str):
+        """wakes every subscriber of the submission, from any thread"""
+        for callback in self._callbacks:
+            callback(submission_id)
+        for loop, queue in list(self._subscribers.get(submission_id, ())):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, submission_id)
+            except RuntimeError:
+                # the subscriber's loop has shut down
+                pass
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+# global event bus instance
+event_bus = SubmissionEventBus()
+# status changes made by other processes arrive here, so drop this process's cached copy
+event_bus.add_callback(submission_cache.invalidate_local)
+
+
+def notify_submission_finished(db: Session, submission_id):
+    """
+    Announces a finished submission once the caller's transaction commits.
+    On postgres this is a transactional NOTIFY, so every api replica hears about it
+    (including work done by separate worker processes). Other databases only have one
+    process, so the in-process bus is published to after the commit. Either way the
+    cached detail is invalidated after the commit.
+    """
+    submission_id = str(submission_id)
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_notify(SUBMISSION_CHANNEL, submission_id)))
+        event.listen(db, "after_commit", lambda session: submission_cache.invalidate(submission_id), once=True)
+        return
+
+    def after_commit(session):
+        submission_cache.invalidate(submission_id)
+        event_bus.publish(submission_id)
+
+    event.listen(db, "after_commit", after_commit, once=True)
+
+
+def notify_submission_updated(db: Session, submission_id):
+    """announces a change to a still PENDING submission, delivered the same way as a finished one"""
+    notify_submission_finished(db, submission_id)
+
+
+def notify_submissions_updated(db: Session, submission_ids: List[str]):
+    """
+    Bulk version of notify_submission_updated for rows changed together (requeues, sweeps):
+    one NOTIFY statement and one after-commit hook instead of one per row.
+    """
+    submission_ids = [str(submission_id) for submission_id in submission_ids]
+    if not submission_ids:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_notify(:channel, id) FROM unnest(CAST(:ids AS text[])) AS id"),
+            {"channel": SUBMISSION_CHANNEL, "ids": submission_ids}
+        )
+
+        def invalidate(session):
+            for submission_id in submission_ids:
+                submission_cache.invalidate(submission_id)
+
+        event.listen(db, "after_commit", invalidate, once=True)
+        return
+
+    def after_commit(session):
+        for submission_id in submission_ids:
+            submission_cache.invalidate(submission_id)
+            event_bus.publish(submission_id)
+
+    event.listen(db, "after_commit", after_commit, once=True)
+
+
+class PostgresListener:
+    """
+    Holds one connection that LISTENs on the submission channel and forwards
+    notifications to the in-process bus. Reconnects if the connection drops.
+    """
+
+    def __init__(self, engine: AsyncEngine, bus: SubmissionEventBus, reconnect_seconds: float = 5.0):
+        self.engine = engine
+        self.bus = bus
+        self.reconnect_seconds = reconnect_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.bus.publish(payload)
+
+    async def _listen_once(self):
+        async with self.engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            driver_connection = raw.driver_connection
+            lost = asyncio.Event()
+            driver_connection.add_termination_listener(lambda connection: lost.set())
+            await driver_connection.add_listener(SUBMISSION_CHANNEL, self._on_notification)
+            logger.info(f"Listening for submission events on {SUBMISSION_CHANNEL}")
+            try:
+                await lost.wait()
+            finally:
+                if not driver_connection.is_closed():
+                    await driver_connection.remove_listener(SUBMISSION_CHANNEL, self._on_notification)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._listen_once()
+                logger.warning("Submission event listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Submission event listener failed: {str(e)}")
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, List
+from sqlalchemy import Select
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.models import Submission
+from app.db.session import AsyncSessionLocal
+
+logger = get_logger(__name__)
+
+EXPORT_COLUMNS = [
+    Submission.id,
+    Submission.rating,
+    Submission.status,
+    Submission.created_at,
+    Submission.updated_at,
+    Submission.review,
+    Submission.user_ai_response,
+    Submission.admin_summary,
+    Submission.recommended_actions,
+    Submission.error_message,
+    Submission.prompt_tokens,
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    """parquet export is optional and needs pyarrow"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _row_to_dict(row) -> dict:
+    """converts an exported row to plain json-friendly values"""
+    data = dict(row._mapping)
+    data["id"] = str(data["id"])
+    data["status"] = data["status"].value
+    data["created_at"] = data["created_at"].isoformat() if data["created_at"] else None
+    data["updated_at"] = data["updated_at"].isoformat() if data["updated_at"] else None
+    return data
+
+
+class _CsvEncoder:
+    """encodes row chunks as csv, header first"""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(self._buffer, fieldnames=EXPORT_FIELDS)
+        self._writer.writeheader()
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def encode(self, rows) -> bytes:
+        for row in rows:
+            data = _row_to_dict(row)
+            data["recommended_actions"] = json.dumps(data["recommended_actions"]) if data["recommended_actions"] is not None else ""
+            self._writer.writerow(data)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        # header only, when nothing matched
+        return self._drain()
+
+
+class _NdjsonEncoder:
+    """encodes row chunks as one json object per line"""
+
+    def encode(self, rows) -> bytes:
+        return "".join(json.dumps(_row_to_dict(row)) + "\n" for row in rows).encode("utf-8")
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _DrainableSink(io.RawIOBase):
+    """write-only file object whose contents are handed out and forgotten chunk by chunk"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+class _ParquetEncoder:
+    """encodes each row chunk as a parquet row group, so memory is bounded by the chunk size"""
+
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id", pa.string()),
+            ("rating", pa.int32()),
+            ("status", pa.string()),
+            ("created_at", pa.string()),
+            ("updated_at", pa.string()),
+            ("review", pa.string()),
+            ("user_ai_response", pa.string()),
+            ("admin_summary", pa.string()),
+            ("recommended_actions", pa.list_(pa.string())),
+            ("error_message", pa.string()),
+            ("prompt_tokens", pa.int32()),
+        ])
+        self._sink = _DrainableSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema)
+
+    def encode(self, rows) -> bytes:
+        table = self._pa.Table.from_pylist([_row_to_dict(row) for row in rows], schema=self._schema)
+        self._writer.write_table(table)
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        # writes the footer
+        self._writer.close()
+        return self._sink.drain()
+
+
+_ENCODERS = {
+    "csv": _CsvEncoder,
+    "ndjson": _NdjsonEncoder,
+    "parquet": _ParquetEncoder,
+}
+
+
+async def stream_export(statement: Select, format: str) -> AsyncIterator[bytes]:
+    """
+    Executes the export query with a server-side cursor and yields the encoded file chunk by chunk.
+    Opens its own session because the request-scoped one is closed before the response streams.
+    """
+    statement = statement.order_by(Submission.created_at, Submission.id)
+    encoder = _ENCODERS[format]()
+    exported = 0
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement.execution_options(yield_per=settings.EXPORT_CHUNK_ROWS))
+        async for rows in result.partitions():
+            exported += len(rows)
+            yield encoder.encode(rows)
+
+    tail = encoder.finish()
+    if tail:
+        yield tail
+    logger.info(f"Finished {format} export of {exported} rows")
@@ -0,0 +1,97 @@
+import hashlib
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.models import IdempotencyKey, Submission, SubmissionStatus, utc_now
+from app.schemas.submissions import SubmissionResponse
+from app.services.response_cache import normalize_review
+
+logger = get_logger(__name__)
+
+# expired keys are deleted after every this many new keys, lookups ignore them until then
+_PURGE_EVERY_N_WRITES = 100
+_writes = 0
+
+
+class IdempotencyKeyReused(Exception):
+    """the Idempotency-Key was already used for a different rating or review"""
+
+
+def content_hash(rating: int, review_text: str) -> str:
+    """hash of a submission's rating and normalized review, equal for retries of the same submission"""
+    return hashlib.sha256(f"{rating}:{normalize_review(review_text)}".encode("utf-8")).hexdigest()
+
+
+def hash_key(key: str) -> str:
+    """keys are only compared, so the raw header value isn't stored"""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+async def find_response(db: AsyncSession, key_hash: str, request_hash: str) -> Optional[SubmissionResponse]:
+    """the response stored for an unexpired key, or None when the key is new"""
+    row = await db.scalar(select(IdempotencyKey).filter(IdempotencyKey.key_hash == key_hash))
+    if row is None:
+        return None
+
+    if row.expires_at <= utc_now():
+        # free the key for this request, the delete commits with the new row
+        await db.execute(delete(IdempotencyKey).filter(IdempotencyKey.key_hash == key_hash))
+        return None
+
+    if row.request_hash != request_hash:
+        raise IdempotencyKeyReused("Idempotency-Key was already used for a different submission")
+    return SubmissionResponse(**row.response)
+
+
+def remember(db: AsyncSession, key_hash: str, request_hash: str, response: SubmissionResponse):
+    """adds the key to the session, it's committed in the same transaction as the submission"""
+    now = utc_now()
+    db.add(IdempotencyKey(
+        key_hash=key_hash,
+        request_hash=request_hash,
+        submission_id=response.submission_id,
+        response=response.model_dump(mode="json"),
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    ))
+
+
+async def purge_expired(db: AsyncSession):
+    """deletes expired keys every _PURGE_EVERY_N_WRITES new keys, called after a key is committed"""
+    global _writes
+    _writes += 1
+    if _writes % _PURGE_EVERY_N_WRITES:
+        return
+    try:
+        result = await db.execute(delete(IdempotencyKey).filter(IdempotencyKey.expires_at <= utc_now()))
+        await db.commit()
+        logger.info(f"Purged {result.rowcount} expired idempotency keys")
+    except Exception as e:
+        logger.warning(f"Idempotency key purge failed: {str(e)}")
+        await db.rollback()
+
+
+async def find_duplicate(db: AsyncSession, request_hash: str) -> Optional[SubmissionResponse]:
+    """
+    The newest submission with the same rating and review created within DEDUPE_WINDOW_SECONDS,
+    or None when there isn't one or the window is disabled. FAILED submissions are skipped so
+    resubmitting after a failure queues the review again.
+    """
+    if settings.DEDUPE_WINDOW_SECONDS <= 0:
+        return None
+
+    since = utc_now() - timedelta(seconds=settings.DEDUPE_WINDOW_SECONDS)
+    row = (await db.execute(
+        select(Submission.id, Submission.status)
+        .filter(Submission.content_hash == request_hash)
+        .filter(Submission.created_at >= since)
+        .filter(Submission.status != SubmissionStatus.FAILED)
+        .order_by(Submission.created_at.desc())
+        .limit(1)
+    )).first()
+    if row is None:
+        return None
+    return SubmissionResponse(submission_id=row.id, status=row.status.value)
@@ -1,60 +1,583 @@
+import asyncio
 import json
 import time
-from langchain_groq import ChatGroq
-from langchain.schema import HumanMessage, SystemMessage
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import groq
+import httpx
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+from pydantic import TypeAdapter, ValidationError
 from app.core.config import settings
-from app.core.logging import get_logger
-from app.schemas.submissions import LLMOutput
-from app.services.prompts import get_system_prompt, get_user_prompt
+from app.core.logging import get_logger, timed_stage
+from app.core.metrics import (
+    LLM_REQUEST_SECONDS, LLM_TOKENS, LLM_ERRORS, LLM_PARSE_FALLBACKS, LLM_REPAIRS, LLM_USER_RESPONSE_SECONDS,
+    LLM_FAILOVERS, LLM_HEDGES
+)
+from app.schemas.submissions import LLMOutput, LLMBatchItem
+from app.services.prompts import (
+    get_system_prompt, get_user_prompt, get_batch_system_prompt, get_batch_user_prompt, get_repair_prompt
+)
+from app.services.providers import LLMProvider, LLMRouter
+from app.services.compaction import compact_review, count_tokens
+from app.services.response_cache import ResponseCache
+from app.services.rate_limit import (
+    CircuitOpenError, LLMUnavailableError, backoff_delay, parse_retry_after, parse_duration
+)
+from app.utils.json_stream import IncrementalJSONParser
 
 logger = get_logger(__name__)
 
+# validators for single LLMOutput fields, used while a response is still streaming
+FIELD_VALIDATORS = {name: TypeAdapter(field.annotation) for name, field in LLMOutput.model_fields.items()}
+
+
+def _error_reason(error: Exception) -> str:
+    """short description of a parse or validation error, for logs and the repair prompt"""
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+    return str(error)
+
+
+class LLMOutputError(ValueError):
+    """the llm's answer isn't json matching LLMOutput, `reason` says what's wrong"""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class _EarlyReply:
+    """
+    Hands the caller the user_ai_response of a streamed attempt before the rest of the answer
+    arrives, and takes it back with `callback(None)` when that attempt's answer isn't the one
+    used: it failed, lost a hedge race, or went to a repair call. An attempt only sends while it
+    streams alone, so while a hedge races the primary neither does and the winner's reply is
+    saved with the rest of its answer.
+    """
+
+    def __init__(self, callback: Optional[Callable[[Optional[str]], None]]):
+        self.callback = callback
+        self.streaming: Set[object] = set()
+        self.sent_by: Optional[object] = None
+        self.sent_message: Optional[AIMessage] = None
+
+    def start(self) -> object:
+        """registers a streamed attempt, returns its token"""
+        attempt = object()
+        self.streaming.add(attempt)
+        return attempt
+
+    def offer(self, attempt: object, text: str):
+        if self.callback and self.sent_by is None and self.streaming == {attempt}:
+            self.sent_by = attempt
+            self.callback(text)
+
+    def finish(self, attempt: object, message: Optional[AIMessage]):
+        """records the attempt's completion, or with no message its failure or cancellation"""
+        self.streaming.discard(attempt)
+        if attempt is self.sent_by:
+            if message is None:
+                self.retract()
+            else:
+                self.sent_message = message
+
+    def keep(self, response: AIMessage):
+        """the answer that was used - takes back a reply sent by any other attempt"""
+        if self.sent_by is not None and self.sent_message is not response:
+            self.retract()
+
+    def retract(self):
+        if self.sent_by is not None:
+            self.sent_by = self.sent_message = None
+            self.callback(None)
+
 
 class LLMClient:
-    """handles interaction with llm providers (groq, openai, or mock) using langchain"""
+    """handles interaction with the pool of llm providers (groq, openai-compatible, or mock) using langchain"""
     
-    def __init__(self):
-        self.provider = settings.LLM_PROVIDER
-        self.api_key = settings.llm_api_key
+    def __init__(self, router: Optional[LLMRouter] = None):
         self.model = settings.LLM_MODEL
-        self.timeout = settings.LLM_TIMEOUT_SECONDS
         self.max_retries = settings.LLM_MAX_RETRIES
         
-        # initialize the appropriate llm client based on provider
-        if self.provider == "groq":
-            self.llm = ChatGroq(
-                model=self.model,
-                groq_api_key=self.api_key,
-                temperature=0.7,
-                timeout=self.timeout,
-                max_retries=self.max_retries
-            )
-    
-    def generate(self, review_text: str, rating: int):
-        """generates an llm response for the given review and rating"""
-        if self.provider == "mock":
-            return self._mock_generate(review_text, rating)
-        elif self.provider in ["openai", "groq"]:
-            return self._llm_generate(review_text, rating)
+        # every configured provider, each with its own rate limiter and circuit breaker
+        self.router = router or LLMRouter.from_settings()
+        
+        # identical reviews are answered from the cache without an llm round-trip
+        self.cache = ResponseCache(self.model)
+    
+    def generate(self, review_text: str, rating: int, on_user_response: Optional[Callable[[Optional[str]], None]] = None):
+        """
+        generates an llm response for the given review and rating.
+        when streaming, on_user_response is called with user_ai_response as soon as it's complete,
+        and with None if that reply is withdrawn because the final answer comes from another call.
+        """
+        cached = self.cache.get(review_text, rating)
+        if cached is not None:
+            return cached
+        
+        output = self._llm_generate(review_text, rating, on_user_response)
+        self.cache.set(review_text, rating, output)
+        return output
+    
+    async def agenerate(self, review_text: str, rating: int, on_user_response: Optional[Callable[[Optional[str]], None]] = None):
+        """async version of generate - awaits the provider instead of blocking a thread"""
+        cached = await self.cache.aget(review_text, rating)
+        if cached is not None:
+            return cached
+        
+        output = await self._allm_generate(review_text, rating, on_user_response)
+        await self.cache.aset(review_text, rating, output)
+        return output
+    
+    async def acomplete(self, messages) -> AIMessage:
+        """
+        one raw completion through the rate limiter, retries and failover, without the app's
+        prompts or response parsing - for tooling such as the prompt evals. The answering
+        call's own duration (without rate-limit waits or failed attempts) is added to the
+        response metadata as latency_seconds.
+        """
+        async def timed_call(provider: LLMProvider, m):
+            started = time.perf_counter()
+            response = await provider.json_llm.ainvoke(m)
+            response.response_metadata = {**(response.response_metadata or {}), "latency_seconds": time.perf_counter() - started}
+            return response
+        
+        return await self._ainvoke(messages, call=timed_call)
+    
+    def _estimate_tokens(self, messages) -> int:
+        """token estimate (prompt + expected completion) used to reserve rate-limit budget"""
+        return sum(count_tokens(message.content) for message in messages) + settings.LLM_EXPECTED_OUTPUT_TOKENS
+    
+    def _retry_delay(self, provider: LLMProvider, error: Exception, attempt: int) -> Optional[float]:
+        """returns how long to wait before retrying after `error`, or None if it isn't retryable"""
+        if isinstance(error, CircuitOpenError):
+            return error.retry_after
+        
+        status_code = getattr(error, "status_code", None)
+        retryable = (
+            isinstance(error, (groq.APIConnectionError, httpx.TransportError, TimeoutError))
+            or status_code in (408, 409, 429)
+            or (status_code is not None and status_code >= 500)
+        )
+        if not retryable:
+            return None
+        
+        # prefer the provider's own hint over our backoff schedule
+        response = getattr(error, "response", None)
+        headers = response.headers if response is not None else {}
+        hinted = parse_retry_after(headers.get("retry-after")) or parse_duration(
+            headers.get("x-ratelimit-reset-requests") if status_code == 429 else None
+        )
+        if hinted:
+            provider.rate_limiter.pause(hinted)
+            return hinted
+        return backoff_delay(attempt, settings.LLM_BACKOFF_BASE_SECONDS, settings.LLM_BACKOFF_MAX_SECONDS)
+    
+    def _record_metrics(self, provider: LLMProvider, started: float, response=None, error: Optional[Exception] = None):
+        """records latency, token usage and errors for one provider call"""
+        labels = {"provider": provider.name, "model": provider.model}
+        LLM_REQUEST_SECONDS.labels(**labels, outcome="error" if error else "success").observe(
+            time.perf_counter() - started
+        )
+        if error is not None:
+            status_code = getattr(error, "status_code", None)
+            LLM_ERRORS.labels(**labels, error=str(status_code) if status_code else type(error).__name__).inc()
+            return
+        
+        usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage.get(kind):
+                LLM_TOKENS.labels(**labels, kind=kind.replace("_tokens", "")).inc(usage[kind])
+    
+    def _record_outcome(self, provider: LLMProvider, started: float, error: Optional[Exception]):
+        """
+        updates the provider's health stats and circuit breaker.
+        every failure lowers its routing weight, only provider-side failures count against the breaker,
+        and every outcome settles a half-open breaker so it can't stay stuck waiting for its probe.
+        """
+        provider.record(time.perf_counter() - started, error is not None)
+        status_code = getattr(error, "status_code", None)
+        if status_code == 429:
+            provider.circuit_breaker.record_throttled()
+        elif error is None or (status_code is not None and status_code < 500 and status_code != 408):
+            # a client error (bad request, auth) still means the provider is up and answering
+            provider.circuit_breaker.record_success()
         else:
-            raise ValueError(f"Unsupported LLM provider: {self.provider}")
+            provider.circuit_breaker.record_failure()
+    
+    def _call_provider(self, provider: LLMProvider, messages, call: Callable, tokens: int):
+        """one call to one provider through its circuit breaker and rate limiter"""
+        provider.circuit_breaker.check()
+        provider.rate_limiter.acquire(tokens)
+        started = time.perf_counter()
+        try:
+            response = call(provider, messages)
+        except Exception as e:
+            self._record_metrics(provider, started, error=e)
+            self._record_outcome(provider, started, e)
+            raise
+        self._record_metrics(provider, started, response=response)
+        self._record_outcome(provider, started, None)
+        return response
+    
+    async def _acall_provider(self, provider: LLMProvider, messages, call: Callable, tokens: int):
+        """async version of _call_provider"""
+        provider.circuit_breaker.check()
+        try:
+            await provider.rate_limiter.aacquire(tokens)
+            started = time.perf_counter()
+            response = await call(provider, messages)
+        except asyncio.CancelledError:
+            # the losing side of a hedge, neither a success nor a failure
+            provider.circuit_breaker.release()
+            raise
+        except Exception as e:
+            self._record_metrics(provider, started, error=e)
+            self._record_outcome(provider, started, e)
+            raise
+        self._record_metrics(provider, started, response=response)
+        self._record_outcome(provider, started, None)
+        return response
+    
+    def _next_attempt_delay(self, provider: LLMProvider, error: Exception, attempt: int, failed: Set[str]) -> float:
+        """
+        decides what follows a failed call: raises when the request should give up, otherwise
+        returns how long to wait first - nothing when another provider can take the next attempt.
+        """
+        failed.add(provider.name)
+        delay = self._retry_delay(provider, error, attempt)
+        if attempt == self.max_retries:
+            raise self._exhausted_error(error, delay)
+        
+        # any error is worth trying elsewhere, a different provider may accept what this one rejected
+        if self.router.choose(exclude=failed, strict=True) is not None:
+            logger.warning(f"LLM call to {provider.name} failed ({str(error)}), failing over")
+            LLM_FAILOVERS.labels(provider=provider.name).inc()
+            return 0.0
+        if delay is None:
+            raise error
+        logger.warning(f"LLM call to {provider.name} failed ({str(error)}), retry {attempt + 1} in {delay:.1f}s")
+        return delay
+    
+    def _invoke(self, messages, call: Optional[Callable] = None):
+        """
+        calls a provider from the pool, retrying with backoff and failing over to the others.
+        `call(provider, messages)` replaces the plain json-mode invoke, e.g. to consume a stream.
+        """
+        call = call or (lambda provider, m: provider.json_llm.invoke(m))
+        tokens = self._estimate_tokens(messages)
+        failed = set()
+        for attempt in range(self.max_retries + 1):
+            provider = self.router.choose(exclude=failed)
+            try:
+                return self._call_provider(provider, messages, call, tokens)
+            except Exception as e:
+                delay = self._next_attempt_delay(provider, e, attempt, failed)
+            if delay:
+                time.sleep(delay)
+    
+    async def _ainvoke(self, messages, call: Optional[Callable] = None):
+        """async version of _invoke, which also hedges slow calls when LLM_HEDGE_ENABLED is on"""
+        call = call or (lambda provider, m: provider.json_llm.ainvoke(m))
+        tokens = self._estimate_tokens(messages)
+        failed = set()
+        for attempt in range(self.max_retries + 1):
+            provider = self.router.choose(exclude=failed)
+            try:
+                if settings.LLM_HEDGE_ENABLED:
+                    return await self._ahedged_call(provider, messages, call, tokens, failed)
+                return await self._acall_provider(provider, messages, call, tokens)
+            except Exception as e:
+                delay = self._next_attempt_delay(provider, e, attempt, failed)
+            if delay:
+                await asyncio.sleep(delay)
+    
+    async def _ahedged_call(self, provider: LLMProvider, messages, call: Callable, tokens: int, failed: Set[str]):
+        """
+        Calls `provider`, and if it hasn't answered by its p95 latency also calls a second
+        provider, returning whichever succeeds first and cancelling the other. When both fail
+        the hedge provider is added to `failed` and the first provider's error is raised.
+        """
+        primary = asyncio.create_task(self._acall_provider(provider, messages, call, tokens))
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=provider.hedge_delay())
+            if done:
+                return primary.result()
+            
+            backup = self.router.choose(exclude=failed | {provider.name}, strict=True)
+            if backup is None:
+                return await primary
+            hedge = asyncio.create_task(self._acall_provider(backup, messages, call, tokens))
+            
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        LLM_HEDGES.labels(winner="primary" if task is primary else "hedge").inc()
+                        return task.result()
+            
+            LLM_HEDGES.labels(winner="none").inc()
+            failed.add(backup.name)
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    def _exhausted_error(self, error: Exception, delay: Optional[float]) -> Exception:
+        """rate-limited work goes back to the queue, other retryable errors fail the request"""
+        if getattr(error, "status_code", None) == 429:
+            return LLMUnavailableError(f"LLM provider rate limit: {str(error)}", retry_after=delay)
+        return error
+    
+    def _check_streamed_fields(
+        self, provider: LLMProvider, parser: IncrementalJSONParser, fields, started: float, on_user_response: Callable
+    ):
+        """validates fields as they complete and hands user_ai_response to the caller early"""
+        for name, value in fields:
+            validator = FIELD_VALIDATORS.get(name)
+            if validator is None:
+                continue
+            try:
+                validator.validate_python(value)
+            except ValidationError as e:
+                # no point reading the rest, the response will fail validation anyway
+                logger.warning(f"Invalid {name} in streamed LLM response: {str(e)}")
+                parser.error = f"invalid {name}"
+                return
+            if name == "user_ai_response":
+                LLM_USER_RESPONSE_SECONDS.labels(provider=provider.name, model=provider.model).observe(
+                    time.perf_counter() - started
+                )
+                on_user_response(value)
+    
+    def _streamed_message(self, parser: IncrementalJSONParser, usage: Optional[dict]) -> AIMessage:
+        """the consumed completion - just the json object if it closed, whatever arrived otherwise"""
+        content = parser.buffer[parser.start:parser.end] if parser.complete else parser.buffer
+        return AIMessage(content=content, response_metadata={"token_usage": usage} if usage else {})
+    
+    def _consume_stream(self, provider: LLMProvider, messages, early: _EarlyReply) -> AIMessage:
+        """
+        Streams a completion through the incremental json parser and stops reading at
+        the closing brace, so output generated past the json is never waited for.
+        """
+        started = time.perf_counter()
+        parser = IncrementalJSONParser()
+        usage = None
+        attempt = early.start()
+        stream = provider.llm.stream(messages)
+        try:
+            for chunk in stream:
+                usage = (chunk.response_metadata or {}).get("token_usage") or usage
+                fields = parser.feed(chunk.content)
+                self._check_streamed_fields(provider, parser, fields, started, lambda text: early.offer(attempt, text))
+                if parser.done:
+                    break
+        except BaseException:
+            early.finish(attempt, None)
+            raise
+        finally:
+            stream.close()
+        message = self._streamed_message(parser, usage)
+        early.finish(attempt, message)
+        return message
+    
+    async def _aconsume_stream(self, provider: LLMProvider, messages, early: _EarlyReply) -> AIMessage:
+        """async version of _consume_stream"""
+        started = time.perf_counter()
+        parser = IncrementalJSONParser()
+        usage = None
+        attempt = early.start()
+        stream = provider.llm.astream(messages)
+        try:
+            async for chunk in stream:
+                usage = (chunk.response_metadata or {}).get("token_usage") or usage
+                fields = parser.feed(chunk.content)
+                self._check_streamed_fields(provider, parser, fields, started, lambda text: early.offer(attempt, text))
+                if parser.done:
+                    break
+        except BaseException:
+            # failed, or cancelled as the losing side of a hedge
+            early.finish(attempt, None)
+            raise
+        finally:
+            await stream.aclose()
+        message = self._streamed_message(parser, usage)
+        early.finish(attempt, message)
+        return message
+    
+    def _build_messages(self, review_text: str, rating: int):
+        """builds the chat messages sent to the llm for one review, with the review compacted to its token budget"""
+        return [
+            SystemMessage(content=get_system_prompt()),
+            HumanMessage(content=get_user_prompt(rating, compact_review(review_text)))
+        ]
         
-    def _llm_generate(self, review_text: str, rating: int):
+    def _llm_generate(self, review_text: str, rating: int, on_user_response=None):
         """sends the review to the llm api and returns the parsed response"""
+        try:
+            messages = self._build_messages(review_text, rating)
+            early = _EarlyReply(on_user_response)
+            
+            with timed_stage("llm"):
+                if settings.LLM_STREAM_RESPONSES:
+                    response = self._invoke(messages, lambda p, m: self._consume_stream(p, m, early))
+                    early.keep(response)
+                else:
+                    response = self._invoke(messages)
+            content = response.content
+            
+            try:
+                with timed_stage("parse"):
+                    return self._parse_llm_response(content)
+            except LLMOutputError as e:
+                if not settings.LLM_REPAIR_ENABLED:
+                    raise
+                # the repaired answer may word the reply differently
+                early.retract()
+                with timed_stage("repair"):
+                    repaired = self._invoke(self._repair_messages(messages, content, e))
+                return self._parse_repaired_response(repaired.content)
+            
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"LLM API call failed: {str(e)}")
+            raise Exception(f"LLM request failed: {str(e)}")
+    
+    async def _allm_generate(self, review_text: str, rating: int, on_user_response=None):
+        """async version of _llm_generate using the provider's ainvoke"""
+        try:
+            messages = self._build_messages(review_text, rating)
+            early = _EarlyReply(on_user_response)
+            
+            with timed_stage("llm"):
+                if settings.LLM_STREAM_RESPONSES:
+                    response = await self._ainvoke(messages, lambda p, m: self._aconsume_stream(p, m, early))
+                    early.keep(response)
+                else:
+                    response = await self._ainvoke(messages)
+            content = response.content
+            
+            try:
+                with timed_stage("parse"):
+                    return self._parse_llm_response(content)
+            except LLMOutputError as e:
+                if not settings.LLM_REPAIR_ENABLED:
+                    raise
+                # the repaired answer may word the reply differently
+                early.retract()
+                with timed_stage("repair"):
+                    repaired = await self._ainvoke(self._repair_messages(messages, content, e))
+                return self._parse_repaired_response(repaired.content)
+            
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"LLM API call failed: {str(e)}")
+            raise Exception(f"LLM request failed: {str(e)}")
+    
+    def _repair_messages(self, messages, content: str, error: LLMOutputError):
+        """the original conversation plus the invalid answer and what was wrong with it"""
+        logger.warning(f"Asking the LLM to repair an invalid response: {error.reason}")
+        return messages + [AIMessage(content=content), HumanMessage(content=get_repair_prompt(error.reason))]
+    
+    def _parse_repaired_response(self, content: str) -> LLMOutput:
+        """parses the answer to a repair call and records whether the repair worked"""
+        try:
+            output = self._parse_llm_response(content)
+        except LLMOutputError:
+            LLM_REPAIRS.labels(model=self.model, outcome="failed").inc()
+            raise
+        LLM_REPAIRS.labels(model=self.model, outcome="repaired").inc()
+        return output
+    
+    async def agenerate_batch(self, items: List[Tuple[str, int, str]]) -> Dict[str, LLMOutput]:
+        """
+        Generates responses for several (submission_id, rating, review_text) items in one call.
+        Returns the validated output per submission id; items the model skipped or answered
+        with invalid data are left out so the caller can retry them individually.
+        """
+        results = {}
+        uncached = []
+        for submission_id, rating, review_text in items:
+            cached = await self.cache.aget(review_text, rating)
+            if cached is not None:
+                results[submission_id] = cached
+            else:
+                uncached.append((submission_id, rating, review_text))
+        
+        if uncached:
+            generated = await self._agenerate_batch_uncached(uncached)
+            for submission_id, rating, review_text in uncached:
+                if submission_id in generated:
+                    await self.cache.aset(review_text, rating, generated[submission_id])
+            results.update(generated)
+        
+        return results
+    
+    async def _agenerate_batch_uncached(self, items: List[Tuple[str, int, str]]) -> Dict[str, LLMOutput]:
+        """sends a batch of reviews to a provider from the pool in one call"""
         try:
             messages = [
-                SystemMessage(content=get_system_prompt()),
-                HumanMessage(content=get_user_prompt(rating, review_text))
+                SystemMessage(content=get_batch_system_prompt()),
+                HumanMessage(content=get_batch_user_prompt(
+                    [(submission_id, rating, compact_review(review_text)) for submission_id, rating, review_text in items]
+                ))
             ]
             
-            response = self.llm.invoke(messages)
+            response = await self._ainvoke(messages)
             content = response.content
             
-            return self._parse_llm_response(content)
-            
+        except LLMUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"{self.provider.upper()} API call failed: {str(e)}")
+            logger.error(f"LLM batch API call failed: {str(e)}")
             raise Exception(f"LLM request failed: {str(e)}")
+        
+        expected_ids = {submission_id for submission_id, _, _ in items}
+        results = {}
+        for raw_item in self._parse_llm_batch_response(content):
+            try:
+                item = LLMBatchItem(**raw_item)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Invalid item in batched LLM response: {str(e)}")
+                continue
+            if item.submission_id in expected_ids:
+                results[item.submission_id] = LLMOutput(
+                    user_ai_response=item.user_ai_response,
+                    admin_summary=item.admin_summary,
+                    recommended_actions=item.recommended_actions
+                )
+        
+        return results
+    
+    def _parse_llm_batch_response(self, content: str) -> list:
+        """extracts the json array from a batched llm response, empty if there is none"""
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            # fallback: extract the json array from the response text
+            start = content.find('[')
+            end = content.rfind(']') + 1
+            if start < 0 or end <= start:
+                logger.warning(f"Batched LLM response has no JSON array: {content[:200]}")
+                LLM_PARSE_FALLBACKS.labels(model=self.model, outcome="failed").inc()
+                return []
+            try:
+                data = json.loads(content[start:end])
+            except json.JSONDecodeError as e:
+                logger.warning(f"Failed to parse batched LLM response: {str(e)}")
+                LLM_PARSE_FALLBACKS.labels(model=self.model, outcome="failed").inc()
+                return []
+            LLM_PARSE_FALLBACKS.labels(model=self.model, outcome="recovered").inc()
+        
+        # tolerate the array being wrapped in an object, e.g. {"results": [...]}
+        if isinstance(data, dict):
+            data = next((value for value in data.values() if isinstance(value, list)), [])
+        
+        return [item for item in data if isinstance(item, dict)] if isinstance(data, list) else []
     
     def _parse_llm_response(self, content: str):
         """tries to extract and validate the json from the llm response"""
@@ -62,8 +585,9 @@ class LLMClient:
             # first attempt: parse as json directly
             data = json.loads(content)
             return LLMOutput(**data)
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.warning(f"Failed to parse LLM response: {str(e)}")
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            reason = _error_reason(e)
+            logger.warning(f"Failed to parse LLM response: {reason}")
             
             # fallback: extract json object from response text
             try:
@@ -72,11 +596,14 @@ class LLMClient:
                 if start >= 0 and end > start:
                     json_str = content[start:end]
                     data = json.loads(json_str)
-                    return LLMOutput(**data)
+                    output = LLMOutput(**data)
+                    LLM_PARSE_FALLBACKS.labels(model=self.model, outcome="recovered").inc()
+                    return output
             except Exception:
                 pass
             
-            raise ValueError(f"Invalid LLM response format: {content[:200]}")
+            LLM_PARSE_FALLBACKS.labels(model=self.model, outcome="failed").inc()
+            raise LLMOutputError(f"Invalid LLM response format: {content[:200]}", reason)
 
 
 # create global llm client instance
@@ -0,0 +1,193 @@
+import asyncio
+import copy
+import json
+import random
+import re
+import time
+from typing import AsyncIterator, Iterator, List, Tuple
+from langchain.schema import AIMessage
+from langchain_core.messages import AIMessageChunk
+from app.services.prompts import get_batch_system_prompt
+
+_BATCH_ITEM_RE = re.compile(r"submission_id: (\S+)\nRating: (\d)/5")
+_RATING_RE = re.compile(r"Rating: (\d)/5")
+# the review inside a rating-prediction prompt (prompts.RATING_PROMPTS)
+_PREDICTION_REVIEW_RE = re.compile(r"Review: (.*?)\n\s*\n", re.DOTALL)
+_WORD_RE = re.compile(r"[a-z']+")
+_POSITIVE_WORDS = {
+    "amazing", "awesome", "best", "delicious", "excellent", "fantastic", "friendly",
+    "great", "love", "loved", "perfect", "recommend", "wonderful",
+}
+_NEGATIVE_WORDS = {
+    "awful", "bad", "cold", "disappointed", "disgusting", "horrible", "never",
+    "overpriced", "rude", "slow", "terrible", "worst",
+}
+# characters per streamed chunk, roughly a few tokens
+_CHUNK_CHARS = 16
+
+_RESPONSES = {
+    "negative": (
+        "We're sorry your experience fell short. Thank you for telling us, we're looking into it right away.",
+        "Dissatisfied customer reporting a poor experience.",
+        ["Contact the customer to resolve the issue", "Review the reported problem with the team"],
+    ),
+    "neutral": (
+        "Thanks for your feedback! We're glad parts of your experience went well and we'll work on the rest.",
+        "Mixed review with room for improvement.",
+        ["Follow up on the points raised"],
+    ),
+    "positive": (
+        "Thank you so much for the kind words! We're thrilled you had a great experience.",
+        "Satisfied customer with positive feedback.",
+        ["Send a thank you note", "Invite the customer to leave a public review"],
+    ),
+}
+
+
+class MockLLMError(Exception):
+    """simulated provider failure, looks like a 503 to the retry logic"""
+    status_code = 503
+
+
+def _sentiment(rating: int) -> str:
+    if rating <= 2:
+        return "negative"
+    if rating == 3:
+        return "neutral"
+    return "positive"
+
+
+def _predict_stars(review: str) -> int:
+    """word-count sentiment guess, so prompt evals against the mock score somewhere sensible"""
+    words = _WORD_RE.findall(review.lower())
+    score = sum(word in _POSITIVE_WORDS for word in words) - sum(word in _NEGATIVE_WORDS for word in words)
+    return max(1, min(5, 3 + score))
+
+
+def _answer(rating: int) -> dict:
+    user_ai_response, admin_summary, recommended_actions = _RESPONSES[_sentiment(rating)]
+    return {
+        "user_ai_response": user_ai_response,
+        "admin_summary": admin_summary,
+        "recommended_actions": list(recommended_actions),
+    }
+
+
+class MockChatModel:
+    """
+    Stand-in for a chat model that answers the app's prompts without a network call.
+    Answers are deterministic per rating (rating-prediction prompts get a keyword-based
+    guess instead); latency, failures (503s) and malformed json
+    are injected at the configured rates so the retry and parse paths get exercised.
+    Malformed answers alternate between json wrapped in prose (recoverable by the
+    parser's fallback) and truncated json (unrecoverable); in json mode they are valid
+    json that is missing a required field instead, like a real json mode failure.
+    Streaming spends half the latency before the first chunk and spreads the rest
+    over the chunks, like a provider's time to first token followed by generation.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        latency_jitter_ms: float = 0,
+        failure_rate: float = 0,
+        malformed_rate: float = 0,
+        seed=None
+    ):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.json_mode = False
+        self._random = random.Random(seed)
+        self._malformed_count = 0
+
+    def bind(self, response_format=None):
+        """mirrors BaseChatModel.bind for the provider's json mode"""
+        bound = copy.copy(self)
+        bound.json_mode = (response_format or {}).get("type") == "json_object"
+        return bound
+
+    def _latency(self) -> float:
+        jitter = self._random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms) if self.latency_jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def _content(self, system_prompt: str, user_prompt: str) -> str:
+        malformed = self._random.random() < self.malformed_rate
+        required = "recommended_actions"
+        if '"predicted_stars"' in user_prompt:
+            match = _PREDICTION_REVIEW_RE.search(user_prompt)
+            stars = _predict_stars(match.group(1) if match else "")
+            answers = [{"predicted_stars": stars, "explanation": f"Keyword sentiment suggests {stars} stars."}]
+            data = answers[0]
+            required = "predicted_stars"
+        elif system_prompt == get_batch_system_prompt():
+            items: List[Tuple[str, str]] = _BATCH_ITEM_RE.findall(user_prompt)
+            answers = [{"submission_id": submission_id, **_answer(int(rating))} for submission_id, rating in items]
+            data = {"results": answers}
+        else:
+            match = _RATING_RE.search(user_prompt)
+            answers = [_answer(int(match.group(1)) if match else 3)]
+            data = answers[0]
+
+        if malformed and self.json_mode:
+            for answer in answers:
+                del answer[required]
+            return json.dumps(data)
+
+        content = json.dumps(data)
+        if malformed:
+            self._malformed_count += 1
+            if self._malformed_count % 2:
+                return f"Sure! Here is the analysis:\n{content}\nLet me know if you need anything else."
+            return content[:len(content) // 2]
+        return content
+
+    def _respond(self, messages) -> AIMessage:
+        if self._random.random() < self.failure_rate:
+            raise MockLLMError("Mock LLM provider unavailable (simulated failure)")
+
+        system_prompt = next((m.content for m in messages if m.type == "system"), "")
+        user_prompt = next((m.content for m in messages if m.type == "human"), "")
+        content = self._content(system_prompt, user_prompt)
+
+        # rough chars / 4 token counts so usage metrics have something to report
+        usage = {
+            "prompt_tokens": (len(system_prompt) + len(user_prompt)) // 4,
+            "completion_tokens": len(content) // 4,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return AIMessage(content=content, response_metadata={"token_usage": usage})
+
+    def invoke(self, messages) -> AIMessage:
+        time.sleep(self._latency())
+        return self._respond(messages)
+
+    async def ainvoke(self, messages) -> AIMessage:
+        await asyncio.sleep(self._latency())
+        return self._respond(messages)
+
+    def _chunks(self, message: AIMessage) -> List[AIMessageChunk]:
+        content = message.content
+        pieces = [content[i:i + _CHUNK_CHARS] for i in range(0, len(content), _CHUNK_CHARS)] or [""]
+        # usage arrives with the last chunk, as it does from providers that report it when streaming
+        return [
+            AIMessageChunk(content=piece, response_metadata=message.response_metadata if i == len(pieces) - 1 else {})
+            for i, piece in enumerate(pieces)
+        ]
+
+    def stream(self, messages) -> Iterator[AIMessageChunk]:
+        latency = self._latency()
+        time.sleep(latency / 2)
+        chunks = self._chunks(self._respond(messages))
+        for chunk in chunks:
+            time.sleep(latency / 2 / len(chunks))
+            yield chunk
+
+    async def astream(self, messages) -> AsyncIterator[AIMessageChunk]:
+        latency = self._latency()
+        await asyncio.sleep(latency / 2)
+        chunks = self._chunks(self._respond(messages))
+        for chunk in chunks:
+            await asyncio.sleep(latency / 2 / len(chunks))
+            yield chunk
@@ -1,45 +1,247 @@
+import asyncio
+from typing import Optional
+from uuid import UUID
 from sqlalchemy.orm import Session
 from app.db.models import Submission, SubmissionStatus
+from app.db.session import SessionLocal
+from app.schemas.submissions import LLMOutput
 from app.services.llm import llm_client
-from app.core.logging import get_logger
+from app.services.batching import ReviewBatcher
+from app.services.queue import release_lease, defer_submission
+from app.services.rate_limit import LLMUnavailableError
+from app.services.retries import schedule_retry
+from app.services.rollups import set_submission_status
+from app.services.events import notify_submission_finished, notify_submission_updated
+from app.core.config import settings
+from app.core.logging import get_logger, log_context, request_id_var, stage_timings, timed_stage
+from app.core.metrics import SUBMISSIONS_PROCESSED, SUBMISSION_PROCESSING_SECONDS, SUBMISSIONS_IN_FLIGHT
 
 logger = get_logger(__name__)
 
+# caps concurrent llm calls on the event loop, created lazily so it binds to the running loop
+_llm_semaphore: Optional[asyncio.Semaphore] = None
 
-def process_submission(submission_id: str, db: Session):
-    """processes a submission by calling llm and updating the database with results"""
-    logger.info(f"Processing submission {submission_id}")
-    
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """returns the shared semaphore that bounds in-flight llm calls"""
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+    return _llm_semaphore
+
+
+# groups concurrent async requests into multi-review calls when LLM_BATCH_SIZE > 1
+review_batcher = ReviewBatcher(
+    llm_client,
+    max_size=settings.LLM_BATCH_SIZE,
+    max_wait_ms=settings.LLM_BATCH_MAX_WAIT_MS,
+    limiter=get_llm_semaphore
+)
+
+
+def _apply_llm_output(db: Session, submission: Submission, llm_output: LLMOutput):
+    """copies the llm results onto the submission and marks it completed"""
+    # lock the row so a worker racing on an expired lease can't double count the transition
+    db.refresh(submission, with_for_update=True)
+    submission.user_ai_response = llm_output.user_ai_response
+    submission.admin_summary = llm_output.admin_summary
+    submission.recommended_actions = llm_output.recommended_actions
+    set_submission_status(db, submission, SubmissionStatus.COMPLETED)
+    submission.error_message = None
+    submission.next_retry_at = None
+    release_lease(submission)
+    notify_submission_finished(db, submission.id)
+
+
+def _save_user_response(submission_id: UUID, user_ai_response: Optional[str]):
+    """
+    Stores the user-facing reply while the rest of the llm output is still streaming,
+    so status readers see it before processing completes, or clears it (None) when the
+    llm client withdraws it. Only touches PENDING rows.
+    """
+    db = SessionLocal()
     try:
-        # fetch the submission from the database
-        submission = db.query(Submission).filter(Submission.id == submission_id).first()
-        if not submission:
-            logger.error(f"Submission {submission_id} not found")
-            return
-        
-        # call the llm to generate a response
-        llm_output = llm_client.generate(submission.review, submission.rating)
-        
-        # save the llm results to the submission
-        submission.user_ai_response = llm_output.user_ai_response
-        submission.admin_summary = llm_output.admin_summary
-        submission.recommended_actions = llm_output.recommended_actions
-        submission.status = SubmissionStatus.COMPLETED
-        submission.error_message = None
-        
+        updated = db.query(Submission).filter(
+            Submission.id == submission_id, Submission.status == SubmissionStatus.PENDING
+        ).update({Submission.user_ai_response: user_ai_response}, synchronize_session=False)
+        if updated:
+            notify_submission_updated(db, submission_id)
         db.commit()
-        logger.info(f"Successfully processed submission {submission_id}")
-        
     except Exception as e:
-        logger.error(f"Failed to process submission {submission_id}: {str(e)}")
-        
-        # mark submission as failed and record the error
+        # the final save stores the reply anyway, losing the early copy only delays it
+        logger.warning(f"Failed to store early user response: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+async def _save_user_response_after(previous: Optional[asyncio.Task], submission_id: UUID, user_ai_response: Optional[str]):
+    """_save_user_response on a worker thread, once the previous early save has finished"""
+    if previous is not None:
+        await previous
+    await asyncio.to_thread(_save_user_response, submission_id, user_ai_response)
+
+
+def _mark_failed(submission_id: UUID, error: Exception, db: Session):
+    """marks a submission as failed, records the error and schedules the automatic retry if it has attempts left"""
+    try:
+        # discard whatever the failed attempt left in the session
+        db.rollback()
+        submission = db.query(Submission).filter(Submission.id == submission_id).with_for_update().first()
+        if submission:
+            set_submission_status(db, submission, SubmissionStatus.FAILED)
+            submission.error_message = str(error)
+            # drop a reply stored early from a response that later failed validation
+            submission.user_ai_response = None
+            schedule_retry(submission)
+            release_lease(submission)
+            notify_submission_finished(db, submission.id)
+            db.commit()
+            SUBMISSIONS_PROCESSED.labels(outcome="failed").inc()
+    except Exception as db_error:
+        logger.error(f"Failed to update submission status: {str(db_error)}")
+        db.rollback()
+
+
+def _defer(submission_id: UUID, error: LLMUnavailableError, db: Session):
+    """puts a submission back in the queue because the provider can't take it right now"""
+    logger.warning(f"Deferring submission {submission_id} for {error.retry_after:.0f}s: {str(error)}")
+    try:
+        db.rollback()
+        submission = db.query(Submission).filter(Submission.id == submission_id).first()
+        if submission:
+            defer_submission(submission, error.retry_after)
+            if submission.user_ai_response is not None:
+                # the reply streamed early by this attempt, the next attempt writes its own
+                submission.user_ai_response = None
+                notify_submission_updated(db, submission.id)
+            db.commit()
+            SUBMISSIONS_PROCESSED.labels(outcome="deferred").inc()
+    except Exception as db_error:
+        logger.error(f"Failed to defer submission: {str(db_error)}")
+        db.rollback()
+
+
+def process_submission(submission_id: UUID, db: Session):
+    """processes a submission by calling llm and updating the database with results"""
+    with log_context(submission_id=submission_id), SUBMISSIONS_IN_FLIGHT.track_inprogress(), \
+            SUBMISSION_PROCESSING_SECONDS.time():
         try:
-            submission = db.query(Submission).filter(Submission.id == submission_id).first()
-            if submission:
-                submission.status = SubmissionStatus.FAILED
-                submission.error_message = str(e)
+            # fetch the submission from the database
+            with timed_stage("db"):
+                submission = db.query(Submission).filter(Submission.id == submission_id).first()
+            if not submission:
+                logger.error(f"Submission {submission_id} not found")
+                return
+
+            # join this submission's logs to the request that created it
+            request_id_var.set(submission.request_id)
+            logger.info(f"Processing submission {submission_id}")
+
+            # call the llm to generate a response
+            llm_output = llm_client.generate(
+                submission.review,
+                submission.rating,
+                on_user_response=lambda text: _save_user_response(submission_id, text)
+            )
+
+            # save the llm results to the submission
+            with timed_stage("db"):
+                _apply_llm_output(db, submission, llm_output)
                 db.commit()
-        except Exception as db_error:
-            logger.error(f"Failed to update submission status: {str(db_error)}")
-            db.rollback()
+            SUBMISSIONS_PROCESSED.labels(outcome="completed").inc()
+            logger.info(f"Successfully processed submission {submission_id}", extra={"stage_ms": stage_timings()})
+
+        except LLMUnavailableError as e:
+            # rate limited or circuit open - keep it PENDING instead of failing it
+            _defer(submission_id, e, db)
+
+        except Exception as e:
+            logger.error(f"Failed to process submission {submission_id}: {str(e)}", extra={"stage_ms": stage_timings()})
+
+            # mark submission as failed and record the error
+            _mark_failed(submission_id, e, db)
+
+
+def _load_submission_input(submission_id: UUID):
+    """reads the review, rating and originating request id of a submission, or None if it doesn't exist"""
+    db = SessionLocal()
+    try:
+        submission = db.query(Submission).filter(Submission.id == submission_id).first()
+        if not submission:
+            return None
+        return submission.review, submission.rating, submission.request_id
+    finally:
+        db.close()
+
+
+def _save_llm_output(submission_id: UUID, llm_output: LLMOutput):
+    """persists the llm results for a submission in its own short transaction"""
+    db = SessionLocal()
+    try:
+        submission = db.query(Submission).filter(Submission.id == submission_id).first()
+        if submission:
+            _apply_llm_output(db, submission, llm_output)
+            db.commit()
+    finally:
+        db.close()
+
+
+def _save_failure(submission_id: UUID, error: Exception):
+    """marks a submission as failed (or defers it if the provider is unavailable) using its own session"""
+    db = SessionLocal()
+    try:
+        if isinstance(error, LLMUnavailableError):
+            _defer(submission_id, error, db)
+        else:
+            _mark_failed(submission_id, error, db)
+    finally:
+        db.close()
+
+
+async def process_submission_async(submission_id: UUID, limiter: Optional[asyncio.Semaphore] = None):
+    """
+    Async version of process_submission.
+    The llm call is awaited on the event loop and bounded by the shared semaphore (or the
+    claiming lane's own `limiter`, which also skips batching), while the short database
+    reads/writes run on worker threads so no connection is held open for the duration of
+    the llm call.
+    """
+    with log_context(submission_id=submission_id), SUBMISSIONS_IN_FLIGHT.track_inprogress(), \
+            SUBMISSION_PROCESSING_SECONDS.time():
+        # the early reply is written in the background so the stream keeps being read
+        early_saves = []
+        try:
+            with timed_stage("db"):
+                loaded = await asyncio.to_thread(_load_submission_input, submission_id)
+            if not loaded:
+                logger.error(f"Submission {submission_id} not found")
+                return
+            review_text, rating, request_id = loaded
+            request_id_var.set(request_id)
+            logger.info(f"Processing submission {submission_id}")
+
+            def on_user_response(text: Optional[str]):
+                # saves run one after another, so a withdrawal can't land before the reply it withdraws
+                previous = early_saves[-1] if early_saves else None
+                early_saves.append(asyncio.create_task(_save_user_response_after(previous, submission_id, text)))
+
+            if review_batcher.max_size > 1 and limiter is None:
+                # the batcher takes the semaphore per provider call, not per waiting review
+                llm_output = await review_batcher.generate(str(submission_id), review_text, rating)
+            else:
+                async with limiter or get_llm_semaphore():
+                    llm_output = await llm_client.agenerate(review_text, rating, on_user_response)
+
+            with timed_stage("db"):
+                await asyncio.gather(*early_saves)
+                await asyncio.to_thread(_save_llm_output, submission_id, llm_output)
+            SUBMISSIONS_PROCESSED.labels(outcome="completed").inc()
+            logger.info(f"Successfully processed submission {submission_id}", extra={"stage_ms": stage_timings()})
+
+        except Exception as e:
+            if not isinstance(e, LLMUnavailableError):
+                logger.error(f"Failed to process submission {submission_id}: {str(e)}", extra={"stage_ms": stage_timings()})
+            # a deferred row stays PENDING, so a late early save would put the reply back after it's cleared
+            await asyncio.gather(*early_saves)
+            await asyncio.to_thread(_save_failure, submission_id, e)
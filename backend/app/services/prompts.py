@@ -1,3 +1,6 @@
+import hashlib
+
+
 def get_system_prompt():
     """System prompt for LLM to generate structured responses."""
     return """You are an AI assistant that analyzes customer reviews and ratings.
@@ -23,3 +26,155 @@ def get_user_prompt(rating: int, review_text: str):
 Review: {review_text}
 
 Generate a response following the specified JSON format."""
+
+
+def get_batch_system_prompt():
+    """System prompt for answering several reviews in a single LLM call."""
+    return """You are an AI assistant that analyzes customer reviews and ratings.
+
+You will receive several reviews, each identified by a submission_id.
+For EVERY review generate an object with exactly four fields:
+1. submission_id: The submission_id of the review, copied exactly
+2. user_ai_response: A helpful, empathetic response to the customer (2-3 sentences)
+3. admin_summary: A brief summary for admin dashboard (1-2 sentences)
+4. recommended_actions: A list of 1-3 concrete action items for the business
+
+You must respond with ONLY a valid JSON object in this exact format:
+{
+  "results": [
+    {
+      "submission_id": "string",
+      "user_ai_response": "string",
+      "admin_summary": "string",
+      "recommended_actions": ["action1", "action2"]
+    }
+  ]
+}
+
+Return one object per review in "results". Do not include any text before or after the JSON object."""
+
+
+def get_batch_user_prompt(items):
+    """Generate user prompt for a batch of (submission_id, rating, review_text) items."""
+    reviews = "\n\n".join(
+        f"""submission_id: {submission_id}
+Rating: {rating}/5
+Review: {review_text}"""
+        for submission_id, rating, review_text in items
+    )
+    return f"""{reviews}
+
+Generate a response for each review following the specified JSON format."""
+
+
+def get_repair_prompt(error: str):
+    """Follow-up prompt asking the LLM to fix a response that failed validation."""
+    return f"""Your previous response could not be used: {error}
+
+Reply again with ONLY the corrected JSON object containing exactly the fields user_ai_response (string), admin_summary (string) and recommended_actions (list of strings)."""
+
+
+# rating-prediction prompts from notebook/prompt.ipynb, compared offline by the evals harness (evals/run.py)
+
+def get_rating_prompt_v1(review_text: str):
+    """Simple direct rating prompt."""
+    return f"""Read this restaurant review and predict the star rating from 1 to 5.
+
+Review: {review_text}
+
+Think about:
+- What's the overall feeling? Happy, frustrated, mixed?
+- Would they go back?
+- Any strong words like "amazing" or "terrible"?
+
+Give me your answer as JSON:
+{{
+"predicted_stars": <number 1-5>,
+"explanation": "<why you chose this rating>"
+}}"""
+
+
+def get_rating_prompt_v2(review_text: str):
+    """Step-by-step rating prompt with a rubric."""
+    return f"""Let's figure out the star rating for this restaurant review. Think it through step by step.
+
+Review: {review_text}
+
+Walk through this:
+1. What's the overall vibe? Are they excited, disappointed, or somewhere in between?
+2. Do they mention specific good things or bad things?
+3. How strong is their language? Words like "great" and "love" mean something different than "okay" or "fine"
+4. Would they recommend this place to a friend?
+
+Based on your thinking, what rating makes sense?
+- 5 stars = Loved it, everything was great
+- 4 stars = Really good, would go back
+- 3 stars = It was okay, nothing special
+- 2 stars = Pretty disappointed, had problems
+- 1 star = Terrible experience, avoid this place
+
+Response as JSON:
+{{
+"predicted_stars": <number 1-5>,
+"explanation": "<your reasoning>"
+}}"""
+
+
+def get_rating_prompt_v3(review_text: str):
+    """Few-shot rating prompt with one example per star level."""
+    return f"""Here are some examples of how to rate restaurant reviews:
+
+Example 1:
+"The food was amazing! Service was perfect and the atmosphere was wonderful. Can't wait to go back!"
+5 stars (enthusiastic language, wants to return, no complaints)
+
+Example 2:
+"Good food and decent service. Nothing really stood out but we enjoyed ourselves. Would probably go back."
+4 stars (positive overall but not exceptional, would return)
+
+Example 3:
+"Food was okay. Service was slow but the server was nice. It's fine but nothing special."
+3 stars (lukewarm language like "okay" and "fine", mixed feelings)
+
+Example 4:
+"Disappointed with the quality. Food was cold and took forever. Probably won't return."
+2 stars (clear disappointment, won't return, specific complaints)
+
+Example 5:
+"Absolutely terrible. Rude staff, disgusting food, overpriced. Never going back and don't recommend it."
+1 star (strong negative words, multiple serious issues, warns others)
+
+Now rate this review using the same approach:
+
+Review: {review_text}
+
+What rating fits best? Consider:
+- The intensity of language (is it strong or mild?)
+- Whether they'd return
+- If there are specific complaints or praise
+- The overall tone
+
+Response as JSON:
+{{
+"predicted_stars": <number 1-5>,
+"explanation": "<your reasoning>"
+}}"""
+
+
+RATING_PROMPTS = {
+    "v1": get_rating_prompt_v1,
+    "v2": get_rating_prompt_v2,
+    "v3": get_rating_prompt_v3,
+}
+
+
+def get_prompt_version():
+    """Short hash of the prompt templates, changes whenever the prompts are edited."""
+    templates = "\n".join([
+        get_system_prompt(),
+        get_user_prompt(0, "{review}"),
+        get_batch_system_prompt(),
+        get_batch_user_prompt([("{submission_id}", 0, "{review}")]),
+        get_repair_prompt("{error}"),
+    ])
+    return hashlib.sha256(templates.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,318 @@
+import copy
+import json
+import random
+import threading
+from collections import deque
+from typing import AsyncIterator, Collection, Iterator, List, Optional
+import groq
+import httpx
+from langchain_groq import ChatGroq
+from langchain.schema import AIMessage
+from langchain_core.messages import AIMessageChunk
+from app.core.config import LLMProviderConfig, settings
+from app.core.logging import get_logger
+from app.services.mock_llm import MockChatModel
+from app.services.rate_limit import CircuitBreaker, CircuitOpenError, ProviderRateLimiter
+
+logger = get_logger(__name__)
+
+JSON_MODE = {"type": "json_object"}
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# successful call durations kept per provider for its latency quantiles
+LATENCY_WINDOW = 200
+# quantiles are only trusted once a provider has this many samples
+MIN_LATENCY_SAMPLES = 20
+# a failing provider keeps a sliver of traffic so its recovery is noticed
+MIN_HEALTH = 0.05
+
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+class ProviderHTTPError(Exception):
+    """non-2xx answer from an openai-compatible endpoint, shaped like the sdk errors for the retry logic"""
+
+    def __init__(self, response: httpx.Response):
+        self.status_code = response.status_code
+        self.response = response
+        super().__init__(f"Error code: {response.status_code} - {response.text[:200]}")
+
+
+class OpenAICompatibleChatModel:
+    """
+    Minimal chat model for any OpenAI-compatible /chat/completions api (OpenAI, vLLM,
+    Ollama, the benchmark mock server...) over httpx, exposing the same invoke, ainvoke,
+    stream, astream and bind methods the client uses on langchain models.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str,
+        timeout: float,
+        on_response=None,
+        aon_response=None,
+        temperature: float = 0.7
+    ):
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.model = model
+        self.temperature = temperature
+        self.response_format = None
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = httpx.Client(
+            headers=headers, timeout=timeout, event_hooks={"response": [on_response] if on_response else []}
+        )
+        self._async_client = httpx.AsyncClient(
+            headers=headers, timeout=timeout, event_hooks={"response": [aon_response] if aon_response else []}
+        )
+
+    def bind(self, response_format=None):
+        """same model with a response_format, e.g. json mode"""
+        bound = copy.copy(self)
+        bound.response_format = response_format
+        return bound
+
+    def _payload(self, messages, stream: bool = False) -> dict:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": _ROLES.get(m.type, "user"), "content": m.content} for m in messages],
+            "temperature": self.temperature,
+        }
+        if self.response_format:
+            payload["response_format"] = self.response_format
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _message(self, response: httpx.Response) -> AIMessage:
+        if response.status_code >= 400:
+            raise ProviderHTTPError(response)
+        data = response.json()
+        return AIMessage(
+            content=data["choices"][0]["message"].get("content") or "",
+            response_metadata={"token_usage": data.get("usage") or {}, "model_name": data.get("model")}
+        )
+
+    @staticmethod
+    def _chunk(line: str) -> Optional[AIMessageChunk]:
+        """turns one server-sent event line into a chunk, None for anything that isn't content"""
+        if not line.startswith("data:"):
+            return None
+        data = line[len("data:"):].strip()
+        if not data or data == "[DONE]":
+            return None
+        event = json.loads(data)
+        usage = event.get("usage") or (event.get("x_groq") or {}).get("usage")
+        content = event["choices"][0].get("delta", {}).get("content") if event.get("choices") else None
+        return AIMessageChunk(content=content or "", response_metadata={"token_usage": usage} if usage else {})
+
+    def invoke(self, messages) -> AIMessage:
+        return self._message(self._client.post(self.url, json=self._payload(messages)))
+
+    async def ainvoke(self, messages) -> AIMessage:
+        return self._message(await self._async_client.post(self.url, json=self._payload(messages)))
+
+    def stream(self, messages) -> Iterator[AIMessageChunk]:
+        with self._client.stream("POST", self.url, json=self._payload(messages, stream=True)) as response:
+            if response.status_code >= 400:
+                response.read()
+                raise ProviderHTTPError(response)
+            for line in response.iter_lines():
+                chunk = self._chunk(line)
+                if chunk is not None:
+                    yield chunk
+
+    async def astream(self, messages) -> AsyncIterator[AIMessageChunk]:
+        async with self._async_client.stream("POST", self.url, json=self._payload(messages, stream=True)) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise ProviderHTTPError(response)
+            async for line in response.aiter_lines():
+                chunk = self._chunk(line)
+                if chunk is not None:
+                    yield chunk
+
+
+class LLMProvider:
+    """one configured backend: its chat model plus its own rate limiter, circuit breaker and health stats"""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        model: str,
+        llm,
+        weight: float,
+        rate_limiter: ProviderRateLimiter,
+        circuit_breaker: CircuitBreaker
+    ):
+        self.name = name
+        self.kind = kind
+        self.model = model
+        self.llm = llm
+        # non-streamed calls ask for a json object, streamed calls rely on the incremental parser
+        self.json_llm = llm.bind(response_format=JSON_MODE) if settings.LLM_JSON_MODE else llm
+        self.weight = max(0.0, weight)
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._error_rate = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, error: bool):
+        """feeds one call's outcome into the latency window and the decaying error rate"""
+        with self._lock:
+            self._error_rate = self._error_rate * 0.9 + (0.1 if error else 0.0)
+            if not error:
+                self._latencies.append(seconds)
+
+    def health(self) -> float:
+        """1 for a provider whose recent calls succeeded, towards 0 as they fail"""
+        return 1.0 - self._error_rate
+
+    def available(self) -> bool:
+        return self.circuit_breaker.allows_requests()
+
+    def latency_quantile(self, quantile: float) -> Optional[float]:
+        """recent latency at `quantile` in seconds, None until there are enough samples"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(quantile * len(samples)))]
+
+    def hedge_delay(self) -> float:
+        """how long to wait for this provider before also asking another one"""
+        return self.latency_quantile(0.95) or settings.LLM_HEDGE_DELAY_MS / 1000
+
+
+def _groq_model(config: LLMProviderConfig, model: str, timeout: float, limiter: ProviderRateLimiter):
+    # retries are handled by the client (with backoff, failover and the rate limiter), not by the sdk.
+    # the http clients report every response's rate-limit headers to the limiter.
+    async def aon_response(response: httpx.Response):
+        limiter.update_from_headers(response.headers)
+
+    client_params = {
+        "api_key": config.api_key,
+        "base_url": config.base_url or None,
+        "timeout": timeout,
+        "max_retries": 0,
+    }
+    return ChatGroq(
+        model=model,
+        groq_api_key=config.api_key,
+        temperature=0.7,
+        timeout=timeout,
+        max_retries=0,
+        client=groq.Groq(
+            **client_params,
+            http_client=httpx.Client(event_hooks={"response": [lambda r: limiter.update_from_headers(r.headers)]})
+        ).chat.completions,
+        async_client=groq.AsyncGroq(
+            **client_params,
+            http_client=httpx.AsyncClient(event_hooks={"response": [aon_response]})
+        ).chat.completions
+    )
+
+
+def build_provider(config: LLMProviderConfig) -> LLMProvider:
+    """creates the chat model, rate limiter and circuit breaker for one configured backend"""
+    model = config.model or settings.LLM_MODEL
+    timeout = config.timeout_seconds or settings.LLM_TIMEOUT_SECONDS
+    # shared across every caller in the process so bursts queue up instead of all hitting 429s
+    limiter = ProviderRateLimiter(
+        settings.LLM_REQUESTS_PER_MINUTE if config.requests_per_minute is None else config.requests_per_minute,
+        settings.LLM_TOKENS_PER_MINUTE if config.tokens_per_minute is None else config.tokens_per_minute,
+        name=config.name
+    )
+    breaker = CircuitBreaker(settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_RESET_SECONDS, name=config.name)
+
+    if config.kind == "groq":
+        llm = _groq_model(config, model, timeout, limiter)
+    elif config.kind == "openai":
+        async def aon_response(response: httpx.Response):
+            limiter.update_from_headers(response.headers)
+
+        llm = OpenAICompatibleChatModel(
+            base_url=config.base_url or OPENAI_BASE_URL,
+            api_key=config.api_key,
+            model=model,
+            timeout=timeout,
+            on_response=lambda response: limiter.update_from_headers(response.headers),
+            aon_response=aon_response
+        )
+    elif config.kind == "mock":
+        llm = MockChatModel(
+            latency_ms=settings.MOCK_LLM_LATENCY_MS if config.latency_ms is None else config.latency_ms,
+            latency_jitter_ms=settings.MOCK_LLM_LATENCY_JITTER_MS,
+            failure_rate=settings.MOCK_LLM_FAILURE_RATE if config.failure_rate is None else config.failure_rate,
+            malformed_rate=settings.MOCK_LLM_MALFORMED_RATE if config.malformed_rate is None else config.malformed_rate
+        )
+    else:
+        raise ValueError(f"Unsupported LLM provider: {config.kind}")
+
+    return LLMProvider(config.name, config.kind, model, llm, config.weight, limiter, breaker)
+
+
+def provider_configs() -> List[LLMProviderConfig]:
+    """the LLM_PROVIDERS pool, or a single provider from LLM_PROVIDER, LLM_MODEL and LLM_BASE_URL"""
+    if settings.LLM_PROVIDERS:
+        return settings.LLM_PROVIDERS
+    return [LLMProviderConfig(
+        name=settings.LLM_PROVIDER,
+        kind=settings.LLM_PROVIDER,
+        model=settings.LLM_MODEL,
+        base_url=settings.LLM_BASE_URL,
+        api_key=settings.llm_api_key or ""
+    )]
+
+
+class LLMRouter:
+    """
+    Picks the provider for each call: a weighted random choice among providers whose
+    circuit breaker isn't open, with each weight scaled by the provider's recent success
+    rate so a degrading backend sheds traffic before its circuit opens.
+    """
+
+    def __init__(self, providers: List[LLMProvider]):
+        self.providers = providers
+
+    @classmethod
+    def from_settings(cls) -> "LLMRouter":
+        providers = []
+        for config in provider_configs():
+            try:
+                providers.append(build_provider(config))
+            except ValueError as e:
+                # keep the app up, calls fail with the same error until the config is fixed
+                logger.error(f"Skipping LLM provider {config.name}: {str(e)}")
+        return cls(providers)
+
+    def choose(self, exclude: Collection[str] = (), strict: bool = False) -> Optional[LLMProvider]:
+        """
+        Picks a provider, preferring ones not in `exclude` (those that already failed this request).
+        With strict=True returns None instead of falling back to an excluded provider.
+        Raises CircuitOpenError when every provider is cooling down.
+        """
+        if not self.providers:
+            raise ValueError("No usable LLM providers configured")
+
+        available = [provider for provider in self.providers if provider.available()]
+        candidates = [provider for provider in available if provider.name not in exclude]
+        if strict:
+            return self._weighted_choice(candidates) if candidates else None
+        if not candidates and not available:
+            raise CircuitOpenError(
+                "All LLM provider circuit breakers are open",
+                retry_after=min(provider.circuit_breaker.retry_after() for provider in self.providers)
+            )
+        return self._weighted_choice(candidates or available)
+
+    @staticmethod
+    def _weighted_choice(providers: List[LLMProvider]) -> LLMProvider:
+        weights = [provider.weight * max(MIN_HEALTH, provider.health()) for provider in providers]
+        if not any(weights):
+            # only standby (weight 0) providers are left
+            return random.choice(providers)
+        return random.choices(providers, weights=weights)[0]
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from typing import List, Optional
+from uuid import UUID
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from app.db.models import Submission, SubmissionStatus, utc_now
+from app.db.session import SessionLocal
+from app.core.config import settings, WorkerLaneConfig
+from app.core.logging import get_logger
+from app.core.metrics import SUBMISSION_QUEUE_WAIT_SECONDS
+from app.services.scheduling import STANDARD_LANE
+
+logger = get_logger(__name__)
+
+
+def max_attempts() -> int:
+    """processing attempts a submission gets before it stays FAILED"""
+    return max(1, settings.RETRY_MAX_ATTEMPTS)
+
+
+def _observe_wait(rows, now, lane: str):
+    """records how long first-time claims waited in the queue"""
+    for row in rows:
+        if row.attempts == 0:
+            SUBMISSION_QUEUE_WAIT_SECONDS.labels(lane=lane).observe(max(0.0, (now - row.created_at).total_seconds()))
+
+
+def claim_submissions(
+    db: Session,
+    worker_id: str,
+    limit: int,
+    lease_seconds: int,
+    lane: Optional[WorkerLaneConfig] = None
+) -> List[UUID]:
+    """
+    Claims up to `limit` pending submissions for a worker, in priority order (earliest
+    scheduled_at first), optionally only those a lane reserves capacity for.
+    Rows are locked with FOR UPDATE SKIP LOCKED so concurrent workers never claim the
+    same row, and a lease is written so rows held by a crashed worker become claimable
+    again once the lease expires. Each claim counts as an attempt; rows that have used
+    them all are left for the retry sweeper to fail.
+    """
+    if limit <= 0:
+        return []
+
+    now = utc_now()
+    query = (
+        db.query(Submission.id, Submission.created_at, Submission.attempts)
+        .filter(Submission.status == SubmissionStatus.PENDING)
+        .filter(or_(Submission.locked_until.is_(None), Submission.locked_until < now))
+        .filter(Submission.attempts < max_attempts())
+    )
+    if lane is not None and lane.max_rating < 5:
+        query = query.filter(Submission.rating <= lane.max_rating)
+    rows = (
+        query.order_by(Submission.scheduled_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    ids = [row.id for row in rows]
+
+    if ids:
+        db.query(Submission).filter(Submission.id.in_(ids)).update(
+            {
+                Submission.locked_by: worker_id,
+                Submission.locked_until: now + timedelta(seconds=lease_seconds),
+                Submission.attempts: Submission.attempts + 1,
+            },
+            synchronize_session=False
+        )
+
+    # commit even when nothing was claimed so the row locks are released
+    db.commit()
+    _observe_wait(rows, now, lane.name if lane else STANDARD_LANE)
+    return ids
+
+
+def release_lease(submission: Submission):
+    """clears the worker lease on a submission (caller commits)"""
+    submission.locked_by = None
+    submission.locked_until = None
+
+
+def defer_submission(submission: Submission, delay_seconds: float):
+    """returns a claimed submission to the queue, claimable again after `delay_seconds` (caller commits)"""
+    submission.locked_by = None
+    # the provider was unavailable, so this claim doesn't use up an attempt
+    submission.attempts = max(0, submission.attempts - 1)
+    submission.locked_until = utc_now() + timedelta(seconds=delay_seconds)
+
+
+class QueueMetricsCollector:
+    """prometheus collector that reads the queue depth and the oldest pending submission at scrape time"""
+
+    def describe(self):
+        # stops the registry from calling collect (and querying the database) at registration
+        return []
+
+    def collect(self):
+        depth = GaugeMetricFamily(
+            "submission_queue_depth", "PENDING submissions, split by whether a worker holds a lease", labels=["state"]
+        )
+        oldest_age = GaugeMetricFamily(
+            "submission_queue_oldest_age_seconds", "Age of the oldest PENDING submission"
+        )
+
+        db = SessionLocal()
+        try:
+            now = utc_now()
+            leased = Submission.locked_until > now
+            total, leased_count, oldest = db.query(
+                func.count(Submission.id),
+                func.count(Submission.id).filter(leased),
+                func.min(Submission.created_at)
+            ).filter(Submission.status == SubmissionStatus.PENDING).one()
+        except Exception as e:
+            logger.error(f"Failed to collect queue metrics: {str(e)}")
+            return
+        finally:
+            db.close()
+
+        depth.add_metric(["ready"], total - leased_count)
+        depth.add_metric(["leased"], leased_count)
+        yield depth
+
+        if oldest is not None:
+            oldest_age.add_metric([], max(0.0, (now - oldest).total_seconds()))
+        else:
+            oldest_age.add_metric([], 0.0)
+        yield oldest_age
@@ -0,0 +1,250 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# groq/openai style reset durations, e.g. "2m59.56s", "7.66s" or "120ms"
+_DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class LLMUnavailableError(Exception):
+    """the provider can't take requests right now, the work should be retried after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """raised instead of calling a provider while its circuit breaker is open"""
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """parses a rate-limit reset duration ("1m30s", "7.66s", "250ms" or plain seconds) into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """parses a Retry-After header given either as seconds or as an http date"""
+    if not value:
+        return None
+    seconds = parse_duration(value)
+    if seconds is not None:
+        return max(0.0, seconds)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float) -> float:
+    """exponential backoff with full jitter, so callers that failed together retry apart"""
+    return random.uniform(0, min(max_seconds, base_seconds * (2 ** attempt)))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at a steady per-minute rate.
+    reserve() always succeeds and may drive the balance negative: the returned wait is
+    the caller's place in line, so bursts are queued in arrival order instead of failing.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60
+        self.capacity = capacity or per_minute
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """takes `amount` from the bucket and returns how many seconds to wait before using it"""
+        with self._lock:
+            self._refill()
+            self._available -= min(amount, self.capacity)
+            if self._available >= 0:
+                return 0.0
+            return -self._available / self.rate
+
+    def try_reserve(self, amount: float) -> float:
+        """takes `amount` if the bucket has it and returns 0, otherwise takes nothing and returns the seconds until it will"""
+        with self._lock:
+            self._refill()
+            amount = min(amount, self.capacity)
+            if self._available >= amount:
+                self._available -= amount
+                return 0.0
+            return (amount - self._available) / self.rate
+
+    def limit_available(self, remaining: float):
+        """lowers the balance to what the provider reports as remaining"""
+        with self._lock:
+            self._refill()
+            self._available = min(self._available, remaining)
+
+
+class ProviderRateLimiter:
+    """
+    Shared requests-per-minute and tokens-per-minute limiter for one llm provider.
+    The local buckets are kept honest with the provider's rate-limit headers, and a
+    retry-after hint pauses every caller instead of letting each one hit a 429.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, name: str = "LLM"):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """reserves one request and `tokens` tokens, returning the wait in seconds"""
+        with self._lock:
+            wait = max(0.0, self._paused_until - time.monotonic())
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens: int):
+        """blocks until a request of `tokens` tokens may be sent"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int):
+        """async version of acquire"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """holds back every caller for `seconds`"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"{self.name} rate limit reached, pausing requests for {seconds:.1f}s")
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """syncs the limiter with x-ratelimit-* and retry-after response headers"""
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        if retry_after:
+            self.pause(retry_after)
+
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+
+            if bucket:
+                bucket.limit_available(remaining)
+            if remaining <= 0:
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if reset:
+                    self.pause(reset)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after `failure_threshold` consecutive failures.
+    After `reset_seconds` one probe request is let through; success closes the circuit
+    again, failure or a rate-limit answer re-opens it. Every probe has to end in one of
+    record_success, record_failure, record_throttled or release, or the circuit stays half open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, name: str = "LLM provider"):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def check(self):
+        """raises CircuitOpenError if a call may not be made right now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+
+            remaining = self._opened_at + self.reset_seconds - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                # let exactly one probe through
+                self.state = self.HALF_OPEN
+                return
+
+            raise CircuitOpenError(
+                f"{self.name} circuit breaker is open",
+                retry_after=max(remaining, 1.0)
+            )
+
+    def allows_requests(self) -> bool:
+        """whether check() would let a call through right now, without claiming the probe"""
+        with self._lock:
+            return self.state == self.CLOSED or (
+                self.state == self.OPEN and time.monotonic() >= self._opened_at + self.reset_seconds
+            )
+
+    def retry_after(self) -> float:
+        """seconds until the circuit lets a probe through"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            return max(self._opened_at + self.reset_seconds - time.monotonic(), 1.0)
+
+    def release(self):
+        """a call was cancelled before it finished, so a half-open circuit lets the next call probe"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_throttled(self):
+        """the provider is up but turned the call away (429), only a half-open probe counts it, by re-opening"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(f"{self.name} circuit breaker opened after {self._failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import re
+import threading
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import func
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import LLM_CACHE_LOOKUPS
+from app.db.models import LLMResponseCache, utc_now
+from app.db.session import SessionLocal
+from app.schemas.submissions import LLMOutput
+from app.services.prompts import get_prompt_version
+from app.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# trimming the persistent tier on every write would add a query per submission
+_DB_EVICTION_EVERY_N_WRITES = 100
+
+
+def normalize_review(review_text: str) -> str:
+    """normalizes review text so trivially different duplicates share a cache entry"""
+    return _WHITESPACE_RE.sub(" ", review_text).strip().casefold()
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of llm outputs.
+    Keys hash the normalized review, the rating, the model and the prompt version, so
+    editing a prompt or switching models never serves stale answers. Lookups hit the
+    in-process lru first and the optional database tier second.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.enabled = settings.LLM_CACHE_ENABLED
+        self.persistent = settings.LLM_CACHE_PERSISTENT
+        self.ttl_seconds = settings.LLM_CACHE_TTL_SECONDS
+        self.memory = TTLCache(settings.LLM_CACHE_MAX_ENTRIES, self.ttl_seconds)
+        # compaction changes what the llm sees, so a different token budget is a different prompt
+        self.prompt_version = f"{get_prompt_version()}:{settings.REVIEW_TOKEN_BUDGET}"
+
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def make_key(self, review_text: str, rating: int) -> str:
+        """builds the cache key for a review"""
+        raw = "\x1f".join([normalize_review(review_text), str(rating), self.model, self.prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, review_text: str, rating: int) -> Optional[LLMOutput]:
+        """returns a cached output for the review, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        key = self.make_key(review_text, rating)
+        output = self.memory.get(key)
+        if output is not None:
+            LLM_CACHE_LOOKUPS.labels(result="memory_hit").inc()
+            return output
+
+        if self.persistent:
+            output = self._db_get(key)
+            if output is not None:
+                self.memory.set(key, output)
+                LLM_CACHE_LOOKUPS.labels(result="db_hit").inc()
+                return output
+
+        LLM_CACHE_LOOKUPS.labels(result="miss").inc()
+        return None
+
+    def set(self, review_text: str, rating: int, output: LLMOutput):
+        """stores an output in every enabled tier"""
+        if not self.enabled:
+            return
+
+        key = self.make_key(review_text, rating)
+        self.memory.set(key, output)
+        if self.persistent:
+            self._db_set(key, output)
+
+    async def aget(self, review_text: str, rating: int) -> Optional[LLMOutput]:
+        """async version of get - the database tier is read on a worker thread"""
+        if not self.enabled:
+            return None
+        if not self.persistent:
+            return self.get(review_text, rating)
+        return await asyncio.to_thread(self.get, review_text, rating)
+
+    async def aset(self, review_text: str, rating: int, output: LLMOutput):
+        """async version of set - the database tier is written on a worker thread"""
+        if not self.enabled:
+            return
+        if not self.persistent:
+            self.set(review_text, rating, output)
+            return
+        await asyncio.to_thread(self.set, review_text, rating, output)
+
+    def _db_get(self, key: str) -> Optional[LLMOutput]:
+        """reads an unexpired entry from the database tier"""
+        db = SessionLocal()
+        try:
+            row = db.query(LLMResponseCache).filter(
+                LLMResponseCache.cache_key == key,
+                LLMResponseCache.expires_at > utc_now()
+            ).first()
+            return LLMOutput(**row.payload) if row else None
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {str(e)}")
+            return None
+        finally:
+            db.close()
+
+    def _db_set(self, key: str, output: LLMOutput):
+        """upserts an entry into the database tier and occasionally trims it"""
+        now = utc_now()
+        db = SessionLocal()
+        try:
+            db.merge(LLMResponseCache(
+                cache_key=key,
+                model=self.model,
+                payload=output.model_dump(),
+                created_at=now,
+                expires_at=now + timedelta(seconds=self.ttl_seconds)
+            ))
+            db.commit()
+
+            with self._lock:
+                self._writes += 1
+                should_evict = self._writes % _DB_EVICTION_EVERY_N_WRITES == 0
+            if should_evict:
+                self._db_evict(db)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _db_evict(self, db):
+        """deletes expired rows, then the oldest rows beyond LLM_CACHE_DB_MAX_ROWS"""
+        db.query(LLMResponseCache).filter(
+            LLMResponseCache.expires_at <= utc_now()
+        ).delete(synchronize_session=False)
+
+        overflow = db.query(func.count(LLMResponseCache.cache_key)).scalar() - settings.LLM_CACHE_DB_MAX_ROWS
+        if overflow > 0:
+            oldest = (
+                db.query(LLMResponseCache.cache_key)
+                .order_by(LLMResponseCache.created_at)
+                .limit(overflow)
+                .subquery()
+            )
+            db.query(LLMResponseCache).filter(
+                LLMResponseCache.cache_key.in_(oldest.select())
+            ).delete(synchronize_session=False)
+
+        db.commit()
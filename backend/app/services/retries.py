@@ -0,0 +1,132 @@
+from datetime import timedelta
+from typing import List, Optional
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+from app.db.models import Submission, SubmissionStatus, utc_now
+from app.services.events import notify_submissions_updated
+from app.services.queue import max_attempts, release_lease
+from app.services.rollups import set_submissions_status
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import SUBMISSIONS_PROCESSED, SUBMISSIONS_REQUEUED
+
+logger = get_logger(__name__)
+
+
+def retry_delay(attempts: int) -> float:
+    """seconds before the automatic retry of a submission that has failed `attempts` times"""
+    return min(
+        settings.RETRY_BACKOFF_MAX_SECONDS,
+        settings.RETRY_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    )
+
+
+def schedule_retry(submission: Submission):
+    """
+    Sets when a submission that just failed is tried again, or clears the schedule
+    once it has used up RETRY_MAX_ATTEMPTS and should stay FAILED (caller commits).
+    """
+    if submission.attempts < max_attempts():
+        submission.next_retry_at = utc_now() + timedelta(seconds=retry_delay(submission.attempts))
+    else:
+        submission.next_retry_at = None
+
+
+def requeue(db: Session, submissions: List[Submission], reason: str, reset_attempts: bool = False):
+    """moves submissions back to PENDING with no lease, retry schedule or previous reply (caller commits)"""
+    if not submissions:
+        return
+    set_submissions_status(db, submissions, SubmissionStatus.PENDING)
+    for submission in submissions:
+        submission.next_retry_at = None
+        # a PENDING row only shows a reply streamed by its current attempt
+        submission.user_ai_response = None
+        if reset_attempts:
+            submission.attempts = 0
+        release_lease(submission)
+    # the detail cache may hold the FAILED or COMPLETED version
+    notify_submissions_updated(db, [submission.id for submission in submissions])
+    SUBMISSIONS_REQUEUED.labels(reason=reason).inc(len(submissions))
+
+
+def _abandon(db: Session, submissions: List[Submission]):
+    """fails PENDING submissions that a worker lost too many times, e.g. ones that crash it (caller commits)"""
+    set_submissions_status(db, submissions, SubmissionStatus.FAILED)
+    for submission in submissions:
+        submission.error_message = f"Abandoned after {submission.attempts} processing attempts"
+        submission.user_ai_response = None
+        submission.next_retry_at = None
+        release_lease(submission)
+    notify_submissions_updated(db, [submission.id for submission in submissions])
+    SUBMISSIONS_PROCESSED.labels(outcome="abandoned").inc(len(submissions))
+
+
+def sweep_submissions(db: Session, batch_size: Optional[int] = None) -> dict:
+    """
+    One reprocessing pass, safe to run from every worker at once (rows are locked with
+    SKIP LOCKED):
+    - FAILED submissions whose next_retry_at has passed go back to PENDING
+    - PENDING submissions whose worker lease expired (the worker crashed or was killed)
+      are released for the next claim, or failed once they are out of attempts
+    """
+    batch_size = batch_size or settings.RETRY_SWEEP_BATCH_SIZE
+    now = utc_now()
+
+    due = (
+        db.query(Submission)
+        .filter(Submission.status == SubmissionStatus.FAILED, Submission.next_retry_at <= now)
+        .order_by(Submission.next_retry_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    requeue(db, due, "retry")
+
+    # deferred rows also have a lease time but no owner, they are waiting on purpose
+    stale = (
+        db.query(Submission)
+        .filter(
+            Submission.status == SubmissionStatus.PENDING,
+            Submission.locked_by.isnot(None),
+            Submission.locked_until < now
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    exhausted = [submission for submission in stale if submission.attempts >= max_attempts()]
+    released = [submission for submission in stale if submission.attempts < max_attempts()]
+    for submission in released:
+        release_lease(submission)
+    # the crashed attempt may have streamed a reply early, the retry writes its own
+    replied = [submission for submission in released if submission.user_ai_response is not None]
+    for submission in replied:
+        submission.user_ai_response = None
+    notify_submissions_updated(db, [submission.id for submission in replied])
+    if released:
+        SUBMISSIONS_REQUEUED.labels(reason="expired_lease").inc(len(released))
+    if exhausted:
+        _abandon(db, exhausted)
+
+    db.commit()
+
+    counts = {"retried": len(due), "released": len(released), "abandoned": len(exhausted)}
+    if any(counts.values()):
+        logger.info(
+            f"Retry sweep requeued {counts['retried']} failed, released {counts['released']} "
+            f"and abandoned {counts['abandoned']} stale submissions"
+        )
+    return counts
+
+
+def requeue_matching(db: Session, statement: Select, limit: int) -> int:
+    """
+    Requeues up to `limit` submissions matching a filtered select of Submission, oldest
+    first, with their attempt count reset (sync, run through AsyncSession.run_sync).
+    """
+    submissions = db.scalars(
+        statement.order_by(Submission.created_at).limit(limit).with_for_update(skip_locked=True)
+    ).all()
+    requeue(db, list(submissions), "admin", reset_attempts=True)
+    return len(submissions)
+
@@ -0,0 +1,158 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.db.models import Submission, SubmissionRollup, SubmissionStatus
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+RollupKey = Tuple[date, int, SubmissionStatus]
+
+
+def _day(created_at: datetime) -> date:
+    return created_at.date()
+
+
+def apply_rollup_deltas(db: Session, deltas: Dict[RollupKey, int]):
+    """adds each delta to its (day, rating, status) counter in the caller's transaction"""
+    table = SubmissionRollup.__table__
+    dialect = db.get_bind().dialect.name
+
+    for (day, rating, status), delta in deltas.items():
+        if delta == 0:
+            continue
+        values = {"day": day, "rating": rating, "status": status, "count": delta}
+
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(table).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["day", "rating", "status"],
+                set_={"count": table.c.count + stmt.excluded.count}
+            )
+            db.execute(stmt)
+            continue
+
+        # generic fallback for databases without an upsert
+        updated = db.query(SubmissionRollup).filter_by(day=day, rating=rating, status=status).update(
+            {SubmissionRollup.count: SubmissionRollup.count + delta}, synchronize_session=False
+        )
+        if not updated:
+            db.add(SubmissionRollup(**values))
+
+
+def record_submissions_created(db: Session, submissions: Iterable[Submission]):
+    """counts newly inserted submissions, or rows with created_at/rating/status (they must be flushed so created_at is set)"""
+    deltas = Counter((_day(sub.created_at), sub.rating, sub.status) for sub in submissions)
+    apply_rollup_deltas(db, deltas)
+
+
+def set_submission_status(db: Session, submission: Submission, status: SubmissionStatus):
+    """changes a submission's status and moves it between rollup counters in the same transaction"""
+    old_status = submission.status
+    submission.status = status
+    if old_status == status:
+        return
+
+    day = _day(submission.created_at)
+    apply_rollup_deltas(db, {
+        (day, submission.rating, old_status): -1,
+        (day, submission.rating, status): 1,
+    })
+
+
+def set_submissions_status(db: Session, submissions: Iterable[Submission], status: SubmissionStatus):
+    """bulk version of set_submission_status, one upsert per affected counter instead of per row"""
+    deltas: Counter = Counter()
+    for submission in submissions:
+        if submission.status == status:
+            continue
+        day = _day(submission.created_at)
+        deltas[(day, submission.rating, submission.status)] -= 1
+        deltas[(day, submission.rating, status)] += 1
+        submission.status = status
+    apply_rollup_deltas(db, deltas)
+
+
+def rebuild_rollups(db: Session):
+    """recomputes every rollup row from the submissions table (one full scan)"""
+    counts: Counter = Counter()
+    rows = db.query(Submission.created_at, Submission.rating, Submission.status).yield_per(5000)
+    for created_at, rating, status in rows:
+        counts[(_day(created_at), rating, status)] += 1
+
+    db.query(SubmissionRollup).delete(synchronize_session=False)
+    db.add_all(
+        SubmissionRollup(day=day, rating=rating, status=status, count=count)
+        for (day, rating, status), count in counts.items()
+    )
+    db.commit()
+    logger.info(f"Rebuilt {len(counts)} analytics rollup rows")
+
+
+def ensure_rollups_backfilled(db: Session):
+    """builds the rollups once for databases that had submissions before the rollup table existed"""
+    try:
+        if db.query(SubmissionRollup.day).first() is None and db.query(Submission.id).first() is not None:
+            rebuild_rollups(db)
+    except Exception as e:
+        # another replica may be backfilling at the same time
+        logger.warning(f"Analytics rollup backfill skipped: {str(e)}")
+        db.rollback()
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """returns the first day of the day/week/month bucket containing `day`"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def read_rollups(db: Session, start: Optional[date], end: Optional[date]) -> List[SubmissionRollup]:
+    """loads the rollup rows within an inclusive date range"""
+    query = db.query(SubmissionRollup).filter(SubmissionRollup.count != 0)
+    if start:
+        query = query.filter(SubmissionRollup.day >= start)
+    if end:
+        query = query.filter(SubmissionRollup.day <= end)
+    return query.all()
+
+
+def summarize_rollups(rows: List[SubmissionRollup], bucket: str) -> dict:
+    """aggregates rollup rows into rating/status totals and a per-bucket series"""
+    counts_by_rating: Counter = Counter()
+    counts_by_status: Counter = Counter()
+    per_bucket: Counter = Counter()
+
+    for row in rows:
+        counts_by_rating[row.rating] += row.count
+        counts_by_status[row.status.value] += row.count
+        per_bucket[bucket_start(row.day, bucket)] += row.count
+
+    return {
+        "counts_by_rating": {rating: count for rating, count in counts_by_rating.items() if count},
+        "counts_by_status": {status: count for status, count in counts_by_status.items() if count},
+        "series": [
+            {"date": str(day), "count": count}
+            for day, count in sorted(per_bucket.items()) if count
+        ],
+    }
+
+
+def total_rollup_counts(db: Session) -> Tuple[Dict[int, int], Dict[str, int]]:
+    """all-time counts by rating and by status, summed from the rollup table"""
+    by_rating = db.query(SubmissionRollup.rating, func.sum(SubmissionRollup.count)).group_by(
+        SubmissionRollup.rating
+    ).all()
+    by_status = db.query(SubmissionRollup.status, func.sum(SubmissionRollup.count)).group_by(
+        SubmissionRollup.status
+    ).all()
+    return (
+        {rating: int(count) for rating, count in by_rating if count},
+        {status.value: int(count) for status, count in by_status if count},
+    )
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from app.core.config import settings, WorkerLaneConfig
+
+# reviews this long or longer get the full length boost
+_FULL_LENGTH_CHARS = 1000
+
+# the main pool, takes every submission once the reserved lanes have claimed theirs
+STANDARD_LANE = "standard"
+
+
+def priority_boost_seconds(rating: int, review_text: str) -> float:
+    """
+    How far ahead of its arrival time a submission is queued. Low ratings and long reviews
+    (detailed complaints) move up, and the boost is capped by PRIORITY_MAX_BOOST_SECONDS so
+    age always wins in the end: nothing waits behind a submission created more than the cap
+    after it, however the weights are set.
+    """
+    boost = (
+        settings.PRIORITY_RATING_WEIGHT_SECONDS * (5 - rating)
+        + settings.PRIORITY_LENGTH_WEIGHT_SECONDS * min(1.0, len(review_text) / _FULL_LENGTH_CHARS)
+    )
+    return min(max(boost, 0.0), max(settings.PRIORITY_MAX_BOOST_SECONDS, 0.0))
+
+
+def schedule_time(created_at: datetime, rating: int, review_text: str) -> datetime:
+    """the queue position of a submission: workers claim the earliest scheduled_at first"""
+    return created_at - timedelta(seconds=priority_boost_seconds(rating, review_text))
+
+
+def worker_lanes(concurrency: Optional[int] = None) -> List[WorkerLaneConfig]:
+    """the configured WORKER_LANES in claim order, followed by the standard lane that takes any rating"""
+    standard = WorkerLaneConfig(
+        name=STANDARD_LANE, max_rating=5, concurrency=max(1, concurrency or settings.WORKER_CONCURRENCY)
+    )
+    return sorted(settings.WORKER_LANES, key=lambda lane: lane.max_rating) + [standard]
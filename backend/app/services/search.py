@@ -0,0 +1,76 @@
+import html
+import re
+from typing import Optional, Tuple
+from sqlalchemy import Select, func, literal_column, or_
+from sqlalchemy.orm import Session
+from app.db.models import Submission
+
+# stored generated column added by the postgres migrations (not mapped on the model
+# so that sqlite test databases can still create the table)
+REVIEW_TSV = literal_column("submissions.review_tsv")
+
+# inlined with an explicit cast so the driver never sends it as an untyped text parameter
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+SNIPPET_START = "<mark>"
+SNIPPET_STOP = "</mark>"
+SNIPPET_CONTEXT_CHARS = 80
+
+
+def supports_full_text(db: Session) -> bool:
+    """full-text ranking and highlighting need postgres"""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def filter_review_search(db: Session, query: Select, q: str) -> Select:
+    """
+    Restricts a submissions select to reviews matching `q`.
+    On postgres a row matches when its tsvector matches the web-search query (GIN index)
+    or when `q` is a substring of the review (pg_trgm GIN index), so partially typed
+    words still match. Other databases fall back to a plain ILIKE.
+    """
+    substring = Submission.review.ilike(f"%{q}%")
+    if not supports_full_text(db):
+        return query.filter(substring)
+
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    return query.filter(or_(REVIEW_TSV.op("@@")(tsquery), substring))
+
+
+def search_columns(db: Session, q: str) -> Optional[Tuple]:
+    """returns (rank, snippet) sql expressions for postgres, or None when unsupported"""
+    if not supports_full_text(db):
+        return None
+
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(REVIEW_TSV, tsquery)
+
+    # escape the review before highlighting so the snippet is safe to render as html
+    escaped_review = func.replace(
+        func.replace(func.replace(Submission.review, "&", "&amp;"), "<", "&lt;"), ">", "&gt;"
+    )
+    snippet = func.ts_headline(
+        SEARCH_CONFIG,
+        escaped_review,
+        tsquery,
+        f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MaxWords=35, MinWords=15, MaxFragments=2"
+    )
+    return rank.label("rank"), snippet.label("snippet")
+
+
+def build_snippet(review: str, q: str) -> str:
+    """python fallback for ts_headline: html-escaped window around the first match of `q`"""
+    match = re.search(re.escape(q), review, flags=re.IGNORECASE)
+    if not match:
+        return html.escape(review[:2 * SNIPPET_CONTEXT_CHARS])
+
+    start = max(0, match.start() - SNIPPET_CONTEXT_CHARS)
+    end = min(len(review), match.end() + SNIPPET_CONTEXT_CHARS)
+    return "".join([
+        "..." if start > 0 else "",
+        html.escape(review[start:match.start()]),
+        SNIPPET_START,
+        html.escape(match.group(0)),
+        SNIPPET_STOP,
+        html.escape(review[match.end():end]),
+        "..." if end < len(review) else "",
+    ])
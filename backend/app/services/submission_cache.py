@@ -0,0 +1,178 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+_REDIS_KEY_PREFIX = "submission-detail:"
+# bumped on every invalidation, so a read that started before it can't write back its stale payload
+_REDIS_GENERATION_PREFIX = "submission-generation:"
+
+# writes the payload only when the generation is still the one the reader saw before its query
+_SET_IF_CURRENT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+# cached entries are (json payload, etag)
+CachedDetail = Tuple[str, str]
+
+
+def make_etag(payload: str) -> str:
+    """strong etag for a serialized submission detail"""
+    return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+@dataclass(eq=False)
+class CacheRead:
+    """a read-through in progress, from before the database query until the payload is cached"""
+    submission_id: str
+    # the shared tier's generation when the read started
+    generation: str = "0"
+    # set when the submission was invalidated during the read
+    stale: bool = False
+
+
+def _load_redis_module():
+    """redis is optional, only needed for the shared tier"""
+    try:
+        import redis
+        return redis
+    except ImportError:
+        logger.warning("SUBMISSION_CACHE_REDIS_URL is set but the redis package isn't installed, using the local cache only")
+        return None
+
+
+class SubmissionCache:
+    """
+    Read-through cache of SubmissionDetail payloads for COMPLETED and FAILED submissions,
+    which don't change unless they are reprocessed. Lookups hit the in-process lru first
+    and the optional shared redis tier second, so repeated reads never reach the database.
+    A miss is filled between begin_read() and set(); an invalidation in between (a requeue
+    committing while the row was being read) makes set() skip caching the old payload.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, redis_url: str = ""):
+        self.ttl_seconds = ttl_seconds
+        self.local = TTLCache(max_entries, ttl_seconds)
+        self._redis_url = redis_url
+        self._redis = None
+        self._async_redis = None
+        # reads in progress per submission id, guarded by _lock (invalidations come from worker threads)
+        self._reads: Dict[str, Set[CacheRead]] = {}
+        self._lock = threading.Lock()
+
+        if redis_url:
+            module = _load_redis_module()
+            if module:
+                self._redis = module.Redis.from_url(redis_url)
+                self._async_redis = module.asyncio.Redis.from_url(redis_url)
+
+    async def get(self, submission_id: str) -> Optional[CachedDetail]:
+        """returns the cached payload and etag, or None on a miss"""
+        entry = self.local.get(submission_id)
+        if entry is not None:
+            return entry
+
+        if self._async_redis is not None:
+            try:
+                payload = await self._async_redis.get(_REDIS_KEY_PREFIX + submission_id)
+            except Exception as e:
+                logger.warning(f"Submission cache read failed: {str(e)}")
+                payload = None
+            if payload is not None:
+                entry = (payload.decode("utf-8"), make_etag(payload.decode("utf-8")))
+                self.local.set(submission_id, entry)
+                return entry
+
+        return None
+
+    async def begin_read(self, submission_id: str) -> CacheRead:
+        """starts a read-through, call it before querying the database and end_read() afterwards"""
+        read = CacheRead(submission_id)
+        with self._lock:
+            self._reads.setdefault(submission_id, set()).add(read)
+
+        if self._async_redis is not None:
+            try:
+                generation = await self._async_redis.get(_REDIS_GENERATION_PREFIX + submission_id)
+                read.generation = generation.decode("utf-8") if generation else "0"
+            except Exception as e:
+                logger.warning(f"Submission cache read failed: {str(e)}")
+                # without the generation the write can't be checked, so skip it
+                read.stale = True
+        return read
+
+    def end_read(self, read: CacheRead):
+        with self._lock:
+            reads = self._reads.get(read.submission_id)
+            if reads is not None:
+                reads.discard(read)
+                if not reads:
+                    del self._reads[read.submission_id]
+
+    async def set(self, read: CacheRead, payload: str) -> CachedDetail:
+        """
+        stores a terminal submission's payload in every tier, unless the submission was
+        invalidated since begin_read(). the entry is returned either way for the response.
+        """
+        entry = (payload, make_etag(payload))
+        if read.stale:
+            return entry
+
+        if self._async_redis is not None:
+            try:
+                stored = await self._async_redis.eval(
+                    _SET_IF_CURRENT, 2, _REDIS_KEY_PREFIX + read.submission_id,
+                    _REDIS_GENERATION_PREFIX + read.submission_id, read.generation, payload, self.ttl_seconds
+                )
+            except Exception as e:
+                logger.warning(f"Submission cache write failed: {str(e)}")
+                stored = 1
+            if not stored:
+                # another process invalidated it during the read
+                return entry
+
+        with self._lock:
+            # checked under the lock so an invalidation can't land between the check and the write
+            if not read.stale:
+                self.local.set(read.submission_id, entry)
+        return entry
+
+    def invalidate_local(self, submission_id: str):
+        """drops the in-process entry (called for status events from other processes)"""
+        submission_id = str(submission_id)
+        with self._lock:
+            for read in self._reads.get(submission_id, ()):
+                read.stale = True
+            self.local.delete(submission_id)
+
+    def invalidate(self, submission_id):
+        """drops a submission from every tier after its status changed (sync, safe from worker threads)"""
+        submission_id = str(submission_id)
+        self.invalidate_local(submission_id)
+
+        if self._redis is not None:
+            try:
+                pipeline = self._redis.pipeline()
+                pipeline.delete(_REDIS_KEY_PREFIX + submission_id)
+                pipeline.incr(_REDIS_GENERATION_PREFIX + submission_id)
+                pipeline.expire(_REDIS_GENERATION_PREFIX + submission_id, self.ttl_seconds)
+                pipeline.execute()
+            except Exception as e:
+                logger.warning(f"Submission cache invalidation failed: {str(e)}")
+
+
+# global submission cache instance
+submission_cache = SubmissionCache(
+    settings.SUBMISSION_CACHE_MAX_ENTRIES,
+    settings.SUBMISSION_CACHE_TTL_SECONDS,
+    settings.SUBMISSION_CACHE_REDIS_URL
+)
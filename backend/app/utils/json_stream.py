@@ -0,0 +1,139 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class IncrementalJSONParser:
+    """
+    Parses one json object out of a stream of text chunks.
+    feed() returns the top-level members whose values completed in that chunk, so callers
+    can use (and validate) early fields while later ones are still being generated.
+    `complete` turns true at the object's closing brace, after which the rest of the
+    stream can be dropped. Text before the opening brace (e.g. "Here is the JSON:") is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.start: Optional[int] = None  # index of the opening brace
+        self.end: Optional[int] = None  # index just past the closing brace
+        self.error: Optional[str] = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # position inside the top-level object: "key", "colon", "value" or "comma"
+        self._expect = "key"
+        self._key: Optional[str] = None
+        self._token_start: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    @property
+    def done(self) -> bool:
+        """nothing more to read, either the object closed or the stream isn't valid json"""
+        return self.complete or self.error is not None
+
+    def value(self) -> Any:
+        """the parsed object, only valid once complete"""
+        return json.loads(self.buffer[self.start:self.end])
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        fields = []
+        while self._pos < len(self.buffer) and not self.done:
+            index = self._pos
+            char = self.buffer[index]
+            self._pos += 1
+
+            if self.start is None:
+                if char == "{":
+                    self.start = index
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._close_string(index, fields)
+                continue
+
+            if char.isspace():
+                continue
+
+            if self._depth == 1:
+                self._top_level(char, index, fields)
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    # a nested object or array value just closed
+                    self._emit(index + 1, fields)
+        return fields
+
+    def _close_string(self, index: int, fields: list):
+        if self._expect == "key":
+            self._key = self._load(self._token_start, index + 1)
+            self._expect = "colon"
+        elif self._expect == "value":
+            self._emit(index + 1, fields)
+
+    def _top_level(self, char: str, index: int, fields: list):
+        if self._expect == "key":
+            if char == '"':
+                self._in_string = True
+                self._token_start = index
+            elif char == "}":
+                self._close(index)
+            else:
+                self.error = f"expected a key at position {index}"
+        elif self._expect == "colon":
+            if char == ":":
+                self._expect = "value"
+                self._token_start = None
+            else:
+                self.error = f"expected ':' at position {index}"
+        elif self._expect == "value":
+            if self._token_start is None:
+                self._token_start = index
+                if char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._depth += 1
+            elif char in ",}":
+                # end of a number, true, false or null
+                self._emit(index, fields)
+                if self.error is None:
+                    self._top_level(char, index, fields)
+        elif self._expect == "comma":
+            if char == ",":
+                self._expect = "key"
+            elif char == "}":
+                self._close(index)
+            else:
+                self.error = f"expected ',' or '}}' at position {index}"
+
+    def _emit(self, stop: int, fields: list):
+        value = self._load(self._token_start, stop)
+        if self.error is None:
+            fields.append((self._key, value))
+            self._expect = "comma"
+
+    def _close(self, index: int):
+        self._depth = 0
+        self.end = index + 1
+
+    def _load(self, start: int, stop: int) -> Any:
+        try:
+            return json.loads(self.buffer[start:stop])
+        except json.JSONDecodeError as e:
+            self.error = str(e)
+            return None
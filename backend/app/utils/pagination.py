@@ -1,5 +1,11 @@
-from typing import TypeVar, Generic, List
+import base64
+import json
+from datetime import date, datetime
+from typing import TypeVar, Generic, List, Any, Callable, Optional, Sequence, Tuple
+from uuid import UUID
 from pydantic import BaseModel
+from sqlalchemy import Select, func, select, tuple_, text
+from sqlalchemy.orm import Session
 
 T = TypeVar('T')
 
@@ -8,7 +14,7 @@ class PaginationParams(BaseModel):
     """Pagination parameters."""
     limit: int = 20
     offset: int = 0
-    
+
     def validate_limits(self):
         """Ensure pagination parameters are within acceptable ranges."""
         if self.limit > 100:
@@ -17,3 +23,81 @@ class PaginationParams(BaseModel):
             self.limit = 1
         if self.offset < 0:
             self.offset = 0
+
+
+def _to_cursor_value(value: Any):
+    """converts a key value to something json can carry"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """encodes the sort-key values of the last row into an opaque url-safe cursor"""
+    raw = json.dumps([_to_cursor_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[Any], Any]]) -> list:
+    """
+    Decodes a cursor produced by encode_cursor.
+    `parsers` turn each json value back into the column's python type.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("cursor has the wrong number of keys")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"malformed cursor: {str(e)}")
+
+
+def keyset_statement(statement: Select, keys: Sequence[Any], limit: int, after: Optional[list]) -> Select:
+    """
+    Builds the query for one page ordered by `keys` descending, starting after the `after`
+    key values. The last key must be unique (e.g. the primary key) so the ordering is total.
+    One extra row is fetched so keyset_page can tell whether another page exists.
+    """
+    if after is not None:
+        statement = statement.filter(tuple_(*keys) < tuple_(*after))
+    return statement.order_by(*[key.desc() for key in keys]).limit(limit + 1)
+
+
+def keyset_page(rows: list, limit: int, key_values: Callable[[Any], Sequence[Any]]) -> Tuple[list, Optional[str]]:
+    """trims the rows fetched by keyset_statement and returns them with the next cursor (None on the last page)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key_values(rows[-1]))
+
+
+def count_statement(statement: Select) -> Select:
+    """wraps a query in an exact count(*)"""
+    return select(func.count()).select_from(statement.order_by(None).subquery())
+
+
+def estimate_count(db: Session, statement: Select) -> int:
+    """
+    Returns the planner's row estimate for a query instead of running count(*).
+    Only postgres exposes this; other databases fall back to an exact count.
+    Takes a sync session - from async code call it through AsyncSession.run_sync.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return db.scalar(count_statement(statement))
+
+    compiled = statement.order_by(None).compile(
+        dialect=db.get_bind().dialect,
+        compile_kwargs={"literal_binds": True}
+    )
+    # escape colons so literal values aren't mistaken for bind parameters
+    sql = str(compiled).replace(":", "\\:")
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,299 @@
+"""
+Submission processing worker.
+
+Claims PENDING submissions from the database queue and runs them through the llm.
+Run it as its own process so the api and the llm workers can be scaled separately:
+
+    python -m app.worker
+"""
+import asyncio
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from uuid import UUID
+from prometheus_client import start_http_server
+from app.core.config import settings, WorkerLaneConfig
+from app.core.logging import setup_logging, get_logger
+from app.db.session import SessionLocal, engine
+from app.db.migrations import init_db
+from app.services.processing import process_submission, process_submission_async
+from app.services.queue import claim_submissions
+from app.services.retries import sweep_submissions
+from app.services.scheduling import STANDARD_LANE, worker_lanes
+
+logger = get_logger(__name__)
+
+
+def _claim_batch(worker_id: str, limit: int, lease_seconds: int, lane: Optional[WorkerLaneConfig] = None):
+    """claims a batch of pending submissions for a lane in its own short transaction"""
+    db = SessionLocal()
+    try:
+        return claim_submissions(db, worker_id, limit, lease_seconds, lane)
+    finally:
+        db.close()
+
+
+def _sweep():
+    """requeues due retries and releases expired leases in its own short transaction"""
+    db = SessionLocal()
+    try:
+        return sweep_submissions(db)
+    finally:
+        db.close()
+
+
+class RetrySweepTimer:
+    """tells a worker's poll loop when the next retry sweep is due (RETRY_SWEEP_INTERVAL_SECONDS, 0 disables)"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = settings.RETRY_SWEEP_INTERVAL_SECONDS if interval is None else interval
+        self._next = time.monotonic()
+
+    def due(self) -> bool:
+        if self.interval <= 0 or time.monotonic() < self._next:
+            return False
+        self._next = time.monotonic() + self.interval
+        return True
+
+
+def _describe_lanes(lanes) -> str:
+    return ", ".join(f"{lane.name}={lane.concurrency}" for lane in lanes)
+
+
+class SubmissionWorker:
+    """
+    polls the submissions table and processes claimed rows on a bounded thread pool (WORKER_ASYNC=false).
+    each lane has its own share of the pool and claims only the ratings it's for; the standard lane
+    (`concurrency` threads) takes whatever the reserved lanes leave.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[int] = None
+    ):
+        self.lanes = worker_lanes(concurrency)
+        self.concurrency = sum(lane.concurrency for lane in self.lanes)
+        self.poll_interval = poll_interval or settings.WORKER_POLL_INTERVAL_SECONDS
+        self.lease_seconds = lease_seconds or settings.WORKER_LEASE_SECONDS
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        self.sweep_timer = RetrySweepTimer()
+
+        self._stop = threading.Event()
+        self._slots_changed = threading.Condition()
+        self._in_flight: Dict[str, int] = {lane.name: 0 for lane in self.lanes}
+
+    def stop(self):
+        """asks the poll loop to exit, in-flight submissions are allowed to finish"""
+        self._stop.set()
+        with self._slots_changed:
+            self._slots_changed.notify_all()
+
+    def _free_slots(self) -> Dict[str, int]:
+        return {lane.name: lane.concurrency - self._in_flight[lane.name] for lane in self.lanes}
+
+    def run(self):
+        """runs the poll loop until stop() is called"""
+        logger.info(f"Worker {self.worker_id} started with lanes {_describe_lanes(self.lanes)}")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="submission-worker") as pool:
+            while not self._stop.is_set():
+                # wait until at least one lane has a free slot before claiming more rows
+                with self._slots_changed:
+                    while max(self._free_slots().values()) <= 0 and not self._stop.is_set():
+                        self._slots_changed.wait()
+                    free_slots = self._free_slots()
+
+                if self._stop.is_set():
+                    break
+
+                if self.sweep_timer.due():
+                    try:
+                        _sweep()
+                    except Exception as e:
+                        logger.error(f"Retry sweep failed: {str(e)}")
+
+                claimed = False
+                for lane in self.lanes:
+                    if free_slots[lane.name] <= 0:
+                        continue
+                    try:
+                        submission_ids = _claim_batch(self.worker_id, free_slots[lane.name], self.lease_seconds, lane)
+                    except Exception as e:
+                        logger.error(f"Failed to claim submissions for the {lane.name} lane: {str(e)}")
+                        submission_ids = []
+
+                    for submission_id in submission_ids:
+                        with self._slots_changed:
+                            self._in_flight[lane.name] += 1
+                        pool.submit(self._process, submission_id, lane.name)
+                    claimed = claimed or bool(submission_ids)
+
+                if not claimed:
+                    self._stop.wait(self.poll_interval)
+
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def _process(self, submission_id: UUID, lane: str):
+        """processes one claimed submission with a dedicated session"""
+        db = SessionLocal()
+        try:
+            process_submission(submission_id, db)
+        finally:
+            db.close()
+            with self._slots_changed:
+                self._in_flight[lane] -= 1
+                self._slots_changed.notify_all()
+
+
+class AsyncSubmissionWorker:
+    """
+    polls the submissions table and processes claimed rows as tasks on the event loop.
+    lanes work like in SubmissionWorker; reserved lanes also call the llm outside the shared
+    LLM_MAX_CONCURRENCY semaphore, so a backlog in the standard lane can't hold them up.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[int] = None
+    ):
+        self.lanes = worker_lanes(concurrency)
+        self.concurrency = sum(lane.concurrency for lane in self.lanes)
+        self.poll_interval = poll_interval or settings.WORKER_POLL_INTERVAL_SECONDS
+        self.lease_seconds = lease_seconds or settings.WORKER_LEASE_SECONDS
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-async"
+        self.sweep_timer = RetrySweepTimer()
+
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def stop(self):
+        """asks the poll loop to exit, in-flight submissions are allowed to finish"""
+        self._stop.set()
+
+    async def run(self):
+        """runs the poll loop until stop() is called"""
+        logger.info(f"Worker {self.worker_id} started with lanes {_describe_lanes(self.lanes)}")
+        in_flight = {lane.name: set() for lane in self.lanes}
+        limiters = {
+            lane.name: asyncio.Semaphore(lane.concurrency) for lane in self.lanes if lane.name != STANDARD_LANE
+        }
+
+        while not self._stop.is_set():
+            if self.sweep_timer.due():
+                try:
+                    await asyncio.to_thread(_sweep)
+                except Exception as e:
+                    logger.error(f"Retry sweep failed: {str(e)}")
+
+            if all(len(in_flight[lane.name]) >= lane.concurrency for lane in self.lanes):
+                await asyncio.wait(set().union(*in_flight.values()), return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            claimed = False
+            for lane in self.lanes:
+                tasks = in_flight[lane.name]
+                free_slots = lane.concurrency - len(tasks)
+                if free_slots <= 0:
+                    continue
+                try:
+                    submission_ids = await asyncio.to_thread(
+                        _claim_batch, self.worker_id, free_slots, self.lease_seconds, lane
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to claim submissions for the {lane.name} lane: {str(e)}")
+                    submission_ids = []
+
+                for submission_id in submission_ids:
+                    task = asyncio.create_task(process_submission_async(submission_id, limiters.get(lane.name)))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                claimed = claimed or bool(submission_ids)
+
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        # let claimed submissions finish so their leases are released cleanly
+        remaining = set().union(*in_flight.values())
+        if remaining:
+            await asyncio.gather(*remaining, return_exceptions=True)
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def start(self) -> asyncio.Task:
+        """schedules run() on the current event loop"""
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def join(self):
+        """waits for a worker started with start() to finish"""
+        if self._task:
+            await self._task
+
+
+def start_embedded_worker():
+    """starts a worker inside the current process (the api's event loop or a daemon thread)"""
+    if settings.WORKER_ASYNC:
+        worker = AsyncSubmissionWorker()
+        worker.start()
+        return worker
+
+    worker = SubmissionWorker()
+    thread = threading.Thread(target=worker.run, name="embedded-submission-worker", daemon=True)
+    thread.start()
+    return worker
+
+
+async def stop_embedded_worker(worker):
+    """stops an embedded worker and waits for in-flight async work to drain"""
+    worker.stop()
+    if isinstance(worker, AsyncSubmissionWorker):
+        await worker.join()
+
+
+async def _run_async_worker():
+    """runs the async worker until SIGTERM/SIGINT"""
+    worker = AsyncSubmissionWorker()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, worker.stop)
+    await worker.run()
+
+
+def main():
+    """entry point for the standalone worker process"""
+    setup_logging()
+    init_db(engine)
+
+    # llm and processing metrics live in the worker process, so it needs its own scrape target
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT)
+        logger.info(f"Serving worker metrics on port {settings.WORKER_METRICS_PORT}")
+
+    if settings.WORKER_ASYNC:
+        asyncio.run(_run_async_worker())
+        return
+
+    worker = SubmissionWorker()
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down worker")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+OpenAI-compatible mock llm server.
+
+Serves the same canned answers, latency and failure injection as LLM_PROVIDER=mock,
+but over http, so benchmarks also cover the provider sdk, connection pooling and the
+rate-limit header handling. Point the api at it with LLM_PROVIDER=groq and
+LLM_BASE_URL=http://localhost:9000 (any non-empty GROQ_API_KEY):
+
+    python -m benchmarks.mock_llm_server --port 9000 --latency-ms 800 --failure-rate 0.02
+"""
+import argparse
+import json
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain.schema import HumanMessage, SystemMessage
+from app.services.mock_llm import MockChatModel, MockLLMError
+
+app = FastAPI(title="Mock LLM")
+app.state.model = MockChatModel()
+
+# generous limits, reported the same way groq and openai do
+RATE_LIMIT_HEADERS = {
+    "x-ratelimit-limit-requests": "100000",
+    "x-ratelimit-remaining-requests": "99999",
+    "x-ratelimit-reset-requests": "1s",
+}
+
+
+def _to_messages(raw_messages: list):
+    roles = {"system": SystemMessage, "user": HumanMessage}
+    return [roles[m["role"]](content=m["content"]) for m in raw_messages if m.get("role") in roles]
+
+
+def _model(body: dict) -> MockChatModel:
+    return app.state.model.bind(response_format=body.get("response_format"))
+
+
+def _error_response(error: MockLLMError) -> JSONResponse:
+    return JSONResponse(
+        status_code=error.status_code,
+        content={"error": {"message": str(error), "type": "service_unavailable"}},
+        headers=RATE_LIMIT_HEADERS
+    )
+
+
+async def _stream_completion(body: dict):
+    """answers stream=true requests with openai-style sse chunks"""
+    stream = _model(body).astream(_to_messages(body.get("messages", [])))
+    # pull the first chunk up front so simulated failures still become a 503
+    try:
+        first = await stream.__anext__()
+    except MockLLMError as e:
+        return _error_response(e)
+
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+    def event(delta: dict, finish_reason=None, usage=None) -> str:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        if usage:
+            chunk["x_groq"] = {"usage": usage}
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    async def events():
+        yield event({"role": "assistant", "content": first.content})
+        usage = first.response_metadata.get("token_usage")
+        async for chunk in stream:
+            usage = chunk.response_metadata.get("token_usage") or usage
+            yield event({"content": chunk.content})
+        yield event({}, finish_reason="stop", usage=usage)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=RATE_LIMIT_HEADERS)
+
+
+@app.post("/v1/chat/completions")
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if body.get("stream"):
+        return await _stream_completion(body)
+
+    try:
+        message = await _model(body).ainvoke(_to_messages(body.get("messages", [])))
+    except MockLLMError as e:
+        return _error_response(e)
+
+    return JSONResponse(
+        content={
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": message.content},
+                "finish_reason": "stop",
+            }],
+            "usage": message.response_metadata["token_usage"],
+        },
+        headers=RATE_LIMIT_HEADERS
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock llm server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app.state.model = MockChatModel(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        failure_rate=args.failure_rate,
+        malformed_rate=args.malformed_rate
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
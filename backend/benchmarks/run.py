@@ -0,0 +1,277 @@
+"""
+Load benchmark for the api.
+
+Drives the public submission endpoints and the admin endpoints at each concurrency
+level, waits for the worker to drain what was submitted, and reports p50/p95/p99
+latency per endpoint plus end-to-end processing throughput. Results are written to
+benchmarks/results/ so runs can be compared across releases:
+
+    python -m benchmarks.run --base-url http://localhost:8000 --concurrency 1,8,32 --requests 200
+    python -m benchmarks.run --compare benchmarks/results/<baseline>.json
+
+Run the api and worker with LLM_PROVIDER=mock (or point LLM_BASE_URL at
+benchmarks/mock_llm_server.py) and LLM_REQUESTS_PER_MINUTE=0 so the numbers measure
+this service rather than a provider's rate limits. Admission control would refuse most
+of the load since it all comes from one client, so also set CLIENT_RATE_LIMIT_PER_MINUTE=0,
+ADMISSION_MAX_PENDING=0 and ADMISSION_MAX_WAIT_SECONDS=0.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+import httpx
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+REVIEW_TEMPLATES = [
+    "Terrible experience, the order arrived late and broken. {tag} #{index}",
+    "Not great, support took days to answer my question. {tag} #{index}",
+    "It was okay, delivery was fine but the packaging was damaged. {tag} #{index}",
+    "Good product and quick delivery, would buy again. {tag} #{index}",
+    "Excellent service, the staff went above and beyond! {tag} #{index}",
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """nearest-rank percentile, None for an empty sample"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """latency percentiles in milliseconds and request throughput for one scenario"""
+    to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": to_ms(percentile(latencies, 50)),
+        "p95_ms": to_ms(percentile(latencies, 95)),
+        "p99_ms": to_ms(percentile(latencies, 99)),
+        "mean_ms": to_ms(sum(latencies) / len(latencies)) if latencies else None,
+        "max_ms": to_ms(max(latencies)) if latencies else None,
+    }
+
+
+async def run_load(total: int, concurrency: int, send: Callable[[int], Awaitable[httpx.Response]]):
+    """
+    Sends `total` requests with at most `concurrency` in flight.
+    Returns the successful latencies, the error count, the wall time, and the responses.
+    """
+    latencies: List[float] = []
+    responses: Dict[int, httpx.Response] = {}
+    errors = 0
+    next_index = 0
+
+    async def runner():
+        nonlocal errors, next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await send(index)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response.status_code >= 400:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            responses[index] = response
+
+    started = time.perf_counter()
+    await asyncio.gather(*(runner() for _ in range(min(concurrency, total))))
+    return latencies, errors, time.perf_counter() - started, responses
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> dict:
+    response = await client.post("/api/admin/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def pending_count(client: httpx.AsyncClient, auth: dict, tag: str) -> int:
+    response = await client.get(
+        "/api/admin/submissions",
+        params={"status": "PENDING", "q": tag, "limit": 1, "count": "exact"},
+        headers=auth
+    )
+    response.raise_for_status()
+    return response.json()["total"]
+
+
+async def wait_for_drain(client: httpx.AsyncClient, auth: dict, tag: str, timeout: float) -> Optional[float]:
+    """seconds until none of this level's submissions are PENDING, None on timeout"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if await pending_count(client, auth, tag) == 0:
+            return time.perf_counter() - started
+        await asyncio.sleep(0.25)
+    return None
+
+
+async def status_counts(client: httpx.AsyncClient, auth: dict, tag: str) -> dict:
+    counts = {}
+    for status in ("COMPLETED", "FAILED"):
+        response = await client.get(
+            "/api/admin/submissions",
+            params={"status": status, "q": tag, "limit": 1, "count": "exact"},
+            headers=auth
+        )
+        response.raise_for_status()
+        counts[status.lower()] = response.json()["total"]
+    return counts
+
+
+async def run_level(client: httpx.AsyncClient, auth: dict, concurrency: int, total: int, drain_timeout: float) -> dict:
+    """runs every scenario at one concurrency level"""
+    # a unique word per level keeps reviews out of the llm cache and lets us find them again
+    tag = f"bench{uuid.uuid4().hex[:12]}"
+
+    def create(index: int):
+        return client.post("/api/submissions", json={
+            "rating": index % 5 + 1,
+            "review": REVIEW_TEMPLATES[index % 5].format(tag=tag, index=index),
+        })
+
+    started = time.perf_counter()
+    latencies, errors, elapsed, responses = await run_load(total, concurrency, create)
+    created = summarize(latencies, errors, elapsed)
+    ids = [response.json()["submission_id"] for _, response in sorted(responses.items())]
+
+    drained = await wait_for_drain(client, auth, tag, drain_timeout)
+    end_to_end = {
+        "submissions": len(ids),
+        "seconds": round(time.perf_counter() - started, 2) if drained is not None else None,
+        "drain_seconds": round(drained, 2) if drained is not None else None,
+        "timed_out": drained is None,
+        **await status_counts(client, auth, tag),
+    }
+    if drained is not None and ids:
+        end_to_end["submissions_per_second"] = round(len(ids) / end_to_end["seconds"], 2)
+
+    results = {"create_submission": created, "end_to_end": end_to_end}
+
+    if ids:
+        def get_detail(index: int):
+            return client.get(f"/api/submissions/{ids[index % len(ids)]}")
+
+        latencies, errors, elapsed, _ = await run_load(total, concurrency, get_detail)
+        results["get_submission"] = summarize(latencies, errors, elapsed)
+
+    def list_submissions(index: int):
+        return client.get("/api/admin/submissions", params={"limit": 20}, headers=auth)
+
+    latencies, errors, elapsed, _ = await run_load(total, concurrency, list_submissions)
+    results["admin_list"] = summarize(latencies, errors, elapsed)
+
+    def analytics(index: int):
+        return client.get("/api/admin/analytics", headers=auth)
+
+    latencies, errors, elapsed, _ = await run_load(total, concurrency, analytics)
+    results["admin_analytics"] = summarize(latencies, errors, elapsed)
+
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report: dict):
+    for level in report["levels"]:
+        print(f"\nconcurrency {level['concurrency']}")
+        print(f"  {'scenario':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, stats in level["results"].items():
+            if name == "end_to_end":
+                continue
+            print(
+                f"  {name:<20}{stats['requests_per_second'] or '-':>10}{stats['p50_ms'] or '-':>10}"
+                f"{stats['p95_ms'] or '-':>10}{stats['p99_ms'] or '-':>10}{stats['errors']:>8}"
+            )
+        e2e = level["results"]["end_to_end"]
+        if e2e["timed_out"]:
+            print(f"  end-to-end: timed out with submissions still pending ({e2e})")
+        else:
+            print(
+                f"  end-to-end: {e2e['submissions']} submissions in {e2e['seconds']}s "
+                f"({e2e.get('submissions_per_second')}/s, {e2e['completed']} completed, {e2e['failed']} failed)"
+            )
+
+
+def compare(current: dict, baseline: dict):
+    """prints p95 latency and throughput changes against a saved run"""
+    print(f"\ncompared with {baseline['revision']} ({baseline['started_at']})")
+    baseline_levels = {level["concurrency"]: level["results"] for level in baseline["levels"]}
+    for level in current["levels"]:
+        previous = baseline_levels.get(level["concurrency"])
+        if previous is None:
+            continue
+        print(f"concurrency {level['concurrency']}")
+        for name, stats in level["results"].items():
+            before = previous.get(name)
+            if before is None:
+                continue
+            for metric in ("p95_ms", "requests_per_second", "submissions_per_second"):
+                old, new = before.get(metric), stats.get(metric)
+                if old and new:
+                    print(f"  {name:<20}{metric:<24}{old:>10} -> {new:<10}({(new - old) / old:+.1%})")
+
+
+async def main(args):
+    levels = [int(level) for level in args.concurrency.split(",")]
+    report = {
+        "revision": git_revision(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "requests_per_level": args.requests,
+        "levels": [],
+    }
+
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        auth = await login(client, args.username, args.password)
+        for concurrency in levels:
+            results = await run_level(client, auth, concurrency, args.requests, args.drain_timeout)
+            report["levels"].append({"concurrency": concurrency, "results": results})
+
+    print_report(report)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = Path(args.output) if args.output else RESULTS_DIR / f"{timestamp}-{report['revision']}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"\nresults saved to {path}")
+
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load benchmark for the submissions api")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and level")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--drain-timeout", type=float, default=300.0, help="how long to wait for processing")
+    parser.add_argument("--username", default=os.getenv("ADMIN_USERNAME", "admin"))
+    parser.add_argument("--password", default=os.getenv("ADMIN_PASSWORD", ""))
+    parser.add_argument("--output", help="where to write the results, defaults to benchmarks/results/")
+    parser.add_argument("--compare", help="a previous results file to compare against")
+    asyncio.run(main(parser.parse_args()))
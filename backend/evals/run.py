@@ -0,0 +1,314 @@
+"""
+Offline prompt evaluation.
+
+Replays a labeled review dataset (CSV or NDJSON with the review text and its star
+rating, e.g. the yelp.csv used in notebook/prompt.ipynb) through the rating-prediction
+prompt variants in app/services/prompts.py on one or more models, and reports accuracy,
+latency percentiles and token usage/cost per variant and model. Calls run concurrently
+(bounded by --concurrency) through the app's rate limiter, retry and failover path, and
+finished predictions are cached so a rerun only calls the llm for what changed:
+
+    python -m evals.run --dataset yelp.csv --variants v1,v2,v3 --sample 200
+    python -m evals.run --dataset reviews.ndjson --models llama-3.3-70b-versatile,llama-3.1-8b-instant \\
+        --input-price 0.59 --output-price 0.79
+
+The provider comes from the usual LLM_* settings (--provider picks an entry of
+LLM_PROVIDERS by name) and calls stay within its LLM_REQUESTS_PER_MINUTE limit. Run with
+LLM_PROVIDER=mock, or point an openai provider at benchmarks/mock_llm_server.py, to try
+it without a real provider.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain.schema import HumanMessage
+from pydantic import ValidationError
+from app.core.config import LLMProviderConfig
+from app.schemas.submissions import RatingPrediction
+from app.services.llm import LLMClient
+from app.services.prompts import RATING_PROMPTS
+from app.services.providers import LLMRouter, build_provider, provider_configs
+from benchmarks.run import git_revision, percentile
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_CACHE = Path(__file__).parent / "cache" / "predictions.jsonl"
+
+# (review text, actual stars)
+Example = Tuple[str, int]
+
+
+def load_dataset(path: Path, text_field: str, label_field: str) -> List[Example]:
+    """reads (text, stars) pairs from a csv or ndjson file, skipping rows without a 1-5 label"""
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    examples = []
+    for row in rows:
+        try:
+            stars = int(float(row[label_field]))
+        except (KeyError, TypeError, ValueError):
+            continue
+        text = row.get(text_field)
+        if text and 1 <= stars <= 5:
+            examples.append((text, stars))
+    return examples
+
+
+def stratified_sample(examples: List[Example], size: int, seed: int) -> List[Example]:
+    """up to size / 5 examples per star rating, like the notebook's groupby sample"""
+    by_stars = defaultdict(list)
+    for example in examples:
+        by_stars[example[1]].append(example)
+
+    rng = random.Random(seed)
+    per_label = max(1, size // len(by_stars)) if by_stars else 0
+    sample = []
+    for stars in sorted(by_stars):
+        group = by_stars[stars]
+        sample.extend(rng.sample(group, min(len(group), per_label)))
+    return sample
+
+
+def template_version(prompt: Callable[[str], str]) -> str:
+    """short hash of a prompt template, so editing a variant invalidates its cached results"""
+    return hashlib.sha256(prompt("{review}").encode("utf-8")).hexdigest()[:16]
+
+
+class PredictionCache:
+    """append-only jsonl of finished predictions keyed by prompt version, model and review"""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if path and path.exists():
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry["result"]
+
+    @staticmethod
+    def key(variant: str, version: str, model_key: str, review: str) -> str:
+        return hashlib.sha256("\x1f".join([variant, version, model_key, review]).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def add(self, key: str, result: dict):
+        self.entries[key] = result
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "result": result}) + "\n")
+
+
+def parse_prediction(content: str) -> Tuple[Optional[int], Optional[str]]:
+    """predicted stars from a response, or None and why it isn't usable"""
+    try:
+        return RatingPrediction(**json.loads(content)).predicted_stars, None
+    except (json.JSONDecodeError, TypeError, ValidationError):
+        pass
+
+    # same fallback as the app: the json object inside prose or a code fence
+    start, end = content.find("{"), content.rfind("}") + 1
+    try:
+        if start >= 0 and end > start:
+            return RatingPrediction(**json.loads(content[start:end])).predicted_stars, None
+    except (json.JSONDecodeError, TypeError, ValidationError) as e:
+        return None, str(e).splitlines()[0]
+    return None, "no JSON object in the response"
+
+
+async def predict(client: LLMClient, prompt: Callable[[str], str], review: str) -> dict:
+    response = await client.acomplete([HumanMessage(content=prompt(review))])
+    # the provider call alone, time spent waiting on the rate limiter isn't the prompt's cost
+    latency = response.response_metadata["latency_seconds"]
+    usage = response.response_metadata.get("token_usage") or {}
+    stars, error = parse_prediction(response.content)
+    return {
+        "predicted": stars,
+        "error": error,
+        "latency_seconds": round(latency, 4),
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+    }
+
+
+async def run_variant(
+    client: LLMClient,
+    model_key: str,
+    variant: str,
+    examples: List[Example],
+    cache: PredictionCache,
+    semaphore: asyncio.Semaphore
+) -> Tuple[List[Optional[dict]], int]:
+    """predicts every example with one prompt variant, returns the results (None for failed calls) and the cache hits"""
+    prompt = RATING_PROMPTS[variant]
+    version = template_version(prompt)
+    cached = 0
+
+    async def one(review: str) -> Optional[dict]:
+        nonlocal cached
+        key = cache.key(variant, version, model_key, review)
+        result = cache.get(key)
+        if result is not None:
+            cached += 1
+            return result
+        async with semaphore:
+            try:
+                result = await predict(client, prompt, review)
+            except Exception as e:
+                # not cached, so the next run tries again
+                print(f"  {variant}: llm call failed: {str(e)[:120]}")
+                return None
+        cache.add(key, result)
+        return result
+
+    results = await asyncio.gather(*(one(review) for review, _ in examples))
+    return results, cached
+
+
+def summarize(
+    examples: List[Example],
+    results: List[Optional[dict]],
+    input_price: float,
+    output_price: float
+) -> dict:
+    """accuracy over valid predictions (like the notebook), latency percentiles and token cost"""
+    valid = [(stars, result["predicted"]) for (_, stars), result in zip(examples, results)
+             if result and result["predicted"] is not None]
+    answered = [result for result in results if result]
+    latencies = [result["latency_seconds"] for result in answered]
+    prompt_tokens = sum(result["prompt_tokens"] for result in answered)
+    completion_tokens = sum(result["completion_tokens"] for result in answered)
+
+    confusion = defaultdict(lambda: defaultdict(int))
+    for actual, predicted in valid:
+        confusion[actual][predicted] += 1
+
+    to_ms = lambda value: round(value * 1000, 1) if value is not None else None
+    return {
+        "reviews": len(examples),
+        "failed_calls": len(results) - len(answered),
+        "valid": len(valid),
+        "valid_rate": round(len(valid) / len(examples), 4) if examples else None,
+        "accuracy": round(sum(a == p for a, p in valid) / len(valid), 4) if valid else None,
+        "within_one": round(sum(abs(a - p) <= 1 for a, p in valid) / len(valid), 4) if valid else None,
+        "mean_abs_error": round(sum(abs(a - p) for a, p in valid) / len(valid), 3) if valid else None,
+        "p50_ms": to_ms(percentile(latencies, 50)),
+        "p95_ms": to_ms(percentile(latencies, 95)),
+        "p99_ms": to_ms(percentile(latencies, 99)),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        # prices are per million tokens
+        "cost_usd": round((prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000, 6),
+        "confusion": {actual: dict(row) for actual, row in sorted(confusion.items())},
+    }
+
+
+def provider_config(name: Optional[str]) -> LLMProviderConfig:
+    configs = provider_configs()
+    if name is None:
+        return configs[0]
+    for config in configs:
+        if config.name == name:
+            return config
+    raise SystemExit(f"No provider named {name} in LLM_PROVIDERS")
+
+
+def print_report(report: dict):
+    print(f"\n{'variant':<10}{'model':<32}{'valid':>8}{'acc':>8}{'+-1':>8}{'p50 ms':>10}{'p95 ms':>10}{'tokens':>10}{'cost $':>12}")
+    for run in report["runs"]:
+        stats = run["results"]
+        fmt = lambda value: f"{value:.1%}" if value is not None else "-"
+        print(
+            f"{run['variant']:<10}{run['model'][:31]:<32}{stats['valid']:>4}/{stats['reviews']:<3}"
+            f"{fmt(stats['accuracy']):>8}{fmt(stats['within_one']):>8}"
+            f"{stats['p50_ms'] or '-':>10}{stats['p95_ms'] or '-':>10}"
+            f"{stats['prompt_tokens'] + stats['completion_tokens']:>10}{stats['cost_usd']:>12}"
+        )
+
+
+async def main(args):
+    variants = args.variants.split(",")
+    unknown = [variant for variant in variants if variant not in RATING_PROMPTS]
+    if unknown:
+        raise SystemExit(f"Unknown prompt variants: {', '.join(unknown)} (have {', '.join(RATING_PROMPTS)})")
+
+    examples = load_dataset(Path(args.dataset), args.text_field, args.label_field)
+    if args.sample:
+        examples = stratified_sample(examples, args.sample, args.seed)
+    if not examples:
+        raise SystemExit("No labeled examples found in the dataset")
+
+    base = provider_config(args.provider)
+    models = args.models.split(",") if args.models else [base.model or ""]
+    cache = PredictionCache(None if args.no_cache else Path(args.cache))
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+    report = {
+        "revision": git_revision(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "dataset": args.dataset,
+        "examples": len(examples),
+        "provider": base.name,
+        "runs": [],
+    }
+    for model in models:
+        # one single-provider client per model, so failover can't mix models within a run
+        provider = build_provider(base.model_copy(update={"model": model}))
+        client = LLMClient(router=LLMRouter([provider]))
+        model_key = f"{base.kind}:{base.base_url}:{provider.model}"
+
+        for variant in variants:
+            started = time.perf_counter()
+            results, cached = await run_variant(client, model_key, variant, examples, cache, semaphore)
+            stats = summarize(examples, results, args.input_price, args.output_price)
+            print(
+                f"{variant} on {provider.model}: {stats['valid']}/{stats['reviews']} valid, "
+                f"{cached} cached, {time.perf_counter() - started:.1f}s"
+            )
+            report["runs"].append({
+                "variant": variant,
+                "prompt_version": template_version(RATING_PROMPTS[variant]),
+                "model": provider.model,
+                "cached": cached,
+                "results": stats,
+            })
+
+    print_report(report)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = Path(args.output) if args.output else RESULTS_DIR / f"{timestamp}-{report['revision']}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"\nresults saved to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate rating-prediction prompt variants on a labeled dataset")
+    parser.add_argument("--dataset", required=True, help="csv or ndjson file with review text and star labels")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--label-field", default="stars")
+    parser.add_argument("--sample", type=int, default=0, help="stratified sample size, 0 uses every row")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--variants", default=",".join(RATING_PROMPTS), help="comma-separated prompt variants")
+    parser.add_argument("--models", help="comma-separated models, defaults to the provider's model")
+    parser.add_argument("--provider", help="LLM_PROVIDERS entry to use, defaults to the first")
+    parser.add_argument("--concurrency", type=int, default=8, help="llm calls in flight")
+    parser.add_argument("--input-price", type=float, default=0.0, help="USD per million prompt tokens")
+    parser.add_argument("--output-price", type=float, default=0.0, help="USD per million completion tokens")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE), help="jsonl file of finished predictions")
+    parser.add_argument("--no-cache", action="store_true", help="call the llm for every example")
+    parser.add_argument("--output", help="where to write the results, defaults to evals/results/")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from app.db.models import SubmissionStatus, utc_now
+from app.db.session import engine
+from app.services.search import build_snippet
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def list_submissions(client, headers, **params):
+    response = client.get("/api/admin/submissions", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_listing_requires_a_token(client):
+    assert client.get("/api/admin/submissions").status_code in (401, 403)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(["2024-05-01T12:00:00", "b5f1a3c2-9d3e-4d2a-8f0e-1c2b3a4d5e6f"])
+    assert decode_cursor(cursor, [str, str]) == ["2024-05-01T12:00:00", "b5f1a3c2-9d3e-4d2a-8f0e-1c2b3a4d5e6f"]
+
+
+def test_cursor_pages_cover_every_row_once(client, admin_headers, make_submission):
+    now = utc_now()
+    # three rows share a timestamp, the id breaks the tie
+    created = [now, now, now, now - timedelta(minutes=1), now - timedelta(minutes=2)]
+    ids = {str(make_submission(created_at=created_at).id) for created_at in created}
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, "cursor": cursor} if cursor else {"limit": 2}
+        page = list_submissions(client, admin_headers, **params)
+        seen += [item["id"] for item in page["items"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) and set(seen) == ids
+    assert page["total"] == 5
+
+
+def test_newest_submissions_come_first(client, admin_headers, make_submission):
+    now = utc_now()
+    old = make_submission(created_at=now - timedelta(days=1))
+    new = make_submission(created_at=now)
+
+    items = list_submissions(client, admin_headers)["items"]
+    assert [item["id"] for item in items] == [str(new.id), str(old.id)]
+
+
+def test_invalid_cursor_is_rejected(client, admin_headers):
+    response = client.get("/api/admin/submissions", params={"cursor": "not-a-cursor"}, headers=admin_headers)
+    assert response.status_code == 422
+
+
+def test_total_can_be_skipped_or_estimated(client, admin_headers, make_submission):
+    make_submission()
+    assert list_submissions(client, admin_headers, count="none")["total"] is None
+    # only postgres has planner estimates, other databases count exactly
+    estimated = list_submissions(client, admin_headers, count="estimate")
+    assert estimated["total_is_estimate"] is True and estimated["total"] >= 1
+
+
+def test_legacy_offset_paging_and_filters(client, admin_headers, make_submission):
+    now = utc_now()
+    for minutes in range(3):
+        make_submission(rating=5, created_at=now - timedelta(minutes=minutes))
+    make_submission(rating=1, status=SubmissionStatus.FAILED)
+
+    page = list_submissions(client, admin_headers, rating=5, offset=1, limit=5)
+    assert len(page["items"]) == 2 and page["next_cursor"] is None
+    assert list_submissions(client, admin_headers, status="failed")["total"] == 1
+    assert client.get("/api/admin/submissions", params={"status": "LOST"}, headers=admin_headers).status_code == 422
+
+
+def test_search_matches_reviews_and_highlights_them(client, admin_headers, make_submission):
+    match = make_submission(review="The pasta was <b>cold</b> but the staff were lovely.")
+    make_submission(review="Great pizza, fast delivery.")
+
+    page = list_submissions(client, admin_headers, q="cold")
+
+    assert [item["id"] for item in page["items"]] == [str(match.id)]
+    assert page["total"] == 1
+    snippet = page["items"][0]["snippet"]
+    assert "<mark>cold</mark>" in snippet.lower() and "<b>" not in snippet
+    if engine.dialect.name == "postgresql":
+        assert page["items"][0]["rank"] is not None
+
+
+def test_search_matches_partial_words(client, admin_headers, make_submission):
+    make_submission(review="Absolutely delicious desserts.")
+    assert list_submissions(client, admin_headers, q="delic")["total"] == 1
+
+
+def test_relevance_sort_needs_full_text_search(client, admin_headers):
+    response = client.get("/api/admin/submissions", params={"sort": "relevance"}, headers=admin_headers)
+    assert response.status_code == 422
+
+
+def test_fallback_snippet_is_escaped_and_trimmed():
+    review = "x" * 200 + " rude <waiter> " + "y" * 200
+    snippet = build_snippet(review, "RUDE")
+
+    assert snippet.startswith("...") and snippet.endswith("...")
+    assert "<mark>rude</mark> &lt;waiter&gt;" in snippet
+    assert build_snippet("Nothing here", "absent") == "Nothing here"
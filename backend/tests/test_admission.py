@@ -0,0 +1,69 @@
+from datetime import timedelta
+import pytest
+from app.core.config import settings
+from app.db.models import SubmissionStatus, utc_now
+from app.db.session import AsyncSessionLocal
+from app.services.admission import admission_controller
+
+BODY = {"rating": 4, "review": "Nice terrace, good coffee."}
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    """turns on the backlog limits, readings are never reused"""
+    monkeypatch.setattr(settings, "ADMISSION_REFRESH_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "ADMISSION_MIN_PENDING", 1)
+    return monkeypatch
+
+
+def test_full_queue_is_refused_with_retry_after(client, make_submission, admission):
+    admission.setattr(settings, "ADMISSION_MAX_PENDING", 2)
+    make_submission()
+    assert client.post("/api/submissions", json=BODY).status_code == 200
+
+    response = client.post("/api/submissions", json=BODY)
+
+    assert response.status_code == 429
+    # nothing has finished recently, so the longest wait is suggested
+    assert response.headers["Retry-After"] == str(int(settings.ADMISSION_MAX_RETRY_AFTER_SECONDS))
+
+
+def test_slow_drain_is_refused(client, make_submission, admission):
+    admission.setattr(settings, "ADMISSION_MAX_WAIT_SECONDS", 10.0)
+    now = utc_now()
+    # six finished in the last minute is 0.1 per second, so one pending drains within 10s
+    for _ in range(6):
+        make_submission(status=SubmissionStatus.COMPLETED, updated_at=now)
+    make_submission(status=SubmissionStatus.COMPLETED, updated_at=now - timedelta(minutes=5))
+    make_submission()
+
+    response = client.post("/api/submissions", json=BODY)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+
+
+@pytest.mark.anyio
+async def test_processing_rate_counts_only_the_window(make_submission):
+    now = utc_now()
+    make_submission(status=SubmissionStatus.COMPLETED, updated_at=now)
+    make_submission(status=SubmissionStatus.FAILED, updated_at=now - timedelta(seconds=30))
+    make_submission(status=SubmissionStatus.COMPLETED, updated_at=now - timedelta(minutes=5))
+    make_submission()
+
+    async with AsyncSessionLocal() as db:
+        snapshot = await admission_controller._measure(db)
+
+    assert snapshot.pending == 1
+    assert snapshot.processing_rate == pytest.approx(2 / settings.ADMISSION_RATE_WINDOW_SECONDS)
+
+
+def test_client_rate_limit_is_per_client(client, monkeypatch):
+    monkeypatch.setattr(settings, "CLIENT_RATE_LIMIT_PER_MINUTE", 1)
+    monkeypatch.setattr(settings, "CLIENT_RATE_LIMIT_BURST", 1)
+
+    assert client.post("/api/submissions", json=BODY, headers={"X-API-Key": "a"}).status_code == 200
+    refused = client.post("/api/submissions", json=BODY, headers={"X-API-Key": "a"})
+    assert refused.status_code == 429
+    assert int(refused.headers["Retry-After"]) >= 1
+    assert client.post("/api/submissions", json=BODY, headers={"X-API-Key": "b"}).status_code == 200
@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+from app.db.models import SubmissionRollup, SubmissionStatus, utc_now
+from app.services.processing import process_submission
+from app.services.queue import claim_submissions
+from app.services.rollups import bucket_start, rebuild_rollups, summarize_rollups
+
+
+def analytics(client, headers, **params):
+    response = client.get("/api/admin/analytics", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_rollups_follow_creation_and_status_changes(client, admin_headers, db):
+    for rating in (1, 5, 5):
+        client.post("/api/submissions", json={"rating": rating, "review": f"A {rating} star visit."})
+    # only the first claimed submission gets processed
+    process_submission(claim_submissions(db, "worker-1", limit=1, lease_seconds=60)[0], db)
+
+    body = analytics(client, admin_headers)
+
+    assert body["counts_by_rating"] == {"1": 1, "5": 2}
+    assert body["counts_by_status"] == {"PENDING": 2, "COMPLETED": 1}
+    assert body["submissions_per_day"] == [{"date": str(utc_now().date()), "count": 3}]
+
+
+def test_rebuild_counts_rows_written_outside_the_api(client, admin_headers, make_submission, db):
+    make_submission(rating=2, status=SubmissionStatus.FAILED)
+    make_submission(rating=2, created_at=utc_now() - timedelta(days=3))
+    assert analytics(client, admin_headers)["counts_by_status"] == {}
+
+    rebuild_rollups(db)
+
+    # analytics are cached briefly, a different range is a different cache entry
+    body = analytics(client, admin_headers, start=str(date.today() - timedelta(days=30)))
+    assert body["counts_by_status"] == {"FAILED": 1, "PENDING": 1}
+    assert len(body["submissions_per_day"]) == 2
+
+
+def test_buckets_start_on_monday_and_the_first_of_the_month():
+    day = date(2024, 5, 16)  # a thursday
+    assert bucket_start(day, "day") == day
+    assert bucket_start(day, "week") == date(2024, 5, 13)
+    assert bucket_start(day, "month") == date(2024, 5, 1)
+
+    rows = [
+        SubmissionRollup(day=date(2024, 5, 13), rating=4, status=SubmissionStatus.COMPLETED, count=2),
+        SubmissionRollup(day=date(2024, 5, 16), rating=1, status=SubmissionStatus.FAILED, count=1),
+        SubmissionRollup(day=date(2024, 5, 16), rating=1, status=SubmissionStatus.PENDING, count=0),
+    ]
+    summary = summarize_rollups(rows, "week")
+    assert summary["series"] == [{"date": "2024-05-13", "count": 3}]
+    assert summary["counts_by_status"] == {"COMPLETED": 2, "FAILED": 1}
+
+
+def test_reversed_range_is_rejected(client, admin_headers):
+    response = client.get("/api/admin/analytics", params={"start": "2024-05-02", "end": "2024-05-01"}, headers=admin_headers)
+    assert response.status_code == 422
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from app.db.models import SubmissionStatus, utc_now
+from app.schemas.submissions import LLMOutput
+from app.services import processing
+from app.services.batching import ReviewBatcher
+from app.services.llm import llm_client
+from app.services.queue import claim_submissions
+from app.services.rate_limit import LLMUnavailableError
+
+
+def output(text: str) -> LLMOutput:
+    return LLMOutput(user_ai_response=text, admin_summary="Summary.", recommended_actions=["Follow up"])
+
+
+class FakeClient:
+    """records calls, the batched answer skips the reviews listed in `skip`"""
+
+    def __init__(self, skip=(), batch_error=None):
+        self.skip = set(skip)
+        self.batch_error = batch_error
+        self.batches = []
+        self.singles = []
+
+    async def agenerate_batch(self, items):
+        self.batches.append([submission_id for submission_id, _, _ in items])
+        if self.batch_error:
+            raise self.batch_error
+        return {submission_id: output(f"batch {submission_id}") for submission_id, _, _ in items if submission_id not in self.skip}
+
+    async def agenerate(self, review_text, rating):
+        self.singles.append(review_text)
+        return output(f"single {review_text}")
+
+
+async def generate_all(batcher, count):
+    return await asyncio.gather(*[batcher.generate(str(index), f"review {index}", 4) for index in range(count)])
+
+
+@pytest.mark.anyio
+async def test_full_batch_is_sent_as_one_call():
+    client = FakeClient()
+    results = await generate_all(ReviewBatcher(client, max_size=3, max_wait_ms=10000), 3)
+
+    assert client.batches == [["0", "1", "2"]]
+    assert [result.user_ai_response for result in results] == ["batch 0", "batch 1", "batch 2"]
+
+
+@pytest.mark.anyio
+async def test_partial_batch_is_sent_after_the_wait():
+    client = FakeClient()
+    await generate_all(ReviewBatcher(client, max_size=10, max_wait_ms=10), 2)
+    assert client.batches == [["0", "1"]]
+
+
+@pytest.mark.anyio
+async def test_lone_review_skips_the_batch_prompt():
+    client = FakeClient()
+    (result,) = await generate_all(ReviewBatcher(client, max_size=10, max_wait_ms=0), 1)
+
+    assert client.batches == []
+    assert result.user_ai_response == "single review 0"
+
+
+@pytest.mark.anyio
+async def test_missing_items_fall_back_to_single_calls():
+    client = FakeClient(skip={"1"})
+    results = await generate_all(ReviewBatcher(client, max_size=3, max_wait_ms=10000), 3)
+
+    assert client.singles == ["review 1"]
+    assert results[1].user_ai_response == "single review 1"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("error", [LLMUnavailableError("rate limited", retry_after=30), RuntimeError("bad batch")])
+async def test_failed_batch_call_fails_every_review_without_single_calls(error):
+    client = FakeClient(batch_error=error)
+    batcher = ReviewBatcher(client, max_size=2, max_wait_ms=10000)
+
+    results = await asyncio.gather(*[batcher.generate(str(index), f"review {index}", 4) for index in range(2)], return_exceptions=True)
+
+    assert client.singles == []
+    assert results == [error, error]
+
+
+@pytest.mark.anyio
+async def test_rate_limited_batch_defers_its_submissions(make_submission, db, monkeypatch):
+    submissions = [make_submission(rating=rating) for rating in (1, 5)]
+    claimed = claim_submissions(db, "worker-1", limit=10, lease_seconds=60)
+    client = FakeClient(batch_error=LLMUnavailableError("rate limited", retry_after=30))
+    monkeypatch.setattr(processing, "review_batcher", ReviewBatcher(client, max_size=2, max_wait_ms=10000))
+
+    await asyncio.gather(*[processing.process_submission_async(submission_id) for submission_id in claimed])
+
+    assert client.singles == []
+    for submission in submissions:
+        db.refresh(submission)
+        assert submission.status == SubmissionStatus.PENDING
+        assert submission.attempts == 0 and submission.locked_until > utc_now()
+
+
+@pytest.mark.anyio
+async def test_batched_answer_is_parsed_per_submission():
+    results = await llm_client.agenerate_batch([("a", 1, "Cold food, rude staff."), ("b", 5, "Wonderful dinner!")])
+
+    assert set(results) == {"a", "b"}
+    assert results["a"].user_ai_response != results["b"].user_ai_response
@@ -0,0 +1,51 @@
+import json
+import uuid
+from app.core.config import settings
+from app.db.models import Submission
+
+
+def post_ndjson(client, lines):
+    return client.post(
+        "/api/submissions/bulk", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"}
+    )
+
+
+def test_ndjson_results_line_up_with_the_input(client, db):
+    response = post_ndjson(client, [
+        json.dumps({"rating": 4, "review": "Good coffee."}),
+        "",
+        "{not json",
+        json.dumps({"rating": 2, "review": "   "}),
+        json.dumps({"rating": 1, "review": "Burnt toast."}),
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (2, 2)
+    statuses = [(result["index"], result["status"]) for result in body["results"]]
+    assert statuses == [(0, "PENDING"), (1, "REJECTED"), (2, "REJECTED"), (3, "PENDING")]
+    assert body["results"][1]["errors"][0].startswith("Invalid JSON")
+    # the ids returned are the rows inserted for those items
+    burnt = db.get(Submission, uuid.UUID(body["results"][3]["submission_id"]))
+    assert burnt.review == "Burnt toast." and burnt.prompt_tokens
+
+
+def test_bulk_inserts_are_counted_in_analytics(client, admin_headers):
+    client.post("/api/submissions/bulk", json=[{"rating": 3, "review": "Fine."}, {"rating": 3, "review": "Okay."}])
+    counts = client.get("/api/admin/analytics", headers=admin_headers).json()["counts_by_rating"]
+    assert counts == {"3": 2}
+
+
+def test_body_must_be_an_array_within_the_limit(client, monkeypatch):
+    assert client.post("/api/submissions/bulk", json={"rating": 3, "review": "Fine."}).status_code == 400
+    assert client.post("/api/submissions/bulk", content="[", headers={"Content-Type": "application/json"}).status_code == 400
+
+    monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 2)
+    too_many = [{"rating": 3, "review": "Fine."}] * 3
+    assert client.post("/api/submissions/bulk", json=too_many).status_code == 413
+
+
+def test_bulk_without_valid_items_inserts_nothing(client, db):
+    response = client.post("/api/submissions/bulk", json=[{"rating": 0, "review": "Zero?"}])
+    assert response.json()["accepted"] == 0
+    assert db.query(Submission).count() == 0
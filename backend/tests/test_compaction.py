@@ -0,0 +1,74 @@
+import threading
+import uuid
+import pytest
+from app.db.models import Submission
+from app.routers import submissions as submissions_router
+from app.services.compaction import (
+    OMISSION, compact_review, count_tokens, extract_sentences, normalize_text, prompt_tokens, truncate_tokens
+)
+
+FILLER = "We parked nearby and walked over after work on a Tuesday."
+
+
+def test_normalization_drops_what_carries_no_meaning():
+    text = "Soooo   goooood!!!!​\n\n\n The ｆｏｏｄ was great..... Why????"
+    assert normalize_text(text) == "Soo good!\nThe food was great... Why?"
+
+
+@pytest.mark.parametrize("text", [
+    "AAA batteries", "XXXL", "www.example.com", "C++", "-->", "Sooo good", "BRRRR cold",
+    "https://example.com/aaaa", "snake_caseeee", "😋😋😋", "The ramen at Mr. Zzzz's",
+])
+def test_normalization_keeps_runs_that_can_carry_meaning(text):
+    assert normalize_text(text) == text
+
+
+def test_short_reviews_are_only_normalized():
+    assert compact_review("Great   food!!", budget=600) == "Great food!"
+    assert compact_review("x " * 2000, budget=0) == normalize_text("x " * 2000)
+
+
+def test_long_review_keeps_its_verdict_within_the_budget():
+    middle = [f"Sentence number {index} talks about the parking garage levels." for index in range(40)]
+    review = " ".join(["The ramen was cold and the broth was bland."] + [FILLER] * 3 + middle + ["I will not return."])
+
+    compacted = compact_review(review, budget=60)
+
+    assert count_tokens(compacted) <= 60
+    assert compacted.endswith("I will not return.")
+    assert OMISSION.strip() in compacted
+    # kept sentences stay in their original order, and repeated ones are sent once
+    kept = [sentence for sentence in middle if sentence in compacted]
+    assert kept and kept == sorted(kept, key=middle.index)
+    assert compacted.count(FILLER) <= 1
+
+
+def test_single_oversized_sentence_is_cut_on_a_word():
+    sentence = "word " * 500
+    cut = extract_sentences(sentence.strip(), 20)
+    assert count_tokens(cut) <= 20 and not cut.endswith(" ")
+    assert truncate_tokens("short", 20) == "short"
+
+
+def test_stored_prompt_tokens_use_the_compacted_review(client, db):
+    review = " ".join(f"Detail {index} about the long wait for a table." for index in range(300))
+    response = client.post("/api/submissions", json={"rating": 2, "review": review})
+
+    stored = db.get(Submission, uuid.UUID(response.json()["submission_id"]))
+    assert stored.review == review
+    assert stored.prompt_tokens == prompt_tokens(review, 2) < count_tokens(review)
+
+
+def test_single_submissions_count_tokens_off_the_event_loop(client, monkeypatch):
+    count = submissions_router._count_prompt_tokens
+    threads = []
+
+    def tracked(review_text, rating):
+        threads.append(threading.current_thread())
+        return count(review_text, rating)
+
+    monkeypatch.setattr(submissions_router, "_count_prompt_tokens", tracked)
+    assert client.post("/api/submissions", json={"rating": 4, "review": "Lovely terrace."}).status_code == 200
+
+    # asyncio.to_thread runs it in the default executor, not on the loop's thread
+    assert len(threads) == 1 and threads[0].name.startswith("asyncio_")
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy.engine import make_url
+from app.core.config import settings
+from app.db.models import utc_now
+from app.db.session import async_database_url, pool_options, sync_connect_args
+
+
+def test_postgres_url_maps_to_asyncpg_with_its_ssl_option():
+    url, connect_args = async_database_url("postgresql://user:pw@db:5432/app?sslmode=require")
+
+    assert url.drivername == "postgresql+asyncpg"
+    assert "sslmode" not in url.query
+    assert url.query["prepared_statement_cache_size"] == str(settings.DB_STATEMENT_CACHE_SIZE)
+    assert connect_args == {"ssl": "require"}
+
+
+def test_statement_cache_can_be_turned_off_for_pgbouncer(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_CACHE_SIZE", 0)
+
+    _, connect_args = async_database_url("postgresql+psycopg://user:pw@db/app")
+
+    assert connect_args == {"statement_cache_size": 0}
+    assert sync_connect_args(make_url("postgresql+psycopg://user:pw@db/app")) == {"prepare_threshold": None}
+
+
+def test_sqlite_uses_aiosqlite_without_pool_sizing():
+    url, connect_args = async_database_url("sqlite:///./app.db")
+
+    assert url.drivername == "sqlite+aiosqlite" and connect_args == {}
+    assert set(pool_options(url)) == {"pool_pre_ping"}
+    assert pool_options(make_url("postgresql://db/app"))["pool_size"] == settings.DB_POOL_SIZE
+
+
+def test_unknown_backends_are_refused():
+    with pytest.raises(ValueError):
+        async_database_url("mysql://db/app")
+
+
+def test_timestamps_are_naive_utc():
+    # asyncpg refuses aware values for TIMESTAMP WITHOUT TIME ZONE columns
+    assert utc_now().tzinfo is None
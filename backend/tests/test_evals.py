@@ -0,0 +1,69 @@
+import asyncio
+import json
+import pytest
+from app.services.llm import llm_client
+from app.services.prompts import RATING_PROMPTS
+from evals.run import (
+    PredictionCache, load_dataset, parse_prediction, run_variant, stratified_sample, summarize, template_version
+)
+
+EXAMPLES = [
+    ("Terrible food and rude staff, never again.", 1),
+    ("It was fine, nothing special.", 3),
+    ("Amazing dinner, wonderful service, highly recommend!", 5),
+]
+
+
+def test_datasets_load_from_csv_and_ndjson(tmp_path):
+    csv_path = tmp_path / "reviews.csv"
+    csv_path.write_text('text,stars\n"Great, really",5\nNo label,\nOut of range,9\n', encoding="utf-8")
+    ndjson_path = tmp_path / "reviews.ndjson"
+    ndjson_path.write_text(json.dumps({"text": "Meh", "stars": "2.0"}) + "\n\n", encoding="utf-8")
+
+    assert load_dataset(csv_path, "text", "stars") == [("Great, really", 5)]
+    assert load_dataset(ndjson_path, "text", "stars") == [("Meh", 2)]
+
+
+def test_sample_is_stratified_and_repeatable():
+    examples = [(f"review {stars}-{index}", stars) for stars in range(1, 6) for index in range(10)]
+    sample = stratified_sample(examples, 10, seed=7)
+
+    assert sorted(stars for _, stars in sample) == [1, 1, 2, 2, 3, 3, 4, 4, 5, 5]
+    assert stratified_sample(examples, 10, seed=7) == sample
+
+
+def test_predictions_are_parsed_like_the_app_does():
+    assert parse_prediction('{"predicted_stars": 4, "explanation": "ok"}') == (4, None)
+    assert parse_prediction('Answer: {"predicted_stars": 2, "explanation": "meh"} done') == (2, None)
+    assert parse_prediction("no json")[0] is None
+    assert parse_prediction('{"predicted_stars": 9, "explanation": "x"}')[0] is None
+
+
+@pytest.mark.anyio
+async def test_variant_runs_concurrently_and_reruns_from_the_cache(tmp_path):
+    cache = PredictionCache(tmp_path / "predictions.jsonl")
+    variant = next(iter(RATING_PROMPTS))
+
+    results, cached = await run_variant(llm_client, "mock", variant, EXAMPLES, cache, asyncio.Semaphore(2))
+    assert cached == 0 and all(result["predicted"] for result in results)
+
+    reloaded = PredictionCache(tmp_path / "predictions.jsonl")
+    again, cached = await run_variant(llm_client, "mock", variant, EXAMPLES, reloaded, asyncio.Semaphore(2))
+    assert cached == len(EXAMPLES) and again == results
+
+
+def test_editing_a_prompt_changes_its_version():
+    assert template_version(lambda review: f"Rate: {review}") != template_version(lambda review: f"Stars? {review}")
+
+
+def test_summary_scores_valid_predictions_only():
+    results = [
+        {"predicted": 1, "latency_seconds": 0.1, "prompt_tokens": 100, "completion_tokens": 10},
+        {"predicted": None, "latency_seconds": 0.2, "prompt_tokens": 100, "completion_tokens": 10},
+        None,
+    ]
+    summary = summarize(EXAMPLES, results, input_price=1.0, output_price=2.0)
+
+    assert (summary["valid"], summary["failed_calls"], summary["accuracy"]) == (1, 1, 1.0)
+    assert summary["cost_usd"] == round((200 * 1.0 + 20 * 2.0) / 1_000_000, 6)
+    assert summary["confusion"] == {1: {1: 1}}
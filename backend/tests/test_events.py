@@ -0,0 +1,82 @@
+import asyncio
+import json
+import threading
+import pytest
+from app.core.config import settings
+from app.db.models import SubmissionStatus
+from app.db.session import SessionLocal
+from app.routers import submissions as submissions_router
+from app.services.events import event_bus
+from app.services.processing import process_submission
+from app.services.queue import claim_submissions
+
+
+def read_events(response):
+    """the data payloads and keepalive comments of an sse stream, until it closes"""
+    events = []
+    for line in response.iter_lines():
+        if line.startswith("data: "):
+            events.append(json.loads(line[len("data: "):]))
+        elif line.startswith(":"):
+            events.append(line)
+    return events
+
+
+def process_queue():
+    db = SessionLocal()
+    try:
+        for submission_id in claim_submissions(db, "worker-1", limit=10, lease_seconds=60):
+            process_submission(submission_id, db)
+    finally:
+        db.close()
+
+
+def test_stream_sends_the_current_state_and_then_the_final_one(client, monkeypatch):
+    submission_id = client.post("/api/submissions", json={"rating": 5, "review": "Lovely!"}).json()["submission_id"]
+
+    # a worker in another thread finishes it once the stream has sent the pending state
+    worker = threading.Thread(target=process_queue)
+    sse_event = submissions_router._sse_event
+
+    def start_worker_after_first_event(detail):
+        if not worker.is_alive() and worker.ident is None:
+            worker.start()
+        return sse_event(detail)
+
+    monkeypatch.setattr(submissions_router, "_sse_event", start_worker_after_first_event)
+    with client.stream("GET", f"/api/submissions/{submission_id}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = read_events(response)
+    worker.join()
+
+    assert events[0]["status"] == "PENDING"
+    assert events[-1]["status"] == "COMPLETED" and events[-1]["user_ai_response"]
+
+
+def test_finished_submission_stream_closes_straight_away(client, make_submission):
+    finished = make_submission(status=SubmissionStatus.FAILED, error_message="boom")
+
+    with client.stream("GET", f"/api/submissions/{finished.id}/events") as response:
+        events = read_events(response)
+
+    assert [event["status"] for event in events] == ["FAILED"]
+
+
+def test_idle_stream_sends_keepalives_and_ends_at_the_deadline(client, make_submission, monkeypatch):
+    monkeypatch.setattr(settings, "SSE_KEEPALIVE_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "SSE_MAX_STREAM_SECONDS", 0.2)
+    pending = make_submission()
+
+    with client.stream("GET", f"/api/submissions/{pending.id}/events") as response:
+        events = read_events(response)
+
+    assert events[0]["status"] == "PENDING"
+    assert ": keepalive" in events[1:]
+
+
+@pytest.mark.anyio
+async def test_bus_delivers_publishes_from_other_threads():
+    async with event_bus.subscribe("abc") as events:
+        threading.Thread(target=event_bus.publish, args=("abc",)).start()
+        assert await asyncio.wait_for(events.get(), timeout=1) == "abc"
+    assert event_bus.subscriber_count() == 0
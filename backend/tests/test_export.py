@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+import pytest
+from app.core.config import settings
+from app.db.models import SubmissionStatus
+from app.services.export import EXPORT_FIELDS, parquet_available
+
+
+def export(client, headers, **params):
+    response = client.get("/api/admin/submissions/export", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_csv_export_has_every_row_and_full_reviews(client, admin_headers, make_submission, monkeypatch):
+    # rows are streamed in chunks of two
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_ROWS", 2)
+    long_review = 'Long, "quoted" review. ' * 40
+    make_submission(review=long_review, recommended_actions=["Call back"])
+    for _ in range(4):
+        make_submission()
+
+    response = export(client, admin_headers)
+
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="submissions-' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 5 and list(rows[0]) == EXPORT_FIELDS
+    assert rows[0]["review"] == long_review
+    assert json.loads(rows[0]["recommended_actions"]) == ["Call back"]
+
+
+def test_empty_csv_export_is_just_the_header(client, admin_headers):
+    assert export(client, admin_headers).text.strip() == ",".join(EXPORT_FIELDS)
+
+
+def test_ndjson_export_applies_the_list_filters(client, admin_headers, make_submission):
+    failed = make_submission(rating=1, status=SubmissionStatus.FAILED, error_message="timeout")
+    make_submission(rating=1)
+    make_submission(rating=5, status=SubmissionStatus.FAILED)
+
+    response = export(client, admin_headers, format="ndjson", rating=1, status="FAILED")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [str(failed.id)]
+    assert lines[0]["status"] == "FAILED" and lines[0]["error_message"] == "timeout"
+
+
+def test_parquet_without_pyarrow_is_not_implemented(client, admin_headers):
+    if parquet_available():
+        pytest.skip("pyarrow is installed")
+    response = client.get("/api/admin/submissions/export", params={"format": "parquet"}, headers=admin_headers)
+    assert response.status_code == 501
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from app.core.config import settings
+from app.db.models import IdempotencyKey, Submission, SubmissionStatus, utc_now
+from app.services import idempotency
+
+BODY = {"rating": 3, "review": "Decent food, slow service."}
+
+
+def post(client, body=BODY, key=None):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post("/api/submissions", json=body, headers=headers)
+
+
+def test_retried_key_replays_the_original_response(client, db):
+    first = post(client, key="order-1")
+    second = post(client, key="order-1")
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert db.query(Submission).count() == 1
+
+
+def test_key_reused_for_another_submission_is_rejected(client):
+    post(client, key="order-1")
+    response = post(client, body={"rating": 1, "review": "Something else entirely."}, key="order-1")
+    assert response.status_code == 422
+
+
+def test_expired_key_creates_a_new_submission(client, db):
+    first = post(client, key="order-1")
+    db.query(IdempotencyKey).update({IdempotencyKey.expires_at: utc_now() - timedelta(seconds=1)})
+    db.commit()
+
+    second = post(client, key="order-1")
+
+    assert second.json()["submission_id"] != first.json()["submission_id"]
+    assert "Idempotent-Replayed" not in second.headers
+    assert db.query(IdempotencyKey).count() == 1
+
+
+def test_expired_keys_are_purged(client, db, monkeypatch):
+    monkeypatch.setattr(idempotency, "_PURGE_EVERY_N_WRITES", 1)
+    post(client, key="old")
+    db.query(IdempotencyKey).update({IdempotencyKey.expires_at: utc_now() - timedelta(seconds=1)})
+    db.commit()
+
+    post(client, body={"rating": 5, "review": "Another visit, much better."}, key="new")
+
+    db.expire_all()
+    assert db.query(IdempotencyKey).count() == 1
+
+
+def test_concurrent_retry_with_the_same_key_gets_the_first_response(client, db, monkeypatch):
+    first = post(client, key="order-1")
+    find_response = idempotency.find_response
+    calls = []
+
+    async def miss_once(*args):
+        # the first lookup runs before the concurrent request commits its key
+        calls.append(args)
+        return None if len(calls) == 1 else await find_response(*args)
+
+    monkeypatch.setattr(idempotency, "find_response", miss_once)
+    second = post(client, key="order-1")
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert db.query(Submission).count() == 1
+
+
+def test_identical_submissions_within_the_window_are_deduplicated(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "DEDUPE_WINDOW_SECONDS", 60.0)
+    first = post(client).json()
+    assert post(client, body={"rating": 3, "review": "  decent FOOD, slow service. "}).json() == first
+
+    # a failed submission can be sent again
+    db.query(Submission).update({Submission.status: SubmissionStatus.FAILED})
+    db.commit()
+    assert post(client).json()["submission_id"] != first["submission_id"]
+
+
+def test_deduplication_is_off_by_default(client):
+    assert post(client).json() != post(client).json()
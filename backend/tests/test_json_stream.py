@@ -0,0 +1,157 @@
+import asyncio
+import json
+import pytest
+from langchain.schema import AIMessage
+from langchain_core.messages import AIMessageChunk
+from app.core.config import settings
+from app.services.llm import LLMClient, llm_client
+from app.services.providers import LLMProvider, LLMRouter
+from app.services.rate_limit import CircuitBreaker, ProviderRateLimiter
+from app.utils.json_stream import IncrementalJSONParser
+
+ANSWER = {
+    "user_ai_response": 'Thanks! We fixed the "cold {soup}" issue \\\\ promise.',
+    "admin_summary": "Soup complaint, resolved.",
+    "recommended_actions": ["Check the [kitchen]", {"owner": "chef"}],
+    "score": -1.5e2,
+    "urgent": False,
+    "note": None,
+}
+
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+class StreamingModel:
+    """
+    streams the reply member of `answer` first, then the rest after `delay` seconds (or raises
+    `error` instead), and answers a plain invoke - the repair call - with `repaired`
+    """
+
+    def __init__(self, answer: dict, delay=0.0, error=None, repaired=None):
+        self.answer, self.delay, self.error, self.repaired = answer, delay, error, repaired
+
+    def bind(self, response_format=None):
+        return self
+
+    def _pieces(self):
+        text = json.dumps(self.answer)
+        cut = text.index(",") + 1
+        return text[:cut], text[cut:]
+
+    def stream(self, messages):
+        head, rest = self._pieces()
+        yield AIMessageChunk(content=head)
+        if self.error:
+            raise self.error
+        yield AIMessageChunk(content=rest)
+
+    async def astream(self, messages):
+        head, rest = self._pieces()
+        yield AIMessageChunk(content=head)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        yield AIMessageChunk(content=rest)
+
+    def invoke(self, messages):
+        return AIMessage(content=json.dumps(self.repaired))
+
+
+def reply(text: str, complete=True) -> dict:
+    answer = {"user_ai_response": text, "admin_summary": "Soup complaint."}
+    return {**answer, "recommended_actions": ["Check the soup"]} if complete else answer
+
+
+def make_client(*models, retries=0):
+    providers = [
+        LLMProvider(
+            f"p{index}", "mock", f"p{index}-model", model, 1.0 if index == 0 else 0.0,
+            ProviderRateLimiter(0, 0, name=f"p{index}"), CircuitBreaker(5, 60, name=f"p{index}")
+        )
+        for index, model in enumerate(models)
+    ]
+    client = LLMClient(router=LLMRouter(providers))
+    client.max_retries = retries
+    return client
+
+
+def feed_in_pieces(text: str, size: int):
+    parser = IncrementalJSONParser()
+    fields = []
+    for start in range(0, len(text), size):
+        fields += parser.feed(text[start:start + size])
+    return parser, fields
+
+
+def test_members_are_emitted_as_they_complete():
+    text = json.dumps(ANSWER)
+    for size in (1, 7, len(text)):
+        parser, fields = feed_in_pieces(text, size)
+        assert parser.complete
+        assert fields == list(ANSWER.items())
+        assert parser.value() == ANSWER
+
+
+def test_first_member_arrives_before_the_object_is_complete():
+    text = json.dumps(ANSWER)
+    parser = IncrementalJSONParser()
+    cut = text.index('"admin_summary"')
+
+    assert parser.feed(text[:cut]) == [("user_ai_response", ANSWER["user_ai_response"])]
+    assert not parser.complete
+
+
+def test_surrounding_prose_is_skipped():
+    parser, fields = feed_in_pieces('Here is the JSON:\n{"a": 1, "b": [2]}\nHope that helps!', 5)
+    assert fields == [("a", 1), ("b", [2])]
+    assert parser.value() == {"a": 1, "b": [2]}
+
+
+def test_invalid_json_stops_the_parser():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a" 1}')
+    assert parser.error and parser.done and not parser.complete
+
+
+def test_client_hands_over_the_user_response_early():
+    early = []
+    output = llm_client.generate("The waiter was rude.", 1, on_user_response=early.append)
+    assert early == [output.user_ai_response]
+
+
+def test_early_reply_is_withdrawn_when_the_answer_is_repaired():
+    client = make_client(StreamingModel(reply("Sorry!", complete=False), repaired=reply("Sorry, fixing it.")))
+    early = []
+
+    output = client.generate("The soup was cold.", 1, on_user_response=early.append)
+
+    assert output.user_ai_response == "Sorry, fixing it."
+    assert early == ["Sorry!", None]
+
+
+def test_early_reply_of_a_failed_attempt_is_withdrawn_before_failover():
+    failing = StreamingModel(reply("From the primary."), error=Unavailable())
+    client = make_client(failing, StreamingModel(reply("From the standby.")), retries=1)
+    early = []
+
+    output = client.generate("The soup was cold.", 1, on_user_response=early.append)
+
+    assert output.user_ai_response == "From the standby."
+    assert early == ["From the primary.", None, "From the standby."]
+
+
+@pytest.mark.anyio
+async def test_hedged_attempts_only_keep_the_winners_reply(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_DELAY_MS", 10)
+    client = make_client(StreamingModel(reply("From the slow one."), delay=1), StreamingModel(reply("From the hedge.")))
+    early = []
+
+    output = await client.agenerate("The soup was cold.", 1, on_user_response=early.append)
+
+    # the primary streamed its reply alone, then lost the race; the hedge never sends while racing
+    assert output.user_ai_response == "From the hedge."
+    assert early == ["From the slow one.", None]
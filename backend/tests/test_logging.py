@@ -0,0 +1,58 @@
+import json
+import logging
+import uuid
+from app.core.logging import (
+    ContextFilter, JsonFormatter, SamplingFilter, log_context, stage_timings, timed_stage
+)
+from app.db.models import Submission
+
+
+def record(level=logging.INFO, **extra) -> logging.LogRecord:
+    log_record = logging.LogRecord("app.test", level, __file__, 1, "hello %s", ("world",), None)
+    for key, value in extra.items():
+        setattr(log_record, key, value)
+    return log_record
+
+
+def test_request_id_is_echoed_or_generated(client):
+    assert client.get("/health", headers={"X-Request-ID": "abc-123"}).headers["x-request-id"] == "abc-123"
+    assert len(client.get("/health").headers["x-request-id"]) == 32
+    assert client.get("/health", headers={"X-Request-ID": "x" * 65}).headers["x-request-id"] != "x" * 65
+
+
+def test_submission_keeps_the_id_of_the_request_that_created_it(client, db):
+    response = client.post("/api/submissions", json={"rating": 4, "review": "Nice."}, headers={"X-Request-ID": "req-42"})
+    assert db.get(Submission, uuid.UUID(response.json()["submission_id"])).request_id == "req-42"
+
+
+def test_json_lines_carry_the_correlation_ids_and_extras():
+    log_record = record(stage_ms={"llm": 12.5})
+    with log_context(request_id="req-1", submission_id="sub-1"):
+        ContextFilter().filter(log_record)
+
+    payload = json.loads(JsonFormatter().format(log_record))
+
+    assert payload["message"] == "hello world" and payload["level"] == "INFO"
+    assert payload["request_id"] == "req-1" and payload["submission_id"] == "sub-1"
+    assert payload["stage_ms"] == {"llm": 12.5}
+
+
+def test_sampling_keeps_warnings_and_whole_submissions():
+    sampler = SamplingFilter(0.5)
+    assert SamplingFilter(0.0).filter(record(logging.WARNING))
+    assert not SamplingFilter(0.0).filter(record(submission_id="sub-1"))
+
+    # the decision is the same for every line of a submission
+    decisions = {sampler.filter(record(submission_id=f"sub-{index}")) for index in range(50)}
+    assert decisions == {True, False}
+    assert len({sampler.filter(record(submission_id="sub-7")) for _ in range(20)}) == 1
+
+
+def test_stage_timings_add_up_within_a_context():
+    with log_context(submission_id="sub-1"):
+        with timed_stage("db"):
+            pass
+        with timed_stage("db"):
+            pass
+        assert set(stage_timings()) == {"db"}
+    assert stage_timings() == {}
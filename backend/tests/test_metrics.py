@@ -0,0 +1,68 @@
+import threading
+import uuid
+from datetime import timedelta
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from app.core.metrics import instrument_engine
+from app.db.models import utc_now
+from app.services.processing import process_submission
+from app.services.queue import claim_submissions
+from app.services.scheduling import STANDARD_LANE
+
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_timed_per_route_template(client):
+    labels = {"method": "GET", "route": "/api/submissions/{submission_id}", "status": "404"}
+    before = sample("http_request_duration_seconds_count", labels)
+
+    client.get(f"/api/submissions/{uuid.uuid4()}")
+    client.get(f"/api/submissions/{uuid.uuid4()}")
+
+    assert sample("http_request_duration_seconds_count", labels) == before + 2
+
+
+def test_scrape_reports_queue_depth_and_age(client, make_submission):
+    make_submission(created_at=utc_now() - timedelta(minutes=5))
+    make_submission(locked_by="worker-1", locked_until=utc_now() + timedelta(minutes=1))
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'submission_queue_depth{state="ready"} 1.0' in response.text
+    assert 'submission_queue_depth{state="leased"} 1.0' in response.text
+    assert sample("submission_queue_oldest_age_seconds", {}) >= 300
+
+
+def test_processing_outcomes_are_counted(make_submission, db):
+    make_submission()
+    completed = sample("submissions_processed_total", {"outcome": "completed"})
+    waits = sample("submission_queue_wait_seconds_count", {"lane": STANDARD_LANE})
+
+    for submission_id in claim_submissions(db, "worker-1", limit=1, lease_seconds=60):
+        process_submission(submission_id, db)
+
+    assert sample("submissions_processed_total", {"outcome": "completed"}) == completed + 1
+    assert sample("submission_queue_wait_seconds_count", {"lane": STANDARD_LANE}) == waits + 1
+
+
+def test_pool_wait_is_measured_separately_from_hold_time():
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=5)
+    instrument_engine(engine, "exhausted")
+    labels = {"engine": "exhausted"}
+    held = engine.connect()
+
+    # a second caller waits until the only connection is returned
+    release = threading.Timer(0.2, held.close)
+    release.start()
+    with engine.connect():
+        pass
+    release.join()
+
+    assert sample("db_pool_wait_seconds_count", labels) == 2
+    assert sample("db_pool_wait_seconds_sum", labels) >= 0.2
+    assert sample("db_pool_connection_hold_seconds_count", labels) == 2
+    assert sample("db_pool_checked_out_connections", labels) == 0
@@ -0,0 +1,79 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from langchain.schema import HumanMessage, SystemMessage
+from app.services.mock_llm import MockChatModel, MockLLMError
+from app.services.prompts import get_system_prompt, get_user_prompt
+from benchmarks import mock_llm_server
+from benchmarks.run import percentile, summarize
+
+
+def messages(rating: int):
+    return [SystemMessage(content=get_system_prompt()), HumanMessage(content=get_user_prompt(rating, "It was fine."))]
+
+
+def test_answers_follow_the_rating():
+    model = MockChatModel()
+    negative = json.loads(model.invoke(messages(1)).content)
+    positive = json.loads(model.invoke(messages(5)).content)
+
+    assert negative != positive
+    assert set(positive) == {"user_ai_response", "admin_summary", "recommended_actions"}
+
+
+def test_malformed_answers_alternate_between_prose_and_truncated_json():
+    model = MockChatModel(malformed_rate=1, seed=1)
+    prose, truncated = model.invoke(messages(4)).content, model.invoke(messages(4)).content
+
+    assert prose.startswith("Sure!") and "{" in prose
+    with pytest.raises(ValueError):
+        json.loads(truncated)
+    # json mode keeps the syntax valid but drops a required field
+    assert "recommended_actions" not in json.loads(
+        model.bind(response_format={"type": "json_object"}).invoke(messages(4)).content
+    )
+
+
+def test_failures_look_like_a_503():
+    with pytest.raises(MockLLMError) as error:
+        MockChatModel(failure_rate=1).invoke(messages(3))
+    assert error.value.status_code == 503
+
+
+def test_stream_chunks_add_up_to_the_answer_with_usage_last():
+    model = MockChatModel()
+    chunks = list(model.stream(messages(2)))
+
+    assert "".join(chunk.content for chunk in chunks) == model.invoke(messages(2)).content
+    assert chunks[-1].response_metadata["token_usage"]["total_tokens"] > 0
+    assert all(not chunk.response_metadata for chunk in chunks[:-1])
+
+
+def test_server_speaks_the_openai_protocol():
+    body = {"model": "mock", "messages": [
+        {"role": "system", "content": get_system_prompt()},
+        {"role": "user", "content": get_user_prompt(5, "Great!")},
+    ]}
+    with TestClient(mock_llm_server.app) as server:
+        response = server.post("/v1/chat/completions", json=body)
+        streamed = server.post("/openai/v1/chat/completions", json={**body, "stream": True})
+
+    assert response.headers["x-ratelimit-remaining-requests"]
+    content = response.json()["choices"][0]["message"]["content"]
+    assert json.loads(content)["user_ai_response"]
+
+    events = [line[len("data: "):] for line in streamed.text.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    deltas = [json.loads(event)["choices"][0]["delta"].get("content", "") for event in events[:-1]]
+    assert "".join(deltas) == content
+
+
+def test_benchmark_percentiles_use_the_nearest_rank():
+    latencies = [0.1, 0.2, 0.3, 0.4]
+    assert percentile(latencies, 50) == 0.2
+    assert percentile(latencies, 99) == 0.4
+    assert percentile([], 50) is None
+
+    summary = summarize(latencies, errors=1, elapsed=2.0)
+    assert summary["requests"] == 5 and summary["requests_per_second"] == 2.0
+    assert summary["p95_ms"] == 400.0
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from langchain.schema import AIMessage, HumanMessage
+from prometheus_client import REGISTRY
+from app.core.config import LLMProviderConfig, settings
+from app.services.llm import LLMClient
+from app.services.mock_llm import MockChatModel
+from app.services.providers import LLMProvider, LLMRouter, build_provider
+from app.services.rate_limit import CircuitBreaker, CircuitOpenError, ProviderRateLimiter
+
+MESSAGES = [HumanMessage(content="hello")]
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+class FixedModel:
+    """answers with `content` after `delay` seconds, or raises `error`"""
+
+    def __init__(self, content="ok", delay=0.0, error=None):
+        self.content, self.delay, self.error = content, delay, error
+        self.calls = 0
+
+    def bind(self, response_format=None):
+        return self
+
+    def invoke(self, messages):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return AIMessage(content=self.content)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.delay)
+        return self.invoke(messages)
+
+
+def provider(name, model, weight=1.0, threshold=5):
+    return LLMProvider(
+        name, "mock", f"{name}-model", model, weight,
+        ProviderRateLimiter(0, 0, name=name), CircuitBreaker(threshold, 60, name=name)
+    )
+
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_failed_call_fails_over_to_the_standby_provider():
+    primary, standby = FixedModel(error=Unavailable()), FixedModel("from standby")
+    client = LLMClient(router=LLMRouter([provider("primary", primary), provider("standby", standby, weight=0)]))
+    client.max_retries = 1
+    failovers = sample("llm_failovers_total", {"provider": "primary"})
+
+    assert client._invoke(MESSAGES).content == "from standby"
+    assert (primary.calls, standby.calls) == (1, 1)
+    assert sample("llm_failovers_total", {"provider": "primary"}) == failovers + 1
+
+
+def test_router_skips_open_circuits_and_fails_when_all_are_open():
+    first, second = provider("first", FixedModel(), threshold=1), provider("second", FixedModel(), threshold=1)
+    router = LLMRouter([first, second])
+
+    first.circuit_breaker.record_failure()
+    assert all(router.choose() is second for _ in range(20))
+
+    second.circuit_breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        router.choose()
+
+
+def test_failing_provider_sheds_traffic():
+    healthy, flaky = provider("healthy", FixedModel()), provider("flaky", FixedModel())
+    for _ in range(30):
+        flaky.record(0.1, error=True)
+
+    picks = [LLMRouter([healthy, flaky]).choose().name for _ in range(300)]
+    assert picks.count("healthy") > 250
+
+
+@pytest.mark.anyio
+async def test_slow_call_is_hedged_to_another_provider(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_DELAY_MS", 10)
+    slow, fast = FixedModel("slow", delay=1), FixedModel("fast")
+    client = LLMClient(router=LLMRouter([provider("slow", slow), provider("fast", fast, weight=0)]))
+    hedges = sample("llm_hedges_total", {"winner": "hedge"})
+
+    assert (await client._ainvoke(MESSAGES)).content == "fast"
+    assert sample("llm_hedges_total", {"winner": "hedge"}) == hedges + 1
+
+
+def test_providers_are_built_from_config():
+    built = build_provider(LLMProviderConfig(name="local", kind="mock", weight=2, requests_per_minute=0))
+
+    assert isinstance(built.llm, MockChatModel)
+    assert built.model == settings.LLM_MODEL and built.weight == 2
+    with pytest.raises(ValueError):
+        build_provider(LLMProviderConfig(name="bad", kind="carrier-pigeon"))
+
+
+def test_unusable_configs_are_skipped(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROVIDERS", [
+        LLMProviderConfig(name="bad", kind="carrier-pigeon"), LLMProviderConfig(name="local", kind="mock"),
+    ])
+    assert [p.name for p in LLMRouter.from_settings().providers] == ["local"]
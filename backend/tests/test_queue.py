@@ -0,0 +1,76 @@
+from datetime import timedelta
+from app.db.models import Submission, SubmissionStatus, utc_now
+from app.services.queue import claim_submissions, defer_submission, release_lease
+
+
+def test_claim_leases_rows_and_counts_an_attempt(db, make_submission):
+    submission = make_submission()
+
+    claimed = claim_submissions(db, "worker-1", limit=10, lease_seconds=60)
+
+    assert [str(submission_id) for submission_id in claimed] == [str(submission.id)]
+    db.refresh(submission)
+    assert submission.locked_by == "worker-1"
+    assert submission.locked_until > utc_now().replace(tzinfo=None)
+    assert submission.attempts == 1
+
+
+def test_leased_rows_are_not_claimed_twice(db, make_submission):
+    make_submission()
+    make_submission()
+
+    first = claim_submissions(db, "worker-1", limit=1, lease_seconds=60)
+    second = claim_submissions(db, "worker-2", limit=10, lease_seconds=60)
+
+    assert len(first) == 1 and len(second) == 1
+    assert first != second
+    assert claim_submissions(db, "worker-3", limit=10, lease_seconds=60) == []
+
+
+def test_expired_lease_can_be_claimed_again(db, make_submission):
+    submission = make_submission(
+        locked_by="crashed-worker",
+        locked_until=utc_now() - timedelta(seconds=1),
+        attempts=1
+    )
+
+    claimed = claim_submissions(db, "worker-2", limit=10, lease_seconds=60)
+
+    assert [str(submission_id) for submission_id in claimed] == [str(submission.id)]
+    db.refresh(submission)
+    assert submission.locked_by == "worker-2"
+    assert submission.attempts == 2
+
+
+def test_only_pending_rows_with_attempts_left_are_claimed(db, make_submission):
+    make_submission(status=SubmissionStatus.COMPLETED)
+    make_submission(status=SubmissionStatus.FAILED)
+    make_submission(attempts=3)
+
+    assert claim_submissions(db, "worker-1", limit=10, lease_seconds=60) == []
+
+
+def test_limit_caps_the_batch(db, make_submission):
+    for _ in range(5):
+        make_submission()
+
+    assert len(claim_submissions(db, "worker-1", limit=3, lease_seconds=60)) == 3
+    assert claim_submissions(db, "worker-1", limit=0, lease_seconds=60) == []
+
+
+def test_release_and_defer(db, make_submission):
+    submission = make_submission()
+    claim_submissions(db, "worker-1", limit=1, lease_seconds=60)
+    db.refresh(submission)
+
+    defer_submission(submission, 30)
+    db.commit()
+    db.refresh(submission)
+    # deferred rows wait out the delay without losing an attempt
+    assert submission.locked_by is None
+    assert submission.attempts == 0
+    assert claim_submissions(db, "worker-1", limit=1, lease_seconds=60) == []
+
+    release_lease(submission)
+    db.commit()
+    assert db.query(Submission).filter(Submission.locked_until.is_(None)).count() == 1
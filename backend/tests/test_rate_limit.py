@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from langchain.schema import AIMessage, HumanMessage
+from app.services.llm import LLMClient
+from app.services.providers import LLMProvider, LLMRouter
+from app.services.rate_limit import (
+    CircuitBreaker, CircuitOpenError, ProviderRateLimiter, TokenBucket, parse_duration, parse_retry_after
+)
+
+MESSAGES = [HumanMessage(content="hello")]
+
+
+class StatusError(Exception):
+    """provider error carrying an http status, like the sdk errors"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+
+
+class ScriptedModel:
+    """chat model that answers with the next scripted outcome, raising it if it's an exception"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    def bind(self, response_format=None):
+        return self
+
+    def invoke(self, messages):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return AIMessage(content=outcome)
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+def make_client(*outcomes, threshold: int = 2, requests_per_minute: int = 0):
+    breaker = CircuitBreaker(threshold, reset_seconds=0, name="scripted")
+    provider = LLMProvider(
+        "scripted", "mock", "scripted-model", ScriptedModel(*outcomes), 1.0,
+        ProviderRateLimiter(requests_per_minute, 0, name="scripted"), breaker
+    )
+    client = LLMClient(router=LLMRouter([provider]))
+    client.max_retries = 0
+    return client, breaker
+
+
+def test_parse_durations_and_retry_after():
+    assert parse_duration("1m30s") == 90
+    assert parse_duration("250ms") == pytest.approx(0.25)
+    assert parse_duration("7.5") == 7.5
+    assert parse_duration("soon") is None
+    assert parse_retry_after("12") == 12
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_token_bucket_queues_and_try_reserve_refuses():
+    bucket = TokenBucket(60, capacity=2)
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    # try_reserve takes nothing when the bucket is short
+    assert bucket.try_reserve(1) > 0
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(2, reset_seconds=60)
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert not breaker.allows_requests()
+
+
+def test_probe_success_closes_and_failure_reopens():
+    breaker = CircuitBreaker(1, reset_seconds=0)
+    breaker.record_failure()
+    breaker.check()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.check()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_throttled_probe_reopens_but_closed_circuit_ignores_429():
+    breaker = CircuitBreaker(1, reset_seconds=0)
+    breaker.record_throttled()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_throttled()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_rate_limited_probe_does_not_leave_the_breaker_half_open():
+    client, breaker = make_client(StatusError(503), StatusError(503), StatusError(429), '{"ok": true}')
+
+    for _ in range(3):
+        with pytest.raises(Exception):
+            client._invoke(MESSAGES)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # the next call is let through as a new probe instead of every call failing with an open circuit
+    assert client._invoke(MESSAGES).content == '{"ok": true}'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_error_probe_closes_the_breaker():
+    client, breaker = make_client(StatusError(503), StatusError(503), StatusError(400))
+
+    for _ in range(3):
+        with pytest.raises(Exception):
+            client._invoke(MESSAGES)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.anyio
+async def test_probe_cancelled_while_rate_limited_is_released():
+    client, breaker = make_client('{"ok": true}', threshold=1, requests_per_minute=1)
+    provider = client.router.providers[0]
+    # use up the one request so the probe below waits in the rate limiter
+    provider.rate_limiter.reserve(1)
+    breaker.record_failure()
+
+    task = asyncio.create_task(client._acall_provider(provider, MESSAGES, lambda p, m: p.llm.ainvoke(m), 1))
+    await asyncio.sleep(0.05)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allows_requests()
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from prometheus_client import REGISTRY
+from app.db.models import LLMResponseCache, utc_now
+from app.schemas.submissions import LLMOutput
+from app.services.response_cache import ResponseCache
+
+OUTPUT = LLMOutput(user_ai_response="Thanks!", admin_summary="Happy customer.", recommended_actions=["Say thanks"])
+
+
+def lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("llm_cache_lookups_total", {"result": result}) or 0.0
+
+
+def test_normalized_duplicates_share_an_entry():
+    cache = ResponseCache("test-model")
+    cache.set("Great   product", 5, OUTPUT)
+
+    assert cache.get("great product", 5) == OUTPUT
+    assert cache.get("great product", 4) is None
+    assert ResponseCache("other-model").get("great product", 5) is None
+
+
+def test_lookups_are_exported_as_metrics():
+    cache = ResponseCache("test-model")
+    misses, hits = lookups("miss"), lookups("memory_hit")
+
+    cache.get("Nice", 4)
+    cache.set("Nice", 4, OUTPUT)
+    cache.get("Nice", 4)
+
+    assert lookups("miss") == misses + 1
+    assert lookups("memory_hit") == hits + 1
+
+
+def test_persistent_tier_is_read_after_the_memory_tier_is_lost():
+    cache = ResponseCache("test-model")
+    cache.persistent = True
+    cache.set("Cold soup", 1, OUTPUT)
+    cache.memory.clear()
+    db_hits = lookups("db_hit")
+
+    assert cache.get("Cold soup", 1) == OUTPUT
+    assert lookups("db_hit") == db_hits + 1
+
+
+def test_admin_stats_count_the_shared_tier(client, admin_headers, db):
+    now = utc_now()
+    db.add_all([
+        LLMResponseCache(cache_key="a" * 64, model="m", payload=OUTPUT.model_dump(), created_at=now, expires_at=now + timedelta(hours=1)),
+        LLMResponseCache(cache_key="b" * 64, model="m", payload=OUTPUT.model_dump(), created_at=now, expires_at=now - timedelta(hours=1)),
+    ])
+    db.commit()
+
+    response = client.get("/api/admin/llm-cache", headers=admin_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["db_entries"] == 1
+    assert body["enabled"] is True
@@ -0,0 +1,140 @@
+from datetime import timedelta
+import pytest
+from app.core.config import settings
+from app.db.models import SubmissionStatus, utc_now
+from app.services.llm import llm_client
+from app.services.processing import process_submission, process_submission_async
+from app.services.queue import claim_submissions
+from app.services.rate_limit import LLMUnavailableError
+from app.services.retries import retry_delay, sweep_submissions
+
+
+def replies_then_raises(error: Exception):
+    """llm call that streams the user reply early and then fails"""
+
+    def generate(review_text, rating, on_user_response=None):
+        on_user_response("Thanks for the feedback!")
+        raise error
+
+    async def agenerate(review_text, rating, on_user_response=None):
+        generate(review_text, rating, on_user_response)
+
+    return generate, agenerate
+
+
+@pytest.fixture
+def claimed(make_submission, db):
+    submission = make_submission()
+    assert claim_submissions(db, "worker-1", limit=1, lease_seconds=60) == [submission.id]
+    return submission
+
+
+def test_deferral_clears_the_early_reply(claimed, db, monkeypatch):
+    generate, _ = replies_then_raises(LLMUnavailableError("rate limited", retry_after=30))
+    monkeypatch.setattr(llm_client, "generate", generate)
+
+    process_submission(claimed.id, db)
+
+    db.refresh(claimed)
+    assert claimed.status == SubmissionStatus.PENDING
+    assert claimed.user_ai_response is None
+    # the provider being unavailable doesn't use up an attempt
+    assert claimed.attempts == 0
+    assert claimed.locked_by is None and claimed.locked_until > utc_now()
+
+
+@pytest.mark.anyio
+async def test_async_deferral_clears_the_early_reply(claimed, db, monkeypatch):
+    _, agenerate = replies_then_raises(LLMUnavailableError("rate limited", retry_after=30))
+    monkeypatch.setattr(llm_client, "agenerate", agenerate)
+
+    await process_submission_async(claimed.id)
+
+    db.refresh(claimed)
+    assert claimed.status == SubmissionStatus.PENDING
+    assert claimed.user_ai_response is None
+
+
+def test_failure_schedules_a_retry_without_the_early_reply(claimed, db, monkeypatch):
+    generate, _ = replies_then_raises(ValueError("invalid llm output"))
+    monkeypatch.setattr(llm_client, "generate", generate)
+
+    process_submission(claimed.id, db)
+
+    db.refresh(claimed)
+    assert claimed.status == SubmissionStatus.FAILED
+    assert claimed.user_ai_response is None
+    assert claimed.error_message == "invalid llm output"
+    assert claimed.next_retry_at > utc_now()
+
+
+def test_retry_delay_backs_off_up_to_the_maximum():
+    assert retry_delay(1) == settings.RETRY_BACKOFF_BASE_SECONDS
+    assert retry_delay(2) == 2 * settings.RETRY_BACKOFF_BASE_SECONDS
+    assert retry_delay(50) == settings.RETRY_BACKOFF_MAX_SECONDS
+
+
+def test_sweep_requeues_due_retries(make_submission, db):
+    now = utc_now()
+    due = make_submission(status=SubmissionStatus.FAILED, attempts=1, next_retry_at=now - timedelta(seconds=1))
+    later = make_submission(status=SubmissionStatus.FAILED, attempts=1, next_retry_at=now + timedelta(hours=1))
+    final = make_submission(status=SubmissionStatus.FAILED, attempts=3, next_retry_at=None)
+
+    assert sweep_submissions(db)["retried"] == 1
+
+    for submission in (due, later, final):
+        db.refresh(submission)
+    assert due.status == SubmissionStatus.PENDING and due.next_retry_at is None
+    assert later.status == SubmissionStatus.FAILED
+    assert final.status == SubmissionStatus.FAILED
+
+
+def test_sweep_releases_expired_leases_and_clears_their_reply(make_submission, db):
+    expired = utc_now() - timedelta(seconds=1)
+    crashed = make_submission(
+        locked_by="worker-1", locked_until=expired, attempts=1, user_ai_response="Thanks for the feedback!"
+    )
+    exhausted = make_submission(locked_by="worker-1", locked_until=expired, attempts=settings.RETRY_MAX_ATTEMPTS)
+    # deferred rows have a lease time but no owner
+    deferred = make_submission(locked_until=expired)
+
+    counts = sweep_submissions(db)
+
+    assert counts == {"retried": 0, "released": 1, "abandoned": 1}
+    for submission in (crashed, exhausted, deferred):
+        db.refresh(submission)
+    assert crashed.status == SubmissionStatus.PENDING
+    assert crashed.locked_by is None and crashed.user_ai_response is None
+    assert exhausted.status == SubmissionStatus.FAILED
+    assert exhausted.error_message.startswith("Abandoned after")
+    assert deferred.status == SubmissionStatus.PENDING
+
+
+def test_admin_requeue_filters_and_resets_attempts(client, admin_headers, make_submission, db):
+    now = utc_now()
+    outage = make_submission(status=SubmissionStatus.FAILED, attempts=3, error_message="503 Service Unavailable")
+    invalid = make_submission(status=SubmissionStatus.FAILED, attempts=3, error_message="Invalid LLM response format")
+    old = make_submission(
+        status=SubmissionStatus.FAILED, attempts=3, error_message="503", created_at=now - timedelta(days=2)
+    )
+
+    response = client.post("/api/admin/submissions/requeue", headers=admin_headers, json={
+        "error_contains": "503",
+        # aware filter values are compared as naive utc
+        "created_after": (now - timedelta(days=1)).isoformat() + "+00:00",
+    })
+
+    assert response.json() == {"requeued": 1, "limit_reached": False}
+    for submission in (outage, invalid, old):
+        db.refresh(submission)
+    assert outage.status == SubmissionStatus.PENDING and outage.attempts == 0
+    assert invalid.status == SubmissionStatus.FAILED and old.status == SubmissionStatus.FAILED
+
+
+def test_admin_requeue_reports_when_the_limit_was_hit(client, admin_headers, make_submission):
+    for _ in range(2):
+        make_submission(status=SubmissionStatus.FAILED)
+
+    response = client.post("/api/admin/submissions/requeue", headers=admin_headers, json={"limit": 1})
+
+    assert response.json() == {"requeued": 1, "limit_reached": True}
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from prometheus_client import REGISTRY
+from app.core.config import settings, WorkerLaneConfig
+from app.db.models import utc_now
+from app.services.queue import claim_submissions
+from app.services.scheduling import STANDARD_LANE, priority_boost_seconds, schedule_time, worker_lanes
+from app.worker import SubmissionWorker
+
+FAST_LANE = WorkerLaneConfig(name="fast", max_rating=2, concurrency=1)
+
+
+def claims(lane: str) -> float:
+    return REGISTRY.get_sample_value("submission_queue_wait_seconds_count", {"lane": lane}) or 0.0
+
+
+def test_low_ratings_and_long_reviews_move_up():
+    assert priority_boost_seconds(5, "Fine.") < priority_boost_seconds(1, "Fine.")
+    assert priority_boost_seconds(3, "Fine.") < priority_boost_seconds(3, "x" * 1000)
+    assert priority_boost_seconds(3, "x" * 1000) == priority_boost_seconds(3, "x" * 5000)
+
+
+def test_boost_is_capped_so_age_wins(monkeypatch):
+    monkeypatch.setattr(settings, "PRIORITY_RATING_WEIGHT_SECONDS", 3600.0)
+    monkeypatch.setattr(settings, "PRIORITY_MAX_BOOST_SECONDS", 300.0)
+    now = utc_now()
+
+    assert priority_boost_seconds(1, "Awful.") == 300.0
+    # a 1-star review arriving more than the cap later still waits behind an older 5-star one
+    assert schedule_time(now, 5, "Fine.") < schedule_time(now + timedelta(seconds=301), 1, "Awful.")
+
+
+def test_claims_follow_the_schedule_not_arrival(make_submission, db):
+    now = utc_now()
+    older = make_submission(rating=5, created_at=now - timedelta(seconds=30), scheduled_at=schedule_time(now - timedelta(seconds=30), 5, "Fine."))
+    urgent = make_submission(rating=1, created_at=now, scheduled_at=schedule_time(now, 1, "Awful."))
+
+    assert claim_submissions(db, "worker-1", limit=1, lease_seconds=60) == [urgent.id]
+    assert claim_submissions(db, "worker-1", limit=1, lease_seconds=60) == [older.id]
+
+
+def test_reserved_lane_claims_only_its_ratings(make_submission, db):
+    low = make_submission(rating=2)
+    high = make_submission(rating=5)
+    fast_claims, standard_claims = claims("fast"), claims(STANDARD_LANE)
+
+    assert claim_submissions(db, "worker-1", limit=10, lease_seconds=60, lane=FAST_LANE) == [low.id]
+    assert claim_submissions(db, "worker-1", limit=10, lease_seconds=60) == [high.id]
+    assert claims("fast") == fast_claims + 1
+    assert claims(STANDARD_LANE) == standard_claims + 1
+
+
+def test_worker_lanes_put_reserved_pools_first(monkeypatch):
+    monkeypatch.setattr(settings, "WORKER_LANES", [WorkerLaneConfig(name="mid", max_rating=3, concurrency=2), FAST_LANE])
+
+    lanes = worker_lanes(4)
+
+    assert [lane.name for lane in lanes] == ["fast", "mid", STANDARD_LANE]
+    assert (lanes[-1].max_rating, lanes[-1].concurrency) == (5, 4)
+    assert SubmissionWorker(concurrency=4).concurrency == 7
@@ -0,0 +1,90 @@
+import json
+import pytest
+from langchain.schema import AIMessage
+from prometheus_client import REGISTRY
+from app.core.config import settings
+from app.services.llm import LLMClient
+from app.services.providers import LLMProvider, LLMRouter
+from app.services.rate_limit import CircuitBreaker, ProviderRateLimiter
+
+VALID = json.dumps({"user_ai_response": "Thanks!", "admin_summary": "Happy.", "recommended_actions": ["Thank them"]})
+MISSING_FIELD = json.dumps({"user_ai_response": "Thanks!", "admin_summary": "Happy."})
+
+
+class RecordingModel:
+    """answers with scripted contents and records each call's messages and response format"""
+
+    def __init__(self, *contents, response_format=None, calls=None):
+        self.contents = list(contents)
+        self.response_format = response_format
+        self.calls = [] if calls is None else calls
+
+    def bind(self, response_format=None):
+        return RecordingModel(response_format=response_format, calls=self.calls, *self.contents)
+
+    def invoke(self, messages):
+        self.calls.append((self.response_format, messages))
+        return AIMessage(content=self.contents[len(self.calls) - 1])
+
+
+@pytest.fixture(autouse=True)
+def non_streamed(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_STREAM_RESPONSES", False)
+
+
+def make_client(*contents):
+    model = RecordingModel(*contents)
+    provider = LLMProvider(
+        "scripted", "mock", "scripted-model", model, 1.0,
+        ProviderRateLimiter(0, 0, name="scripted"), CircuitBreaker(5, 60, name="scripted")
+    )
+    client = LLMClient(router=LLMRouter([provider]))
+    client.max_retries = 0
+    return client, model.calls
+
+
+def repairs(outcome: str) -> float:
+    return REGISTRY.get_sample_value("llm_repairs_total", {"model": settings.LLM_MODEL, "outcome": outcome}) or 0.0
+
+
+def test_non_streamed_calls_ask_for_json_mode():
+    client, calls = make_client(VALID)
+    assert client.generate("Great place.", 5).user_ai_response == "Thanks!"
+    assert calls[0][0] == {"type": "json_object"}
+
+
+def test_invalid_answer_is_repaired_in_the_same_conversation():
+    client, calls = make_client(MISSING_FIELD, VALID)
+    repaired = repairs("repaired")
+
+    output = client.generate("Great place.", 5)
+
+    assert output.recommended_actions == ["Thank them"]
+    repair_messages = calls[1][1]
+    assert repair_messages[-2].content == MISSING_FIELD
+    assert "recommended_actions" in repair_messages[-1].content
+    assert repairs("repaired") == repaired + 1
+
+
+def test_failed_repair_fails_the_call():
+    client, _ = make_client(MISSING_FIELD, "still not json")
+    failed = repairs("failed")
+
+    with pytest.raises(Exception, match="Invalid LLM response format"):
+        client.generate("Great place.", 5)
+    assert repairs("failed") == failed + 1
+
+
+def test_repair_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_REPAIR_ENABLED", False)
+    client, calls = make_client(MISSING_FIELD, VALID)
+
+    with pytest.raises(Exception):
+        client.generate("Great place.", 5)
+    assert len(calls) == 1
+
+
+def test_json_wrapped_in_prose_is_recovered_without_a_repair():
+    client, calls = make_client(f"Sure, here you go:\n{VALID}\nAnything else?")
+    assert client.generate("Great place.", 5).admin_summary == "Happy."
+    assert len(calls) == 1
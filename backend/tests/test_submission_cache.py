@@ -0,0 +1,95 @@
+import pytest
+from app.db.models import SubmissionStatus
+from app.routers import submissions as submissions_router
+from app.services.submission_cache import SubmissionCache, submission_cache
+
+
+@pytest.fixture
+def finished(make_submission):
+    return make_submission(status=SubmissionStatus.COMPLETED, user_ai_response="Thank you!")
+
+
+def test_finished_submission_has_etag_and_revalidates(client, finished):
+    response = client.get(f"/api/submissions/{finished.id}")
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    etag = response.headers["ETag"]
+    not_modified = client.get(f"/api/submissions/{finished.id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+
+def test_pending_submission_is_not_cached(client, make_submission):
+    pending = make_submission()
+
+    response = client.get(f"/api/submissions/{pending.id}")
+
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert submission_cache.local.get(str(pending.id)) is None
+
+
+def test_finished_submission_is_served_from_the_cache(client, finished, monkeypatch):
+    client.get(f"/api/submissions/{finished.id}")
+
+    async def no_database(*args):
+        raise AssertionError("the database was queried")
+
+    monkeypatch.setattr(submissions_router, "_load_submission", no_database)
+    assert client.get(f"/api/submissions/{finished.id}").json()["user_ai_response"] == "Thank you!"
+
+
+def test_requeue_invalidates_the_cached_detail(client, admin_headers, finished):
+    client.get(f"/api/submissions/{finished.id}")
+
+    response = client.post("/api/admin/submissions/requeue", json={"status": "COMPLETED"}, headers=admin_headers)
+
+    assert response.json()["requeued"] == 1
+    assert client.get(f"/api/submissions/{finished.id}").json()["status"] == "PENDING"
+
+
+def test_invalidation_during_the_read_keeps_the_old_row_out(client, finished, monkeypatch):
+    load_submission = submissions_router._load_submission
+
+    async def requeued_meanwhile(db, submission_id):
+        submission = await load_submission(db, submission_id)
+        # a requeue commits after the row was read but before it's cached
+        submission_cache.invalidate(submission_id)
+        return submission
+
+    monkeypatch.setattr(submissions_router, "_load_submission", requeued_meanwhile)
+    response = client.get(f"/api/submissions/{finished.id}")
+
+    assert response.json()["status"] == "COMPLETED"
+    assert submission_cache.local.get(str(finished.id)) is None
+    assert not submission_cache._reads
+
+
+@pytest.mark.anyio
+async def test_reads_are_only_spoiled_by_their_own_submission():
+    cache = SubmissionCache(10, 60)
+    first, second = await cache.begin_read("a"), await cache.begin_read("b")
+
+    cache.invalidate_local("b")
+    await cache.set(first, "{}")
+    await cache.set(second, "{}")
+    cache.end_read(first)
+    cache.end_read(second)
+
+    assert cache.local.get("a") is not None
+    assert cache.local.get("b") is None
+    # a read started after the invalidation is cached again
+    read = await cache.begin_read("b")
+    await cache.set(read, "{}")
+    assert cache.local.get("b") is not None
+
+
+def test_requeued_submission_is_not_revalidated_as_unchanged(client, admin_headers, make_submission):
+    failed = make_submission(status=SubmissionStatus.FAILED, attempts=3, error_message="503 Service Unavailable")
+    etag = client.get(f"/api/submissions/{failed.id}").headers["ETag"]
+
+    client.post("/api/admin/submissions/requeue", headers=admin_headers, json={"error_contains": "503"})
+    response = client.get(f"/api/submissions/{failed.id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "PENDING"
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import uuid
+import pytest
+from app.db.models import Submission, SubmissionStatus
+from app.services.llm import llm_client
+from app.services.processing import process_submission, process_submission_async
+from app.services.queue import claim_submissions
+from app.worker import AsyncSubmissionWorker, SubmissionWorker
+
+
+def submit(client, rating: int = 2, review: str = "The soup was cold and the waiter was rude.") -> str:
+    response = client.post("/api/submissions", json={"rating": rating, "review": review})
+    assert response.status_code == 200
+    assert response.json()["status"] == "PENDING"
+    return response.json()["submission_id"]
+
+
+def test_submission_is_processed_by_a_worker(client, db):
+    submission_id = submit(client)
+    assert client.get(f"/api/submissions/{submission_id}").json()["status"] == "PENDING"
+
+    for claimed_id in claim_submissions(db, "worker-1", limit=10, lease_seconds=60):
+        process_submission(claimed_id, db)
+
+    detail = client.get(f"/api/submissions/{submission_id}").json()
+    assert detail["status"] == "COMPLETED"
+    assert detail["user_ai_response"]
+    row = db.get(Submission, uuid.UUID(submission_id))
+    db.refresh(row)
+    assert row.admin_summary and row.recommended_actions
+    assert row.locked_by is None
+
+
+@pytest.mark.anyio
+async def test_async_processing(make_submission, db):
+    submission = make_submission(rating=5, review="Loved it, the staff were wonderful.")
+    claimed = claim_submissions(db, "worker-1", limit=10, lease_seconds=60)
+
+    await asyncio.gather(*[process_submission_async(submission_id) for submission_id in claimed])
+
+    db.refresh(submission)
+    assert submission.status == SubmissionStatus.COMPLETED
+    assert submission.user_ai_response
+
+
+def test_status_of_unknown_or_malformed_ids_is_404(client):
+    assert client.get(f"/api/submissions/{uuid.uuid4()}").status_code == 404
+    assert client.get("/api/submissions/not-a-uuid").status_code == 404
+    assert client.get("/api/submissions/not-a-uuid/events").status_code == 404
+
+
+def test_equivalent_id_spellings_find_the_submission(client):
+    submission_id = submit(client)
+    assert client.get(f"/api/submissions/{submission_id.upper()}").status_code == 200
+    assert client.get(f"/api/submissions/{submission_id.replace('-', '')}").status_code == 200
+
+
+def test_thread_pool_worker_drains_the_queue(make_submission, db):
+    submissions = [make_submission(rating=rating) for rating in (1, 3, 5)]
+    worker = SubmissionWorker(concurrency=2, poll_interval=0.05)
+
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    try:
+        for _ in range(100):
+            db.expire_all()
+            if db.query(Submission).filter(Submission.status == SubmissionStatus.PENDING).count() == 0:
+                break
+            threading.Event().wait(0.05)
+    finally:
+        worker.stop()
+        thread.join(timeout=5)
+
+    for submission in submissions:
+        db.refresh(submission)
+        assert submission.status == SubmissionStatus.COMPLETED
+
+
+@pytest.mark.anyio
+async def test_async_worker_drains_the_queue(make_submission, db):
+    submissions = [make_submission(rating=rating) for rating in (1, 3, 5)]
+    worker = AsyncSubmissionWorker(concurrency=2, poll_interval=0.05)
+    worker.start()
+    try:
+        for _ in range(100):
+            db.expire_all()
+            if db.query(Submission).filter(Submission.status == SubmissionStatus.PENDING).count() == 0:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        worker.stop()
+        await worker.join()
+
+    for submission in submissions:
+        db.refresh(submission)
+        assert submission.status == SubmissionStatus.COMPLETED
+
+
+def test_bulk_submissions_are_accepted(client):
+    response = client.post("/api/submissions/bulk", json=[
+        {"rating": 5, "review": "Wonderful evening."},
+        {"rating": 9, "review": "Out of range."},
+        {"rating": 1, "review": "Never again."},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (2, 1)
+    accepted = [result["submission_id"] for result in body["results"] if result["submission_id"]]
+    assert all(client.get(f"/api/submissions/{submission_id}").status_code == 200 for submission_id in accepted)
+
+
+@pytest.mark.anyio
+async def test_async_processing_is_bounded_by_the_limiter(make_submission, db, monkeypatch):
+    submissions = [make_submission(rating=rating) for rating in (1, 2, 3, 4)]
+    claimed = claim_submissions(db, "worker-1", limit=10, lease_seconds=60)
+    agenerate = llm_client.agenerate
+    in_flight, peak = [0], [0]
+
+    async def tracked(*args, **kwargs):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        try:
+            await asyncio.sleep(0.01)
+            return await agenerate(*args, **kwargs)
+        finally:
+            in_flight[0] -= 1
+
+    monkeypatch.setattr(llm_client, "agenerate", tracked)
+    limiter = asyncio.Semaphore(2)
+    await asyncio.gather(*[process_submission_async(submission_id, limiter) for submission_id in claimed])
+
+    assert peak[0] == 2
+    for submission in submissions:
+        db.refresh(submission)
+        assert submission.status == SubmissionStatus.COMPLETED
@@ -0,0 +1,25 @@
+import pytest
+from pydantic import ValidationError
+from app.schemas.submissions import SubmissionCreate
+
+
+def test_valid_submission_is_stripped():
+    submission = SubmissionCreate(rating=5, review="  Lovely place  ")
+    assert submission.review == "Lovely place"
+
+
+@pytest.mark.parametrize("rating", [0, 6, -1])
+def test_rating_out_of_range_is_rejected(rating):
+    with pytest.raises(ValidationError):
+        SubmissionCreate(rating=rating, review="Fine")
+
+
+@pytest.mark.parametrize("review", ["", "   ", "\n\t"])
+def test_blank_review_is_rejected(review):
+    with pytest.raises(ValidationError):
+        SubmissionCreate(rating=3, review=review)
+
+
+def test_post_rejects_invalid_body(client):
+    response = client.post("/api/submissions", json={"rating": 9, "review": "Too high"})
+    assert response.status_code == 422
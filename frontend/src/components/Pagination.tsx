@@ -3,27 +3,36 @@ import { Button } from './ui/button'
 
 interface PaginationProps {
   currentPage: number
-  totalItems: number
+  // pages 1..reachablePages can be opened, later ones only by following next_cursor
+  reachablePages: number
+  hasNextPage: boolean
+  itemsOnPage: number
   itemsPerPage: number
+  totalItems: number | null
+  totalIsEstimate?: boolean
   onPageChange: (page: number) => void
 }
 
 export function Pagination({
   currentPage,
-  totalItems,
+  reachablePages,
+  hasNextPage,
+  itemsOnPage,
   itemsPerPage,
+  totalItems,
+  totalIsEstimate = false,
   onPageChange,
 }: PaginationProps) {
-  const totalPages = Math.ceil(totalItems / itemsPerPage)
   const startItem = (currentPage - 1) * itemsPerPage + 1
-  const endItem = Math.min(currentPage * itemsPerPage, totalItems)
+  const endItem = startItem + itemsOnPage - 1
 
-  if (totalPages <= 1) return null
+  if (currentPage === 1 && !hasNextPage) return null
 
   return (
     <div className="flex items-center justify-between border-t border-border/50 pt-4">
       <p className="text-sm text-muted-foreground">
-        Showing {startItem} to {endItem} of {totalItems} results
+        Showing {startItem} to {endItem}
+        {totalItems !== null && ` of ${totalIsEstimate ? 'about ' : ''}${totalItems} results`}
       </p>
 
       <div className="flex items-center gap-2">
@@ -38,12 +47,12 @@ export function Pagination({
         </Button>
 
         <div className="flex items-center gap-1">
-          {Array.from({ length: totalPages }, (_, i) => i + 1)
+          {Array.from({ length: reachablePages }, (_, i) => i + 1)
             .filter((page) => {
               const distance = Math.abs(page - currentPage)
               return (
                 page === 1 ||
-                page === totalPages ||
+                page === reachablePages ||
                 distance <= 1
               )
             })
@@ -73,7 +82,7 @@ export function Pagination({
           variant="outline"
           size="sm"
           onClick={() => onPageChange(currentPage + 1)}
-          disabled={currentPage === totalPages}
+          disabled={!hasNextPage}
         >
           Next
           <ChevronRight className="w-4 h-4" />
@@ -40,18 +40,24 @@ export interface AdminSubmission {
   admin_summary?: string
   recommended_actions?: string[] | null
   error_message?: string
+  rank?: number | null
+  snippet?: string | null
 }
 
 interface BackendSubmissionsResponse {
   items: AdminSubmission[]
-  total: number
+  total: number | null
+  total_is_estimate: boolean
   limit: number
   offset: number
+  next_cursor: string | null
 }
 
 export interface AdminSubmissionsResponse {
   submissions: AdminSubmission[]
-  total: number
+  total: number | null
+  total_is_estimate: boolean
+  next_cursor: string | null
 }
 
 interface BackendAnalytics {
@@ -118,6 +124,37 @@ export async function getSubmissionStatus(
   return fetchApi<SubmissionStatus>(`/api/submissions/${submissionId}`)
 }
 
+/**
+ * Streams a submission's status over server-sent events.
+ * onUpdate gets the current state immediately and the final state once processing
+ * finishes; the stream is closed after a COMPLETED or FAILED update.
+ * onError is called if the stream can't be opened. Returns a function that closes it.
+ */
+export function subscribeToSubmission(
+  submissionId: string,
+  onUpdate: (submission: SubmissionStatus) => void,
+  onError: () => void
+): () => void {
+  const source = new EventSource(`${API_BASE_URL}/api/submissions/${submissionId}/events`)
+
+  source.onmessage = (event) => {
+    const data: SubmissionStatus = JSON.parse(event.data)
+    onUpdate(data)
+    if (data.status === 'COMPLETED' || data.status === 'FAILED') {
+      source.close()
+    }
+  }
+
+  // the browser reconnects on its own after dropped connections, CLOSED means it gave up
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) {
+      onError()
+    }
+  }
+
+  return () => source.close()
+}
+
 export async function adminLogin(
   credentials: LoginRequest
 ): Promise<LoginResponse> {
@@ -132,7 +169,8 @@ export async function getAdminSubmissions(params: {
   status?: string
   q?: string
   limit?: number
-  offset?: number
+  cursor?: string
+  count?: 'exact' | 'estimate' | 'none'
 }): Promise<AdminSubmissionsResponse> {
   const token = getToken()
   if (!token) {
@@ -159,6 +197,8 @@ export async function getAdminSubmissions(params: {
   return {
     submissions: data.items,
     total: data.total,
+    total_is_estimate: data.total_is_estimate,
+    next_cursor: data.next_cursor,
   }
 }
 
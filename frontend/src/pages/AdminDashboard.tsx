@@ -38,8 +38,11 @@ const ITEMS_PER_PAGE = 20
 export function AdminDashboard() {
   const [submissions, setSubmissions] = useState<AdminSubmission[]>([])
   const [analytics, setAnalytics] = useState<Analytics | null>(null)
-  const [total, setTotal] = useState(0)
+  const [total, setTotal] = useState<number | null>(null)
+  const [totalIsEstimate, setTotalIsEstimate] = useState(false)
   const [currentPage, setCurrentPage] = useState(1)
+  // cursors[n] opens page n + 1, null for the first page; a page is reachable once the one before it has loaded
+  const [cursors, setCursors] = useState<(string | null)[]>([null])
   const [loading, setLoading] = useState(true)
   const [analyticsLoading, setAnalyticsLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
@@ -69,9 +72,12 @@ export function AdminDashboard() {
     setError(null)
 
     try {
+      // follow next_cursor with an estimated total - offset paging and an exact count slow down as the table grows
+      const cursor = cursors[currentPage - 1]
       const params = {
         limit: ITEMS_PER_PAGE,
-        offset: (currentPage - 1) * ITEMS_PER_PAGE,
+        count: 'estimate' as const,
+        ...(cursor && { cursor }),
         ...(filters.rating && { rating: parseInt(filters.rating) }),
         ...(filters.status && { status: filters.status }),
         ...(filters.q && { q: filters.q }),
@@ -80,6 +86,15 @@ export function AdminDashboard() {
       const data = await getAdminSubmissions(params)
       setSubmissions(data.submissions)
       setTotal(data.total)
+      setTotalIsEstimate(data.total_is_estimate)
+      setCursors((prev) => {
+        if (!data.next_cursor) {
+          return prev.slice(0, currentPage)
+        }
+        const next = [...prev]
+        next[currentPage] = data.next_cursor
+        return next
+      })
     } catch (err) {
       if (err instanceof ApiError) {
         setError(err.message)
@@ -107,6 +122,7 @@ export function AdminDashboard() {
   const handleFilterChange = (key: string, value: string) => {
     setFilters((prev) => ({ ...prev, [key]: value }))
     setCurrentPage(1)
+    setCursors([null])
   }
 
   const handleRefresh = () => {
@@ -215,6 +231,7 @@ export function AdminDashboard() {
                   onClick={() => {
                     setFilters({ rating: '', status: '', q: '' })
                     setCurrentPage(1)
+                    setCursors([null])
                   }}
                 >
                   Clear Filters
@@ -361,8 +378,12 @@ export function AdminDashboard() {
 
                   <Pagination
                     currentPage={currentPage}
-                    totalItems={total}
+                    reachablePages={cursors.length}
+                    hasNextPage={cursors.length > currentPage}
+                    itemsOnPage={submissions.length}
                     itemsPerPage={ITEMS_PER_PAGE}
+                    totalItems={total}
+                    totalIsEstimate={totalIsEstimate}
                     onPageChange={setCurrentPage}
                   />
                 </>
@@ -6,7 +6,7 @@ import { StatusBadge } from '@/components/StatusBadge'
 import { ErrorBanner } from '@/components/ErrorBanner'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card'
 import { Button } from '@/components/ui/button'
-import { getSubmissionStatus, ApiError, SubmissionStatus as SubmissionStatusType } from '@/lib/api'
+import { getSubmissionStatus, subscribeToSubmission, ApiError, SubmissionStatus as SubmissionStatusType } from '@/lib/api'
 import { formatDate } from '@/lib/utils'
 import { Loader2, Home, Sparkles } from 'lucide-react'
 
@@ -45,10 +45,29 @@ export function SubmissionStatus() {
       }
     }
 
-    fetchStatus()
-    intervalId = window.setInterval(fetchStatus, POLL_INTERVAL_MS)
+    // fall back to polling where server-sent events aren't available
+    const startPolling = () => {
+      fetchStatus()
+      intervalId = window.setInterval(fetchStatus, POLL_INTERVAL_MS)
+    }
+
+    let unsubscribe: (() => void) | undefined
+    if (typeof EventSource === 'undefined') {
+      startPolling()
+    } else {
+      unsubscribe = subscribeToSubmission(
+        id,
+        (data) => {
+          setSubmission(data)
+          setError(null)
+          setLoading(false)
+        },
+        startPolling
+      )
+    }
 
     return () => {
+      unsubscribe?.()
       if (intervalId) {
         clearInterval(intervalId)
       }
@@ -126,7 +145,7 @@ export function SubmissionStatus() {
             </CardContent>
           </Card>
 
-          {submission.status === 'PENDING' && (
+          {submission.status === 'PENDING' && !submission.user_ai_response && (
             <Card className="glassmorphism border-primary/20 fade-in" style={{ '--delay': '0.2s' } as React.CSSProperties}>
               <CardContent className="pt-6">
                 <div className="flex items-center gap-4">
@@ -142,7 +161,7 @@ export function SubmissionStatus() {
             </Card>
           )}
 
-          {submission.status === 'COMPLETED' && submission.user_ai_response && (
+          {submission.status !== 'FAILED' && submission.user_ai_response && (
             <Card className="glassmorphism glow fade-in" style={{ '--delay': '0.2s' } as React.CSSProperties}>
               <CardHeader>
                 <CardTitle className="flex items-center gap-2">